@@ -2,26 +2,48 @@ import streamlit as st
 import streamlit_authenticator as stauth
 import yaml
 from yaml.loader import SafeLoader
-import requests
-from bs4 import BeautifulSoup
-import pandas as pd
 from collections import defaultdict
-import time
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
 from datetime import datetime, timedelta
 import json
+import logging
 import os
-from scrims import scrims_page
-import scrims# Импорт функции scrims_page из файла scrims.py
+import copy
+import hashlib
+import uuid
+import pickle
+from functools import lru_cache
+from crawler import crawl, PageCache, write_atomic
+from datasets import DatasetStore, PartialSnapshot, RefreshScheduler
+from team_aliases import TEAM_ALIASES_FILE, AliasRegistry
+from champions import get_champion_registry
+from fragments import fragments
+from draft_table import draft_rows, render_draft_table, table_id
+from notes_store import NotesStore, slot_label
+from riot_api import DEFAULT_REGION, match_region, platform_region, riot
+from match_archive import archive
+import ddragon
+# pandas, BeautifulSoup/lxml, gspread/oauth2client and scrims.py are imported inside the
+# functions that use them, so the login form renders without loading them
 
 # Set page config at the start (must be the first Streamlit command)
 st.set_page_config(layout="wide", page_title="HLL Analytics")
 
+logger = logging.getLogger(__name__)
+
 # Global constants for SoloQ
-SUMMONER_NAME_BY_URL = "https://europe.api.riotgames.com/riot/account/v1/accounts/by-riot-id/{}/{}?api_key=RGAPI-2364bf09-8116-4d02-9dde-e2ed7cde4af8"
-MATCH_HISTORY_URL = "https://europe.api.riotgames.com/lol/match/v5/matches/by-puuid/{}/ids?start=0&count=100&api_key=RGAPI-2364bf09-8116-4d02-9dde-e2ed7cde4af8"
-MATCH_BASIC_URL = "https://europe.api.riotgames.com/lol/match/v5/matches/{}?api_key=RGAPI-2364bf09-8116-4d02-9dde-e2ed7cde4af8"
+# Paths on a regional cluster (riot.url). Account-v1 finds an account on any cluster; its
+# League region says which cluster has its matches, and a match id starts with its platform.
+ACCOUNT_REGION = "europe"
+SUMMONER_NAME_BY_URL = "/riot/account/v1/accounts/by-riot-id/{}/{}?api_key=RGAPI-2364bf09-8116-4d02-9dde-e2ed7cde4af8"
+ACCOUNT_REGION_URL = "/riot/account/v1/region/by-game/lol/by-puuid/{}?api_key=RGAPI-2364bf09-8116-4d02-9dde-e2ed7cde4af8"
+MATCH_HISTORY_URL = "/lol/match/v5/matches/by-puuid/{}/ids?startTime={}&start={}&count={}&api_key=RGAPI-2364bf09-8116-4d02-9dde-e2ed7cde4af8"
+MATCH_BASIC_URL = "/lol/match/v5/matches/{}?api_key=RGAPI-2364bf09-8116-4d02-9dde-e2ed7cde4af8"
+SOLOQ_SHEET_BATCH = 25   # Rows per append to a player's worksheet while games are still being fetched
+MATCH_IDS_PAGE = 100     # Largest page of match ids the Riot API returns
+# Creation time of the newest synced game of every account: a sync only lists games after it.
+# Accounts synced for the first time go back SOLOQ_BACKFILL_DAYS days.
+SOLOQ_SYNC_STATE = os.path.join(".cache", "soloq_sync.json")
+SOLOQ_BACKFILL_DAYS = int(os.getenv("SOLOQ_BACKFILL_DAYS", "30"))
 
 # Список URL для разных этапов турнира HLL
 TOURNAMENT_URLS = {
@@ -31,6 +53,17 @@ TOURNAMENT_URLS = {
     }
 }
 
+# Disk cache for Leaguepedia pages. Pages younger than LEAGUEPEDIA_CACHE_MAX_AGE seconds
+# are reused without a request, older ones are revalidated with a conditional GET.
+LEAGUEPEDIA_CACHE_DIR = os.path.join(".cache", "leaguepedia")
+LEAGUEPEDIA_CACHE_MAX_AGE = int(os.getenv("LEAGUEPEDIA_CACHE_MAX_AGE", "600"))
+
+# Background refresh intervals in seconds (0 disables the background refresh of a dataset)
+LEAGUEPEDIA_REFRESH_INTERVAL = int(os.getenv("LEAGUEPEDIA_REFRESH_INTERVAL", "1800"))
+SOLOQ_REFRESH_INTERVAL = int(os.getenv("SOLOQ_REFRESH_INTERVAL", "3600"))
+SCRIMS_REFRESH_INTERVAL = int(os.getenv("SCRIMS_REFRESH_INTERVAL", "3600"))
+DDRAGON_REFRESH_INTERVAL = int(os.getenv("DDRAGON_REFRESH_INTERVAL", "21600"))
+
 # Team roster for Gamespace (GMS)
 team_rosters = {
     "Gamespace": {
@@ -42,466 +75,666 @@ team_rosters = {
     }
 }
 
-# Get the latest patch version from Data Dragon
-def get_latest_patch_version():
-    try:
-        response = requests.get("https://ddragon.leagueoflegends.com/api/versions.json")
-        if response.status_code == 200:
-            versions = response.json()
-            return versions[0]
-        return "14.5.1"
-    except:
-        return "14.5.1"
+TEAM_ALIASES = AliasRegistry.load()
 
-PATCH_VERSION = get_latest_patch_version()
-
-# Normalize team names
+# Normalize team names. Memoized: the scrapers call it for every row with a handful of distinct names.
+@lru_cache(maxsize=4096)
 def normalize_team_name(team_name):
     if not team_name or team_name.lower() == "unknown blue" or team_name.lower() == "unknown red":
         return "unknown"
-    
-    team_exceptions = {
-        "gamespace": "Gamespace",
-        "gms": "Gamespace",
-        "gamespace logo std": "Gamespace",
-        # Добавьте другие команды HLL при необходимости
-    }
 
     team_name_clean = team_name.lower().replace("logo std", "").strip()
-    
-    for key, normalized_name in team_exceptions.items():
-        if team_name_clean == key or key in team_name_clean:
-            return normalized_name
-    
-    return team_name_clean
-
-# Fetch match history data
-def fetch_match_history_data():
-    team_data = defaultdict(lambda: {
-        'Top': defaultdict(lambda: {'games': 0, 'wins': 0}),
-        'Jungle': defaultdict(lambda: {'games': 0, 'wins': 0}),
-        'Mid': defaultdict(lambda: {'games': 0, 'wins': 0}),
-        'ADC': defaultdict(lambda: {'games': 0, 'wins': 0}),
-        'Support': defaultdict(lambda: {'games': 0, 'wins': 0}),
-        'Bans': defaultdict(int),
-        'OpponentBlueBans': defaultdict(int),
-        'OpponentRedBans': defaultdict(int),
-        'DuoPicks': defaultdict(lambda: {'games': 0, 'wins': 0}),
-        'MatchResults': []
-    })
-
-    match_counter = defaultdict(int)
-
-    for tournament_name, urls in TOURNAMENT_URLS.items():
-        url = urls["match_history"]
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        response = requests.get(url, headers=headers)
-        
-        if response.status_code != 200:
-            st.error(f"Failed to load {tournament_name} Match History page (code {response.status_code})")
-            continue
+    return TEAM_ALIASES.resolve(team_name_clean) or team_name_clean
+
+# HTML parsing backend for the Leaguepedia pages. lxml is used when installed
+# (set LEAGUEPEDIA_HTML_PARSER to override); only the target tables are parsed.
+@lru_cache(maxsize=None)
+def get_html_parser():
+    parser = os.getenv("LEAGUEPEDIA_HTML_PARSER")
+    if parser:
+        return parser
+    try:
+        import lxml  # noqa: F401
+        return "lxml"
+    except ImportError:
+        return "html.parser"
+
+# Tag filter equivalent to a CSS selector like "span.sprite.champion-sprite",
+# but without the cost of compiling and matching a selector for every cell
+def has_classes(*class_names, name=None):
+    def match(tag):
+        if name is not None and tag.name != name:
+            return False
+        tag_classes = tag.get('class') or ()
+        return all(class_name in tag_classes for class_name in class_names)
+    return match
+
+is_champion_sprite = has_classes('sprite', 'champion-sprite')
+is_champion_sprite_span = has_classes('sprite', 'champion-sprite', name='span')
+
+# Parse only the tables (or other tags) carrying all of class_names
+def parse_tables(content, *class_names, name=None):
+    def class_attr_match(value):
+        if not value:
+            return False
+        classes = value.split() if isinstance(value, str) else value
+        return class_names[-1] in classes
+
+    from bs4 import BeautifulSoup, SoupStrainer
+
+    strainer = SoupStrainer(name, class_=class_attr_match)
+    soup = BeautifulSoup(content, get_html_parser(), parse_only=strainer)
+    return soup.find_all(has_classes(*class_names, name=name))
+
+# Parse every game row of a Match History page (None if the table is missing), oldest game
+# first: the page lists the newest first. Cached by page content, so an unchanged page is
+# never parsed twice.
+@st.cache_data(max_entries=32, show_spinner=False)
+def parse_match_history_page(content):
+    try:
+        match_history_table = parse_tables(content, 'wikitable', 'sortable', 'mhgame')[0]
+    except IndexError:
+        return None
 
-        soup = BeautifulSoup(response.content, 'html.parser')
-        try:
-            match_history_table = soup.select('.wikitable.mhgame.sortable')[0]
-        except IndexError:
-            st.error(f"Could not find match history table for {tournament_name}")
+    games = []
+    roles = ['Top', 'Jungle', 'Mid', 'ADC', 'Support']
+    for row in reversed(match_history_table.find_all('tr')[1:]):
+        cols = row.find_all('td')
+        if not cols:
             continue
-        
-        for row in match_history_table.select('tr')[1:]:
-            cols = row.select('td')
-            if not cols:
-                continue
 
-            blue_team_elem = cols[2].select_one('a[title]') if len(cols) > 2 else None
-            red_team_elem = cols[3].select_one('a[title]') if len(cols) > 3 else None
-            
-            blue_team = (blue_team_elem['title'].strip().lower().replace("||tooltip:", "").split("||")[0] if blue_team_elem and 'title' in blue_team_elem.attrs 
-                        else blue_team_elem.text.strip().lower() if blue_team_elem 
-                        else cols[2].text.strip().lower() if len(cols) > 2 else "unknown blue")
-            red_team = (red_team_elem['title'].strip().lower().replace("||tooltip:", "").split("||")[0] if red_team_elem and 'title' in red_team_elem.attrs 
-                       else red_team_elem.text.strip().lower() if red_team_elem 
-                       else cols[3].text.strip().lower() if len(cols) > 3 else "unknown red")
+        blue_team_elem = cols[2].find('a', title=True) if len(cols) > 2 else None
+        red_team_elem = cols[3].find('a', title=True) if len(cols) > 3 else None
 
-            blue_team = normalize_team_name(blue_team)
-            red_team = normalize_team_name(red_team)
+        blue_team = (blue_team_elem['title'].strip().lower().replace("||tooltip:", "").split("||")[0] if blue_team_elem and 'title' in blue_team_elem.attrs 
+                    else blue_team_elem.text.strip().lower() if blue_team_elem 
+                    else cols[2].text.strip().lower() if len(cols) > 2 else "unknown blue")
+        red_team = (red_team_elem['title'].strip().lower().replace("||tooltip:", "").split("||")[0] if red_team_elem and 'title' in red_team_elem.attrs 
+                   else red_team_elem.text.strip().lower() if red_team_elem 
+                   else cols[3].text.strip().lower() if len(cols) > 3 else "unknown red")
 
-            if blue_team == "unknown" or red_team == "unknown":
-                continue
-
-            winner_team = "unknown"
-            result_elem = cols[4].select_one('a[title]') if len(cols) > 4 else None
-            if result_elem and 'title' in result_elem.attrs:
-                winner_team = normalize_team_name(result_elem['title'].strip().lower().replace("||tooltip:", "").split("||")[0])
-            else:
-                result_text = cols[4].text.strip().lower() if len(cols) > 4 else ""
-                if result_text == "1:0":
-                    winner_team = blue_team
-                elif result_text == "0:1":
-                    winner_team = red_team
-
-            if winner_team == "unknown":
-                result_blue = 'Loss'
-                result_red = 'Loss'
-            else:
-                result_blue = 'Win' if winner_team == blue_team else 'Loss'
-                result_red = 'Win' if winner_team == red_team else 'Loss'
+        blue_team = normalize_team_name(blue_team)
+        red_team = normalize_team_name(red_team)
 
-            match_key = tuple(sorted([blue_team, red_team]))
-            match_counter[match_key] += 1
-            match_number = match_counter[match_key]
-            team_data[blue_team]['MatchResults'].append({
-                'match_key': match_key,
-                'match_number': match_number,
-                'side': 'blue',
-                'opponent': red_team,
-                'win': result_blue == 'Win',
-                'tournament': tournament_name
-            })
-            team_data[red_team]['MatchResults'].append({
-                'match_key': match_key,
-                'match_number': match_number,
-                'side': 'red',
-                'opponent': blue_team,
-                'win': result_red == 'Win',
-                'tournament': tournament_name
-            })
-
-            blue_bans_elem = cols[5].select('span.sprite.champion-sprite') if len(cols) > 5 else []
-            red_bans_elem = cols[6].select('span.champion-sprite') if len(cols) > 6 else []
-
-            for team, bans in [(blue_team, blue_bans_elem), (red_team, red_bans_elem)]:
-                for ban in bans:
-                    champion = get_champion(ban)
-                    if champion:
-                        team_data[team]['Bans'][champion] += 1
-
-            for team, opponent, opponent_bans in [(blue_team, red_team, red_bans_elem), (red_team, blue_team, blue_bans_elem)]:
-                for ban in opponent_bans[:3]:
-                    champion = get_champion(ban)
-                    if champion:
-                        if team == blue_team:
-                            team_data[team]['OpponentBlueBans'][champion] += 1
-                        else:
-                            team_data[team]['OpponentRedBans'][champion] += 1
-
-            blue_picks_elem = cols[7].select('span.sprite.champion-sprite') if len(cols) > 7 else []
-            red_picks_elem = cols[8].select('span.sprite.champion-sprite') if len(cols) > 8 else []
-
-            roles = ['Top', 'Jungle', 'Mid', 'ADC', 'Support']
-            blue_picks = {role: get_champion(pick) for role, pick in zip(roles, blue_picks_elem) if pick}
-            red_picks = {role: get_champion(pick) for role, pick in zip(roles, red_picks_elem) if pick}
-
-            for team, picks, result in [(blue_team, blue_picks, result_blue), (red_team, red_picks, result_red)]:
-                for role in roles:
-                    champion = picks.get(role, "")
-                    if champion:
-                        team_data[team][role][champion]['games'] += 1
-                        if result == 'Win':
-                            team_data[team][role][champion]['wins'] += 1
-                    else:
-                        if role not in team_data[team] or not any(data['games'] > 0 for data in team_data[team][role].values()):
-                            team_data[team][role]["N/A"]['games'] += 1
-                            if result == 'Win':
-                                team_data[team][role]["N/A"]['wins'] += 1
-
-                duo_pairs = [('Top', 'Jungle'), ('Jungle', 'Mid'), ('Jungle', 'Support'), ('ADC', 'Support')]
-                for role1, role2 in duo_pairs:
-                    champ1 = picks.get(role1, "N/A")
-                    champ2 = picks.get(role2, "N/A")
-                    if champ1 != "N/A" and champ2 != "N/A":
-                        duo_key = (champ1, champ2, role1, role2)
-                        team_data[team]['DuoPicks'][duo_key]['games'] += 1
-                        if result == 'Win':
-                            team_data[team]['DuoPicks'][duo_key]['wins'] += 1
-
-    return dict(team_data)
-
-# Fetch first bans data
-def fetch_first_bans_data():
-    team_data = defaultdict(lambda: {
-        'BlueFirstBans': defaultdict(int),
-        'RedFirstBans': defaultdict(int)
-    })
-
-    for tournament_name, urls in TOURNAMENT_URLS.items():
-        url = urls["picks_and_bans"]
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        response = requests.get(url, headers=headers)
-        
-        if response.status_code != 200:
-            st.error(f"Failed to load {tournament_name} Picks and Bans page (code {response.status_code})")
+        if blue_team == "unknown" or red_team == "unknown":
             continue
 
-        soup = BeautifulSoup(response.content, 'html.parser')
-        picks_bans_tables = soup.select('.wikitable.plainlinks.hoverable-rows.column-show-hide-1')
-        if not picks_bans_tables:
-            st.warning(f"Picks and Bans table not found for {tournament_name}")
-            continue
+        winner_team = "unknown"
+        result_elem = cols[4].find('a', title=True) if len(cols) > 4 else None
+        if result_elem and 'title' in result_elem.attrs:
+            winner_team = normalize_team_name(result_elem['title'].strip().lower().replace("||tooltip:", "").split("||")[0])
+        else:
+            result_text = cols[4].text.strip().lower() if len(cols) > 4 else ""
+            if result_text == "1:0":
+                winner_team = blue_team
+            elif result_text == "0:1":
+                winner_team = red_team
+
+        if winner_team == "unknown":
+            result_blue = 'Loss'
+            result_red = 'Loss'
+        else:
+            result_blue = 'Win' if winner_team == blue_team else 'Loss'
+            result_red = 'Win' if winner_team == red_team else 'Loss'
+
+        blue_bans_elem = cols[5].find_all(is_champion_sprite_span) if len(cols) > 5 else []
+        red_bans_elem = cols[6].find_all('span', class_='champion-sprite') if len(cols) > 6 else []
+        blue_picks_elem = cols[7].find_all(is_champion_sprite_span) if len(cols) > 7 else []
+        red_picks_elem = cols[8].find_all(is_champion_sprite_span) if len(cols) > 8 else []
+
+        games.append({
+            'blue_team': blue_team,
+            'red_team': red_team,
+            'result_blue': result_blue,
+            'result_red': result_red,
+            'blue_bans': [get_champion(ban) for ban in blue_bans_elem],
+            'red_bans': [get_champion(ban) for ban in red_bans_elem],
+            'blue_picks': {role: get_champion(pick) for role, pick in zip(roles, blue_picks_elem) if pick},
+            'red_picks': {role: get_champion(pick) for role, pick in zip(roles, red_picks_elem) if pick}
+        })
+    return games
+
+# Per-game, per-side table built from the Match History pages: one row per team per game,
+# holding the side, opponent, result, the five picks by role and the five bans.
+# Pick, ban and duo/trio (synergy.SynergyIndex) statistics are all derived from it with groupby.
+ROLES = ['Top', 'Jungle', 'Mid', 'ADC', 'Support']
+BAN_COLUMNS = [f'ban_{i}' for i in range(1, 6)]
+GAME_COLUMNS = ['game_id', 'tournament', 'match_number', 'team', 'side', 'opponent', 'win'] + ROLES + BAN_COLUMNS
+DUO_PAIRS = [('Top', 'Jungle'), ('Jungle', 'Mid'), ('Jungle', 'Support'), ('ADC', 'Support')]
+
+def new_match_history_state():
+    return {
+        'rows': [],
+        'match_counter': defaultdict(int)
+    }
 
-        picks_bans_table = picks_bans_tables[0]
-        for row in picks_bans_table.select('tr')[1:]:
-            cols = row.select('td')
-            if not cols or len(cols) < 11:
-                continue
+def champion_or_none(champion):
+    return champion if champion and champion != "N/A" else None
+
+# Append parsed Match History games to the game table, one row per side
+def fold_match_history_games(state, tournament_name, games):
+    rows = state['rows']
+    match_counter = state['match_counter']
+
+    for game in games:
+        blue_team = game['blue_team']
+        red_team = game['red_team']
+        game_id = len(rows) // 2
+
+        match_key = tuple(sorted([blue_team, red_team]))
+        match_counter[match_key] += 1
+        sides = [
+            ('blue', blue_team, red_team, game['result_blue'], game['blue_picks'], game['blue_bans']),
+            ('red', red_team, blue_team, game['result_red'], game['red_picks'], game['red_bans'])
+        ]
+        for side, team, opponent, result, picks, bans in sides:
+            row = {
+                'game_id': game_id,
+                'tournament': tournament_name,
+                'match_number': match_counter[match_key],
+                'team': team,
+                'side': side,
+                'opponent': opponent,
+                'win': result == 'Win'
+            }
+            for role in ROLES:
+                row[role] = champion_or_none(picks.get(role))
+            for column, champion in zip(BAN_COLUMNS, bans + [None] * len(BAN_COLUMNS)):
+                row[column] = champion_or_none(champion)
+            rows.append(row)
+
+def games_frame(rows):
+    import pandas as pd
+
+    return pd.DataFrame.from_records(rows, columns=GAME_COLUMNS)
+
+# Games, wins per champion played in `role` (in order of first appearance)
+def pick_stats(team_games, role):
+    picks = team_games.dropna(subset=[role])
+    return picks.groupby(role, sort=False)['win'].agg(Matches='size', Wins='sum')
+
+# How often the opponents of `team` banned each champion in their first three bans
+# in games where `team` played on `side`
+def opponent_first_ban_counts(games, team, side):
+    import pandas as pd
+
+    game_ids = games.loc[(games['team'] == team) & (games['side'] == side), 'game_id']
+    opponents = games[games['game_id'].isin(game_ids) & (games['side'] != side)]
+    bans = pd.Series(opponents[BAN_COLUMNS[:3]].to_numpy().ravel())
+    return bans.dropna().value_counts(sort=False)
+
+# Parse blue/red team names from a Picks and Bans row
+def get_picks_and_bans_teams(cols):
+    blue_team = "unknown blue"
+    red_team = "unknown red"
+
+    if len(cols) > 1 and 'title' in cols[1].attrs:
+        blue_team = cols[1]['title'].strip().lower()
+    if len(cols) > 2 and 'title' in cols[2].attrs:
+        red_team = cols[2]['title'].strip().lower()
+
+    if blue_team == "unknown blue":
+        blue_team_elem = cols[1].find(class_='to_hasTooltip') if len(cols) > 1 else None
+        if blue_team_elem and 'title' in blue_team_elem.attrs:
+            blue_team = blue_team_elem['title'].strip().lower().replace("||tooltip:", "").split("||")[0]
+        elif blue_team_elem:
+            blue_team = blue_team_elem.text.strip().lower()
+
+    if red_team == "unknown red":
+        red_team_elem = cols[2].find(class_='to_hasTooltip') if len(cols) > 2 else None
+        if red_team_elem and 'title' in red_team_elem.attrs:
+            red_team = red_team_elem['title'].strip().lower().replace("||tooltip:", "").split("||")[0]
+        elif red_team_elem:
+            red_team = red_team_elem.text.strip().lower()
+
+    if blue_team == "unknown blue":
+        blue_team_img = cols[1].find('img') if len(cols) > 1 else None
+        if blue_team_img and 'alt' in blue_team_img.attrs:
+            blue_team = blue_team_img['alt'].replace('logo std', '').strip().lower()
+
+    if red_team == "unknown red":
+        red_team_img = cols[2].find('img') if len(cols) > 2 else None
+        if red_team_img and 'alt' in red_team_img.attrs:
+            red_team = red_team_img['alt'].replace('logo std', '').strip().lower()
+
+    if blue_team == "unknown blue":
+        blue_team = cols[1].text.strip().lower() if len(cols) > 1 else "unknown blue"
+    if red_team == "unknown red":
+        red_team = cols[2].text.strip().lower() if len(cols) > 2 else "unknown red"
+
+    if not blue_team or blue_team.isspace():
+        blue_team = "unknown blue"
+    if not red_team or red_team.isspace():
+        red_team = "unknown red"
+
+    return normalize_team_name(blue_team), normalize_team_name(red_team)
+
+def get_pbh_champion(champ_span):
+    nested_span = champ_span.find(is_champion_sprite)
+    return nested_span['title'] if nested_span and 'title' in nested_span.attrs else champ_span.get('data-champion', 'N/A')
+
+# Parse every row of a Picks and Bans page (None if the tables are missing).
+# Each row feeds both the first-bans counters and the draft records.
+@st.cache_data(max_entries=32, show_spinner=False)
+def parse_picks_and_bans_page(content):
+    picks_bans_tables = parse_tables(content, 'wikitable', 'plainlinks', 'hoverable-rows', 'column-show-hide-1', name='table')
+    if not picks_bans_tables:
+        return None
 
-            blue_team = "unknown blue"
-            red_team = "unknown red"
-
-            if len(cols) > 1 and 'title' in cols[1].attrs:
-                blue_team = cols[1]['title'].strip().lower()
-            if len(cols) > 2 and 'title' in cols[2].attrs:
-                red_team = cols[2]['title'].strip().lower()
-
-            if blue_team == "unknown blue":
-                blue_team_elem = cols[1].select_one('.to_hasTooltip') if len(cols) > 1 else None
-                if blue_team_elem and 'title' in blue_team_elem.attrs:
-                    blue_team = blue_team_elem['title'].strip().lower().replace("||tooltip:", "").split("||")[0]
-                elif blue_team_elem:
-                    blue_team = blue_team_elem.text.strip().lower()
-
-            if red_team == "unknown red":
-                red_team_elem = cols[2].select_one('.to_hasTooltip') if len(cols) > 2 else None
-                if red_team_elem and 'title' in red_team_elem.attrs:
-                    red_team = red_team_elem['title'].strip().lower().replace("||tooltip:", "").split("||")[0]
-                elif red_team_elem:
-                    red_team = red_team_elem.text.strip().lower()
-
-            if blue_team == "unknown blue":
-                blue_team_img = cols[1].select_one('img') if len(cols) > 1 else None
-                if blue_team_img and 'alt' in blue_team_img.attrs:
-                    blue_team = blue_team_img['alt'].strip().lower()
-
-            if red_team == "unknown red":
-                red_team_img = cols[2].select_one('img') if len(cols) > 2 else None
-                if red_team_img and 'alt' in red_team_img.attrs:
-                    red_team = red_team_img['alt'].strip().lower()
-
-            if blue_team == "unknown blue":
-                blue_team = cols[1].text.strip().lower() if len(cols) > 1 else "unknown blue"
-            if red_team == "unknown red":
-                red_team = cols[2].text.strip().lower() if len(cols) > 2 else "unknown red"
-
-            if not blue_team or blue_team.isspace():
-                blue_team = "unknown blue"
-            if not red_team or red_team.isspace():
-                red_team = "unknown red"
-
-            blue_team = normalize_team_name(blue_team)
-            red_team = normalize_team_name(red_team)
+    parsed_rows = []
+    roles = ['Top', 'Jungle', 'Mid', 'ADC', 'Support']
+    # (column, side, first role index, max picks) in draft order
+    pick_columns = [
+        (11, 'blue', 0, 1), (12, 'red', 0, 2), (13, 'blue', 1, 2), (14, 'red', 2, 1),
+        (19, 'red', 3, 1), (20, 'blue', 3, 2), (21, 'red', 4, 1)
+    ]
+    for table_index, table in enumerate(picks_bans_tables):
+        rows = table.find_all('tr')[1:]
+        rows = list(reversed(rows))
+
+        for row in rows:
+            cols = row.find_all('td')
+            if len(cols) < 11:
+                continue
 
+            blue_team, red_team = get_picks_and_bans_teams(cols)
             if blue_team == "unknown" or red_team == "unknown":
                 continue
 
-            ban_columns = ['BB1', 'RB1', 'BB2', 'RB2', 'BB3', 'RB3']
-            for i, ban_col in enumerate(ban_columns):
-                col_index = 5 + i
-                ban_elem = cols[col_index].select_one('span.sprite.champion-sprite') if len(cols) > col_index else None
-                champion = get_champion(ban_elem) if ban_elem else None
-                if champion and champion != "N/A":
-                    if ban_col.startswith('BB'):
-                        team_data[blue_team]['BlueFirstBans'][champion] += 1
-                    elif ban_col.startswith('RB'):
-                        team_data[red_team]['RedFirstBans'][champion] += 1
-
-    return dict(team_data)
-
-# Fetch draft data
-def fetch_draft_data():
-    team_drafts = defaultdict(list)
-    match_counter = defaultdict(int)
-    team_wins = defaultdict(int)
-
-    for tournament_name, urls in TOURNAMENT_URLS.items():
-        url = urls["picks_and_bans"]
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        response = requests.get(url, headers=headers)
-        
-        if response.status_code != 200:
-            st.error(f"Failed to load {tournament_name} Picks and Bans page (code {response.status_code})")
-            continue
-
-        soup = BeautifulSoup(response.content, 'html.parser')
-        draft_tables = soup.select('table.wikitable.plainlinks.hoverable-rows.column-show-hide-1')
-        if not draft_tables:
-            st.warning(f"Draft tables not found on the {tournament_name} page.")
-            continue
-        
-        for table in draft_tables:
-            rows = table.select('tr')[1:]
-            rows = list(reversed(rows))
-            
-            for row in rows:
-                cols = row.select('td')
-                if len(cols) < 24:
-                    continue
-
-                blue_team = "unknown blue"
-                red_team = "unknown red"
-
-                if len(cols) > 1 and 'title' in cols[1].attrs:
-                    blue_team = cols[1]['title'].strip().lower()
-                if len(cols) > 2 and 'title' in cols[2].attrs:
-                    red_team = cols[2]['title'].strip().lower()
-
-                if blue_team == "unknown blue":
-                    blue_team_elem = cols[1].select_one('.to_hasTooltip') if len(cols) > 1 else None
-                    if blue_team_elem and 'title' in blue_team_elem.attrs:
-                        blue_team = blue_team_elem['title'].strip().lower().replace("||tooltip:", "").split("||")[0]
-                    elif blue_team_elem:
-                        blue_team = blue_team_elem.text.strip().lower()
-
-                if red_team == "unknown red":
-                    red_team_elem = cols[2].select_one('.to_hasTooltip') if len(cols) > 2 else None
-                    if red_team_elem and 'title' in red_team_elem.attrs:
-                        red_team = red_team_elem['title'].strip().lower().replace("||tooltip:", "").split("||")[0]
-                    elif red_team_elem:
-                        red_team = red_team_elem.text.strip().lower()
-
-                if blue_team == "unknown blue":
-                    blue_team_img = cols[1].select_one('img') if len(cols) > 1 else None
-                    if blue_team_img and 'alt' in blue_team_img.attrs:
-                        blue_team = blue_team_img['alt'].replace('logo std', '').strip().lower()
-
-                if red_team == "unknown red":
-                    red_team_img = cols[2].select_one('img') if len(cols) > 2 else None
-                    if red_team_img and 'alt' in red_team_img.attrs:
-                        red_team = red_team_img['alt'].replace('logo std', '').strip().lower()
-
-                if blue_team == "unknown blue":
-                    blue_team = cols[1].text.strip().lower() if len(cols) > 1 else "unknown blue"
-                if red_team == "unknown red":
-                    red_team = cols[2].text.strip().lower() if len(cols) > 2 else "unknown red"
-
-                if not blue_team or blue_team.isspace():
-                    blue_team = "unknown blue"
-                if not red_team or red_team.isspace():
-                    red_team = "unknown red"
-
-                blue_team = normalize_team_name(blue_team)
-                red_team = normalize_team_name(red_team)
-
-                if blue_team == "unknown" or red_team == "unknown":
-                    continue
+            # BB1, RB1, BB2, RB2, BB3, RB3
+            first_bans = []
+            for col_index in range(5, 11):
+                ban_elem = cols[col_index].find(is_champion_sprite_span)
+                first_bans.append(get_champion(ban_elem) if ban_elem else None)
 
+            draft = None
+            if len(cols) >= 24:
                 winner_team = red_team if cols[2].get('class') and 'pbh-winner' in cols[2]['class'] else blue_team if cols[1].get('class') and 'pbh-winner' in cols[1]['class'] else None
                 winner_side = 'red' if winner_team == red_team else 'blue' if winner_team == blue_team else None
 
-                match_key = tuple(sorted([blue_team, red_team]))
-                match_counter[match_key] += 1
-                match_number = match_counter[match_key]
-                if winner_side == 'blue':
-                    team_wins[blue_team] += 1
-                elif winner_side == 'red':
-                    team_wins[red_team] += 1
-
-                blue_wins = team_wins[blue_team]
-                red_wins = team_wins[red_team]
-
                 ban_indices = [5, 6, 7, 8, 9, 10, 15, 16, 17, 18]
                 blue_bans = []
                 red_bans = []
                 for i, idx in enumerate(ban_indices):
-                    champ_span = cols[idx].select_one('.pbh-cn')
+                    champ_span = cols[idx].find(class_='pbh-cn')
                     if champ_span:
-                        nested_span = champ_span.select_one('.sprite.champion-sprite')
-                        champ = nested_span['title'] if nested_span and 'title' in nested_span.attrs else champ_span.get('data-champion', 'N/A')
+                        champ = get_pbh_champion(champ_span)
                     else:
-                        champ_span_alt = cols[idx].select_one('span.champion-sprite')
+                        champ_span_alt = cols[idx].find('span', class_='champion-sprite')
                         champ = champ_span_alt.get('title', 'N/A') if champ_span_alt else "N/A"
                     if i % 2 == 0:
                         blue_bans.append(champ)
                     else:
                         red_bans.append(champ)
 
-                roles = ['Top', 'Jungle', 'Mid', 'ADC', 'Support']
                 blue_picks = []
                 red_picks = []
-                pick_spans = cols[11].select('.pbh-cn')
-                if pick_spans:
-                    champ_span = pick_spans[0]
-                    nested_span = champ_span.select_one('.sprite.champion-sprite')
-                    champ = nested_span['title'] if nested_span and 'title' in nested_span.attrs else champ_span.get('data-champion', 'N/A')
-                    blue_picks.append((champ, roles[0]))
-                rp1_2 = cols[12].select('.pbh-cn')
-                for i, champ_span in enumerate(rp1_2[:2]):
-                    nested_span = champ_span.select_one('.sprite.champion-sprite')
-                    champ = nested_span['title'] if nested_span and 'title' in nested_span.attrs else champ_span.get('data-champion', 'N/A')
-                    red_picks.append((champ, roles[i]))
-                bp2_3 = cols[13].select('.pbh-cn')
-                for i, champ_span in enumerate(bp2_3[:2]):
-                    nested_span = champ_span.select_one('.sprite.champion-sprite')
-                    champ = nested_span['title'] if nested_span and 'title' in nested_span.attrs else champ_span.get('data-champion', 'N/A')
-                    blue_picks.append((champ, roles[1 + i]))
-                pick_spans = cols[14].select('.pbh-cn')
-                if pick_spans:
-                    champ_span = pick_spans[0]
-                    nested_span = champ_span.select_one('.sprite.champion-sprite')
-                    champ = nested_span['title'] if nested_span and 'title' in nested_span.attrs else champ_span.get('data-champion', 'N/A')
-                    red_picks.append((champ, roles[2]))
-                pick_spans = cols[19].select('.pbh-cn')
-                if pick_spans:
-                    champ_span = pick_spans[0]
-                    nested_span = champ_span.select_one('.sprite.champion-sprite')
-                    champ = nested_span['title'] if nested_span and 'title' in nested_span.attrs else champ_span.get('data-champion', 'N/A')
-                    red_picks.append((champ, roles[3]))
-                bp4_5 = cols[20].select('.pbh-cn')
-                for i, champ_span in enumerate(bp4_5[:2]):
-                    nested_span = champ_span.select_one('.sprite.champion-sprite')
-                    champ = nested_span['title'] if nested_span and 'title' in nested_span.attrs else champ_span.get('data-champion', 'N/A')
-                    blue_picks.append((champ, roles[3 + i]))
-                pick_spans = cols[21].select('.pbh-cn')
-                if pick_spans:
-                    champ_span = pick_spans[0]
-                    nested_span = champ_span.select_one('.sprite.champion-sprite')
-                    champ = nested_span['title'] if nested_span and 'title' in nested_span.attrs else champ_span.get('data-champion', 'N/A')
-                    red_picks.append((champ, roles[4]))
+                for idx, side, role_index, max_picks in pick_columns:
+                    side_picks = blue_picks if side == 'blue' else red_picks
+                    for i, champ_span in enumerate(cols[idx].find_all(class_='pbh-cn', limit=max_picks)):
+                        side_picks.append((get_pbh_champion(champ_span), roles[role_index + i]))
 
                 while len(blue_picks) < 5:
                     blue_picks.append(("N/A", roles[len(blue_picks)]))
                 while len(red_picks) < 5:
                     red_picks.append(("N/A", roles[len(red_picks)]))
 
-                vod_elem = cols[23].select_one('a')
+                vod_elem = cols[23].find('a')
                 vod_link = vod_elem['href'] if vod_elem and 'href' in vod_elem.attrs else "N/A"
 
-                draft_blue = {
-                    'opponent': red_team,
-                    'blue_team': blue_team,
-                    'red_team': red_team,
-                    'blue_bans': blue_bans,
-                    'red_bans': red_bans,
-                    'blue_picks': blue_picks,
-                    'red_picks': red_picks,
+                draft = {
                     'winner_side': winner_side,
-                    'blue_wins': blue_wins,
-                    'red_wins': red_wins,
-                    'match_key': match_key,
-                    'match_number': match_number,
-                    'vod_link': vod_link,
-                    'tournament': tournament_name
-                }
-                team_drafts[blue_team].append(draft_blue)
-
-                draft_red = {
-                    'opponent': blue_team,
-                    'blue_team': blue_team,
-                    'red_team': red_team,
                     'blue_bans': blue_bans,
                     'red_bans': red_bans,
                     'blue_picks': blue_picks,
                     'red_picks': red_picks,
-                    'winner_side': winner_side,
-                    'blue_wins': blue_wins,
-                    'red_wins': red_wins,
-                    'match_key': match_key,
-                    'match_number': match_number,
-                    'vod_link': vod_link,
-                    'tournament': tournament_name
+                    'vod_link': vod_link
                 }
-                team_drafts[red_team].append(draft_red)
 
-    return dict(team_drafts)
+            parsed_rows.append({
+                'table_index': table_index,
+                'blue_team': blue_team,
+                'red_team': red_team,
+                'first_bans': first_bans,
+                'draft': draft
+            })
+    return parsed_rows
+
+# Empty Picks and Bans statistics: first-bans counters, per-team drafts and the
+# running match/win counters used to number drafts
+def new_picks_and_bans_state():
+    return {
+        'first_bans_data': defaultdict(lambda: {
+            'BlueFirstBans': defaultdict(int),
+            'RedFirstBans': defaultdict(int)
+        }),
+        'team_drafts': defaultdict(list),
+        'match_counter': defaultdict(int),
+        'team_wins': defaultdict(int)
+    }
+
+# Fold parsed Picks and Bans rows into first-bans counters and per-team drafts
+def fold_picks_and_bans_rows(state, tournament_name, parsed_rows):
+    first_bans_data = state['first_bans_data']
+    team_drafts = state['team_drafts']
+    match_counter = state['match_counter']
+    team_wins = state['team_wins']
+
+    for parsed_row in parsed_rows:
+        blue_team = parsed_row['blue_team']
+        red_team = parsed_row['red_team']
+
+        # First bans are only counted from the first table
+        if parsed_row['table_index'] == 0:
+            for i, champion in enumerate(parsed_row['first_bans']):
+                if champion and champion != "N/A":
+                    if i % 2 == 0:
+                        first_bans_data[blue_team]['BlueFirstBans'][champion] += 1
+                    else:
+                        first_bans_data[red_team]['RedFirstBans'][champion] += 1
+
+        draft = parsed_row['draft']
+        if draft is None:
+            continue
+
+        winner_side = draft['winner_side']
+        match_key = tuple(sorted([blue_team, red_team]))
+        match_counter[match_key] += 1
+        match_number = match_counter[match_key]
+        if winner_side == 'blue':
+            team_wins[blue_team] += 1
+        elif winner_side == 'red':
+            team_wins[red_team] += 1
+
+        blue_wins = team_wins[blue_team]
+        red_wins = team_wins[red_team]
+
+        for team, opponent in [(blue_team, red_team), (red_team, blue_team)]:
+            team_drafts[team].append({
+                'opponent': opponent,
+                'blue_team': blue_team,
+                'red_team': red_team,
+                'blue_bans': draft['blue_bans'],
+                'red_bans': draft['red_bans'],
+                'blue_picks': draft['blue_picks'],
+                'red_picks': draft['red_picks'],
+                'winner_side': winner_side,
+                'blue_wins': blue_wins,
+                'red_wins': red_wins,
+                'match_key': match_key,
+                'match_number': match_number,
+                'vod_link': draft['vod_link'],
+                'tournament': tournament_name
+            })
+
+
+# Split the target tables of a page into raw row HTML (header row first), so rows can be
+# fingerprinted without building a BeautifulSoup tree. Returns [(tag, class, rows)].
+def split_table_rows(content, class_names, name=None):
+    if get_html_parser() != "lxml":
+        tables = parse_tables(content, *class_names, name=name)
+        return [(table.name, " ".join(table.get('class')), [str(row) for row in table.find_all('tr')]) for table in tables]
+
+    import lxml.html
+    from bs4 import UnicodeDammit
+    from lxml import etree
+    from lxml.html.defs import empty_tags
+    if isinstance(content, bytes):
+        try:
+            content = content.decode("utf-8")
+        except UnicodeDecodeError:
+            content = UnicodeDammit(content, is_html=True).unicode_markup
+    document = lxml.html.document_fromstring(content)
+    conditions = " and ".join(f'contains(concat(" ", normalize-space(@class), " "), " {class_name} ")' for class_name in class_names)
+    tables = document.xpath(f'//{name or "*"}[{conditions}]')
+    # The HTML serializer percent-encodes non-ASCII href/src values, so rows are written as
+    # XML, with an explicit end tag on every empty element that is not a void one (an HTML
+    # parser reads <span/> as an unclosed span)
+    for table in tables:
+        for element in table.iter(etree.Element):
+            if element.text is None and element.tag not in empty_tags:
+                element.text = ""
+    return [
+        (table.tag, table.get('class'), [etree.tostring(row, method="xml", encoding="unicode", with_tail=False) for row in table.iter('tr')])
+        for table in tables
+    ]
+
+def fingerprint_rows(rows):
+    fingerprints = []
+    seen = defaultdict(int)
+    for row in rows:
+        row_hash = hashlib.sha1(row.encode("utf-8")).hexdigest()
+        seen[row_hash] += 1
+        fingerprints.append(f"{row_hash}:{seen[row_hash]}")
+    return fingerprints
+
+# Incremental Leaguepedia ingestion. Every table row is fingerprinted (row hash plus its
+# occurrence number); only unseen rows are parsed and folded into the existing statistics.
+# Fingerprints and parsed rows are persisted, so after a restart the statistics are
+# rebuilt from disk without parsing any HTML. If a known row disappears (the page was
+# edited rather than appended to), or new rows show up anywhere but at the top of the
+# page's last table, that page is re-parsed and the statistics rebuilt, so game ids and
+# match numbers always come out as a full parse would number them.
+LEAGUEPEDIA_INGEST_STATE = os.path.join(LEAGUEPEDIA_CACHE_DIR, "ingest_state.pkl")
+# Parsed rows hold team names already resolved through team_aliases.yaml, and fingerprints
+# hash rows as the HTML parser in use serializes them. A state saved by another parser
+# version, HTML parser or alias file is dropped and every page parsed again.
+LEAGUEPEDIA_PARSER_VERSION = 2   # Bump when a parser change must reach pages already ingested
+
+# Computed on first use: get_html_parser() imports lxml, which the login page does not need
+@lru_cache(maxsize=None)
+def leaguepedia_ingest_format():
+    try:
+        with open(TEAM_ALIASES_FILE, "rb") as f:
+            aliases = f.read()
+    except OSError:
+        aliases = b""
+    return f"{LEAGUEPEDIA_PARSER_VERSION}:{get_html_parser()}:{hashlib.sha1(aliases).hexdigest()}"
+
+LEAGUEPEDIA_PAGE_KINDS = {
+    "match_history": {
+        "label": "Match History",
+        "table_classes": ('wikitable', 'sortable', 'mhgame'),
+        "table_name": None,
+        "parser": parse_match_history_page
+    },
+    "picks_and_bans": {
+        "label": "Picks and Bans",
+        "table_classes": ('wikitable', 'plainlinks', 'hoverable-rows', 'column-show-hide-1'),
+        "table_name": 'table',
+        "parser": parse_picks_and_bans_page
+    }
+}
+
+class LeaguepediaIngest:
+    def __init__(self, path=LEAGUEPEDIA_INGEST_STATE):
+        self.path = path
+        self.pages = {}
+        self.pending = {}
+        self.needs_rebuild = False
+        self.rebuild_stats()
+
+    @classmethod
+    def load(cls, path=LEAGUEPEDIA_INGEST_STATE):
+        ingest = cls(path)
+        try:
+            with open(path, "rb") as f:
+                state = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            state = {}
+        if isinstance(state, dict) and state.get('format') == leaguepedia_ingest_format():
+            ingest.pages = state['pages']
+        ingest.rebuild_stats()
+        return ingest
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump({'format': leaguepedia_ingest_format(), 'pages': self.pages}, f)
+        os.replace(tmp_path, self.path)
+
+    def fold(self, tournament_name, page_kind, records):
+        if page_kind == "match_history":
+            fold_match_history_games(self.match_history, tournament_name, records)
+        else:
+            fold_picks_and_bans_rows(self.picks_and_bans, tournament_name, records)
+
+    def rebuild_stats(self):
+        self.match_history = new_match_history_state()
+        self.picks_and_bans = new_picks_and_bans_state()
+        for tournament_name in TOURNAMENT_URLS:
+            for page_kind in LEAGUEPEDIA_PAGE_KINDS:
+                page_state = self.pages.get((tournament_name, page_kind))
+                if page_state:
+                    self.fold(tournament_name, page_kind, page_state['records'])
+
+    # Parse the rows of a page that were not ingested yet. Returns False if the tables are missing.
+    def ingest_page(self, tournament_name, page_kind, content):
+        key = (tournament_name, page_kind)
+        page_state = self.pages.get(key)
+        digest = hashlib.sha1(content).hexdigest()
+        if page_state and page_state['digest'] == digest:
+            return True
+
+        kind = LEAGUEPEDIA_PAGE_KINDS[page_kind]
+        tables = split_table_rows(content, kind["table_classes"], kind["table_name"])
+        if not tables:
+            return False
+
+        fingerprints = [fingerprint_rows(rows[1:]) for _, _, rows in tables]
+        all_fingerprints = {fingerprint for table_fingerprints in fingerprints for fingerprint in table_fingerprints}
+        known = set(page_state['fingerprints']) if page_state else set()
+        if known and not (known <= all_fingerprints and self.appended_at_top(fingerprints, known)):
+            # Rows were edited or removed: start this page over
+            known = set()
+            page_state = None
+            self.needs_rebuild = True
+
+        # Rebuild a document holding only the new rows (plus each table's header row)
+        fragment = []
+        for (tag, class_attr, rows), table_fingerprints in zip(tables, fingerprints):
+            new_rows = [row for row, fingerprint in zip(rows[1:], table_fingerprints) if fingerprint not in known]
+            fragment.append(f'<{tag} class="{class_attr}">{rows[0] if rows else ""}{"".join(new_rows)}</{tag}>')
+        records = kind["parser"]("<html><body>" + "".join(fragment) + "</body></html>") or []
+
+        if page_state is None:
+            page_state = {'records': []}
+        page_state['digest'] = digest
+        page_state['fingerprints'] = sorted(all_fingerprints)
+        page_state['records'] = page_state['records'] + records
+        self.pages[key] = page_state
+        self.pending[key] = records
+        return True
+
+    # Parsers read each table bottom-up (Leaguepedia lists the newest rows first), so new
+    # rows parse after the known ones only if they sit at the top of the last table
+    @staticmethod
+    def appended_at_top(fingerprints, known):
+        *earlier_tables, last_table = fingerprints
+        if any(fingerprint not in known for table_fingerprints in earlier_tables for fingerprint in table_fingerprints):
+            return False
+        new_count = sum(fingerprint not in known for fingerprint in last_table)
+        return all(fingerprint not in known for fingerprint in last_table[:new_count])
+
+    # Folding the pending rows after everything folded so far matches a rebuild only if no
+    # page that comes later in TOURNAMENT_URLS order already holds older rows
+    def pending_folds_last(self):
+        for page_kind in LEAGUEPEDIA_PAGE_KINDS:
+            pending_seen = False
+            for tournament_name in TOURNAMENT_URLS:
+                key = (tournament_name, page_kind)
+                pending_count = len(self.pending.get(key, []))
+                if pending_seen and len(self.pages.get(key, {}).get('records', [])) > pending_count:
+                    return False
+                pending_seen = pending_seen or pending_count > 0
+        return True
+
+    # Fold the rows parsed since the last commit (in TOURNAMENT_URLS order) and persist the state
+    def commit(self):
+        if not self.pending and not self.needs_rebuild:
+            return False
+        if self.needs_rebuild or not self.pending_folds_last():
+            self.rebuild_stats()
+        else:
+            for tournament_name in TOURNAMENT_URLS:
+                for page_kind in LEAGUEPEDIA_PAGE_KINDS:
+                    records = self.pending.get((tournament_name, page_kind))
+                    if records:
+                        self.fold(tournament_name, page_kind, records)
+        self.pending = {}
+        self.needs_rebuild = False
+        self.save()
+        return True
+
+    # Independent copy of the statistics, safe to share while later updates fold into them
+    def datasets(self):
+        from synergy import SynergyIndex
+
+        games = games_frame(self.match_history['rows'])
+        first_bans_data, draft_data = copy.deepcopy((
+            dict(self.picks_and_bans['first_bans_data']),
+            dict(self.picks_and_bans['team_drafts'])
+        ))
+        return games, first_bans_data, draft_data, SynergyIndex(games, ROLES)
+
+# Fetch all Leaguepedia pages in parallel and ingest each one as soon as it arrives.
+# With revalidate=True every cached page is checked with a conditional GET.
+def fetch_leaguepedia_data(ingest, revalidate=False):
+    page_urls = {}
+    for tournament_name, urls in TOURNAMENT_URLS.items():
+        for page_kind in LEAGUEPEDIA_PAGE_KINDS:
+            page_urls[(tournament_name, page_kind)] = urls[page_kind]
+
+    # Runs on the scheduler thread too, where st.error shows nothing: failed pages are
+    # collected and published with the snapshot of the pages that did load
+    errors = []
+    page_cache = PageCache(LEAGUEPEDIA_CACHE_DIR, max_age=0 if revalidate else LEAGUEPEDIA_CACHE_MAX_AGE)
+    for (tournament_name, page_kind), page, error in crawl(page_urls, cache=page_cache):
+        label = LEAGUEPEDIA_PAGE_KINDS[page_kind]["label"]
+        if error is not None:
+            errors.append(f"Failed to load {tournament_name} {label} page ({error})")
+            continue
+        if page.status_code != 200:
+            errors.append(f"Failed to load {tournament_name} {label} page (code {page.status_code})")
+            continue
+        if not ingest.ingest_page(tournament_name, page_kind, page.content):
+            errors.append(f"{label} table not found for {tournament_name}")
+
+    ingest.commit()
+    if errors:
+        return PartialSnapshot(ingest.datasets(), errors)
+    return ingest.datasets()
+
+def load_scrims_data(sync=False):
+    import scrims
+    return scrims.load_scrims_data(sync)
+
+# One dataset store per server process: every session reads the same snapshots and
+# only one load of a dataset runs at a time. The "Update ..." buttons refresh a dataset,
+# bumping its version.
+@st.cache_resource
+def get_dataset_store():
+    store = DatasetStore()
+    leaguepedia_ingest = LeaguepediaIngest.load()
+    store.register("leaguepedia", lambda revalidate=False: fetch_leaguepedia_data(leaguepedia_ingest, revalidate))
+    store.register("soloq", load_soloq_data)
+    store.register("scrims", load_scrims_data)
+    store.register("ddragon", ddragon.mirror.sync)
+    return store
+
+# Keeps every dataset warm off the request path. A dataset that was never loaded is
+# loaded right away; later runs revalidate Leaguepedia, pull new SoloQ/GRID games and
+# mirror new Data Dragon patches.
+@st.cache_resource
+def get_refresh_scheduler():
+    scheduler = RefreshScheduler(get_dataset_store())
+    scheduler.schedule("leaguepedia", LEAGUEPEDIA_REFRESH_INTERVAL, revalidate=True)
+    scheduler.schedule("soloq", SOLOQ_REFRESH_INTERVAL, sync=True)
+    scheduler.schedule("scrims", SCRIMS_REFRESH_INTERVAL, sync=True)
+    scheduler.schedule("ddragon", DDRAGON_REFRESH_INTERVAL)
+    scheduler.start()
+    return scheduler
 
 # Helper functions
 def get_champion(span_tag):
@@ -523,37 +756,122 @@ def get_role_from_sprite(role_sprite):
         return "Support"
     return "Unknown"
 
-def normalize_champion_name(champ):
-    if champ == "N/A":
-        return "N/A"
-    champion_exceptions = {
-        "Nunu & Willump": "Nunu",
-        "Xin Zhao": "XinZhao",
-        "Miss Fortune": "MissFortune",
-        "Kai'Sa": "Kaisa",
-        "Kha'Zix": "Khazix",
-        "LeBlanc": "Leblanc",
-        "Wukong": "MonkeyKing",
-        "Cho'Gath": "Chogath",
-        "Jarvan IV": "JarvanIV",
-        "Ivern": "Ivern",
-        "K'Sante": "KSante",
-        "Renata Glasc": "Renata"
-    }
-    champ_clean = champ.strip().lower()
-    for full_name, normalized_name in champion_exceptions.items():
-        if champ_clean == full_name.lower() or champ_clean.replace(" ", "").replace("&", "").replace("'", "") == full_name.lower().replace(" ", "").replace("&", "").replace("'", ""):
-            return normalized_name
-    champ_normalized = champ.replace(" ", "").replace("'", "").replace(".", "").replace("&", "").replace("-", "")
-    return ''.join(word.capitalize() for word in champ_normalized.split())
-
 def get_champion_icon(champion):
     if champion == "N/A":
         return "N/A"
-    normalized_champ = normalize_champion_name(champion)
-    icon_url = f"https://ddragon.leagueoflegends.com/cdn/{PATCH_VERSION}/img/champion/{normalized_champ}.png"
+    registry = get_champion_registry()
+    sprite_icon = registry.sprite_icon(champion, 35)
+    if sprite_icon:
+        return sprite_icon
+    icon_url = registry.icon_url(champion)
     return f'<img src="{icon_url}" width="35" height="35" style="vertical-align: middle;">'
 
+# Data a rendered table fragment depends on: the dataset snapshot and the icon mirror
+def fragment_version(dataset):
+    store = get_dataset_store()
+    return store.version(dataset), store.version("ddragon")
+
+# Version read before the snapshot, so a refresh in between can only cache newer data under an older key
+def leaguepedia_snapshot():
+    version = fragment_version("leaguepedia")
+    return version, get_dataset_store().get("leaguepedia")
+
+def pick_table_html(team_games, role):
+    import pandas as pd
+
+    stats = []
+    for champ, data in pick_stats(team_games, role).iterrows():
+        stats.append({
+            'Icon': get_champion_icon(champ),
+            'Champion': champ,
+            'Matches': data['Matches'],
+            'Win Rate (%)': data['Wins'] / data['Matches'] * 100
+        })
+    if not stats:
+        return None
+    df = pd.DataFrame(stats)
+    df = df.sort_values('Matches', ascending=False)
+    df['Win Rate (%)'] = df['Win Rate (%)'].apply(color_win_rate)
+    return df.to_html(escape=False, index=False, classes='styled-table')
+
+# {champion: count} as a ban table, most banned first
+def ban_table_html(ban_counts):
+    import pandas as pd
+
+    if not ban_counts:
+        return None
+    bans_stats = []
+    for champ, count in ban_counts.items():
+        bans_stats.append({
+            'Icon': get_champion_icon(champ),
+            'Champion': champ,
+            'Count': count
+        })
+    df_bans = pd.DataFrame(bans_stats)
+    df_bans = df_bans.sort_values('Count', ascending=False)
+    return df_bans.to_html(escape=False, index=False, classes='styled-table')
+
+# Champion combinations of a team for a role set, most played first
+def show_synergy_table(synergies, team, roles, version):
+    roles = synergies.ordered_roles(roles)
+    html = fragments.render(("synergy", team, tuple(roles), version),
+                            lambda: synergy_table_html(synergies, team, roles))
+    st.markdown(html, unsafe_allow_html=True)
+
+def synergy_table_html(synergies, team, roles):
+    import pandas as pd
+
+    label = "-".join(roles)
+    kind = "Duo" if len(roles) == 2 else "Trio"
+    combo_stats = []
+    for _, combo in synergies.top(team, roles).iterrows():
+        stats = {}
+        for i, role in enumerate(roles, start=1):
+            stats[f'Icon{i}'] = get_champion_icon(combo[role])
+            stats[f'Champion{i}'] = combo[role]
+        stats['Matches'] = combo['games']
+        stats['Win Rate (%)'] = color_win_rate(combo['win_rate'])
+        combo_stats.append(stats)
+    if combo_stats:
+        html_combo = pd.DataFrame(combo_stats).to_html(escape=False, index=False, classes='styled-table')
+        return f"""
+            <div style="display: flex; justify-content: center;">
+                <h4>{label} {kind} Picks</h4>
+                {html_combo}
+            </div>
+        """
+    return f"""
+            <div style="display: flex; justify-content: center;">
+                <h4>{label} {kind} Picks</h4>
+                <p>No data on {kind.lower()} picks for {label}.</p>
+            </div>
+        """
+
+# One game's draft as a ban/pick table seen from `team`'s side, bans in red and the result in green/red
+def draft_table_html(draft, team, result):
+    is_selected_team_blue = (draft['blue_team'] == team)
+    left_team = team if is_selected_team_blue else draft['blue_team']
+    right_team = draft['red_team'] if is_selected_team_blue else team
+
+    if is_selected_team_blue:
+        left_bans = draft['blue_bans']
+        right_bans = draft['red_bans']
+        left_picks = [champ for champ, _ in draft['blue_picks']]
+        right_picks = [champ for champ, _ in draft['red_picks']]
+    else:
+        left_bans = draft['red_bans']
+        right_bans = draft['blue_bans']
+        left_picks = [champ for champ, _ in draft['red_picks']]
+        right_picks = [champ for champ, _ in draft['blue_picks']]
+
+    vod_link = draft['vod_link']
+    vod = f'<a href="{vod_link}" target="_blank">VOD</a>' if vod_link != "N/A" else ""
+
+    rows = draft_rows(left_bans, right_bans, left_picks, right_picks,
+                      lambda champ: f"{get_champion_icon(champ)} {champ}", vod, result)
+    uuid = table_id(team, draft['match_key'], draft['match_number'])
+    return render_draft_table([left_team, "Action", right_team, "VOD"], rows, uuid)
+
 def color_win_rate(value):
     if 0 <= value < 50:
         return f'<span style="color:rgb(255, 251, 251)">{value:.2f}</span>'
@@ -564,6 +882,9 @@ def color_win_rate(value):
 
 # NEW: SoloQ functions
 def setup_google_sheets():
+    import gspread
+    from oauth2client.service_account import ServiceAccountCredentials
+
     scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
     json_creds = os.getenv("GOOGLE_SHEETS_CREDS")
     if not json_creds:
@@ -575,76 +896,172 @@ def setup_google_sheets():
     return client
 
 def check_if_worksheets_exists(spreadsheet, name):
+    import gspread
+
     try:
         wks = spreadsheet.worksheet(name)
     except gspread.exceptions.WorksheetNotFound:
         wks = spreadsheet.add_worksheet(title=name, rows=1200, cols=10)
     return wks
 
-def rate_limit_pause(start_time, request_count):
-    REQUEST_LIMIT = 100
-    TIME_WINDOW = 120
-    if request_count >= REQUEST_LIMIT:
-        elapsed_time = time.time() - start_time
-        if elapsed_time < TIME_WINDOW:
-            time.sleep(TIME_WINDOW - elapsed_time)
-        return 0, time.time()
-    return request_count, start_time
-
-def get_account_data(worksheet, game_name, tag_line):
-    game_ids = set(worksheet.col_values(2))
-    request_count = 0
-    start_time = time.time()
-
-    response = requests.get(SUMMONER_NAME_BY_URL.format(game_name, tag_line))
-    request_count += 1
-    request_count, start_time = rate_limit_pause(start_time, request_count)
-
-    if response.status_code == 200:
-        data = response.json()
-        puu_id = data["puuid"]
-        match_history_response = requests.get(MATCH_HISTORY_URL.format(puu_id))
-        request_count += 1
-        request_count, start_time = rate_limit_pause(start_time, request_count)
-
-        if match_history_response.status_code == 200:
-            matches = match_history_response.json()
-            new_data = []
-
-            for game_id in matches:
-                if game_id not in game_ids:
-                    match_info_response = requests.get(MATCH_BASIC_URL.format(game_id))
-                    request_count += 1
-                    request_count, start_time = rate_limit_pause(start_time, request_count)
-
-                    if match_info_response.status_code == 200:
-                        match_data = match_info_response.json()
-                        participants = match_data['metadata']['participants']
-                        player_index = participants.index(puu_id)
-                        player_data = match_data['info']['participants'][player_index]
-                        champion_name = player_data['championName']
-                        kills = player_data['kills']
-                        deaths = player_data['deaths']
-                        assists = player_data['assists']
-                        position = player_data['teamPosition']
-                        is_win = 1 if player_data["win"] else 0
-                        game_creation = datetime.fromtimestamp(match_data['info']['gameCreation'] / 1000)
-
-                        new_data.append([
-                            game_creation.strftime('%Y-%m-%d %H:%M:%S'),
-                            game_id,
-                            is_win,
-                            champion_name,
-                            position,
-                            kills,
-                            deaths,
-                            assists
-                        ])
-
-            if new_data:
-                worksheet.append_rows(new_data)
-            return new_data
-    return None
+# One worksheet row of a SoloQ game: date, match id, win, champion, role, K, D, A
+def soloq_row(match_data, puu_id, game_id):
+    participants = match_data['metadata']['participants']
+    player_index = participants.index(puu_id)
+    player_data = match_data['info']['participants'][player_index]
+    game_creation = datetime.fromtimestamp(match_data['info']['gameCreation'] / 1000)
+    return [
+        game_creation.strftime('%Y-%m-%d %H:%M:%S'),
+        game_id,
+        1 if player_data["win"] else 0,
+        player_data['championName'],
+        player_data['teamPosition'],
+        player_data['kills'],
+        player_data['deaths'],
+        player_data['assists']
+    ]
+
+# Ids of an account's games on `region` created at or after `start_time` (epoch seconds), newest first,
+# paging until a short page. Returns None if a page could not be listed.
+def list_match_ids(region, puu_id, start_time):
+    match_ids = []
+    while True:
+        response = riot.get("match-ids", riot.url(region, MATCH_HISTORY_URL.format(
+            puu_id, start_time, len(match_ids), MATCH_IDS_PAGE)))
+        if response.status_code != 200:
+            return None
+        page = response.json()
+        match_ids.extend(page)
+        if len(page) < MATCH_IDS_PAGE:
+            # A game finishing while paging shifts the pages by one: the same id can be listed twice
+            return list(dict.fromkeys(match_ids))
+
+def load_soloq_sync_state():
+    try:
+        with open(SOLOQ_SYNC_STATE, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"synced": {}, "accounts": {}, "regions": {}}
+
+# {match id: game creation in ms} of a worksheet's rows
+def sheet_game_times(rows):
+    times = {}
+    for row in rows:
+        if len(row) >= 2:
+            try:
+                times[row[1]] = int(datetime.strptime(row[0], '%Y-%m-%d %H:%M:%S').timestamp() * 1000)
+            except ValueError:
+                continue
+    return times
+
+# Adds the games of every roster account that are missing from its player's worksheet.
+# Each account only lists the games created after the newest one synced before (see
+# SOLOQ_SYNC_STATE), paging through all of them. The match ids of all accounts are
+# gathered first, so a match is downloaded once per run even when several roster accounts
+# played it (duo queue, alts), and gives each of them a row. Rows are appended in batches
+# of SOLOQ_SHEET_BATCH while the rest are downloading.
+def sync_soloq_games(spreadsheet, players):
+    worksheets = {player: check_if_worksheets_exists(spreadsheet, player) for player in players}
+    sheet_rows = {player: wks.get_all_values() for player, wks in worksheets.items()}
+    game_ids = {player: {row[1] for row in rows if len(row) >= 2} for player, rows in sheet_rows.items()}
+    game_times = {player: sheet_game_times(rows) for player, rows in sheet_rows.items()}
+    state = load_soloq_sync_state()
+    backfill_ms = int((datetime.now() - timedelta(days=SOLOQ_BACKFILL_DAYS)).timestamp() * 1000)
+    accounts = {}
+    listed = {}
+    missing = set()
+
+    for player, player_data in players.items():
+        for game_name, tag_line in zip(player_data["game_name"], player_data["tag_line"]):
+            response = riot.get("account", riot.url(ACCOUNT_REGION, SUMMONER_NAME_BY_URL.format(game_name, tag_line)))
+            if response.status_code != 200:
+                continue
+            puu_id = response.json()["puuid"]
+            # A failed region lookup must not drop the account: use the region of the last sync
+            region_response = riot.get("region", riot.url(ACCOUNT_REGION, ACCOUNT_REGION_URL.format(puu_id)))
+            if region_response.status_code == 200:
+                region = platform_region(region_response.json()["region"])
+                state.setdefault("regions", {})[puu_id] = region
+            else:
+                region = state.get("regions", {}).get(puu_id, DEFAULT_REGION)
+            accounts[puu_id] = player
+            state.setdefault("accounts", {})[f"{game_name}#{tag_line}"] = puu_id
+            synced_ms = state["synced"].get(puu_id, backfill_ms)
+            match_ids = list_match_ids(region, puu_id, synced_ms // 1000 + 1)
+            if match_ids is not None:
+                listed[puu_id] = match_ids
+                missing.update(game_id for game_id in match_ids if game_id not in game_ids[player])
+
+    # Matches already in the archive (e.g. after a worksheet was cleared) are not downloaded again
+    def match_payloads():
+        archived = set()
+        for game_id, match_data in archive.load_many(missing):
+            archived.add(game_id)
+            yield game_id, match_data
+        urls = {game_id: riot.url(match_region(game_id), MATCH_BASIC_URL.format(game_id))
+                for game_id in missing - archived}
+        # A failed download is skipped: the high-water mark of its account stays put, so the
+        # next sync lists it again
+        for game_id, match_info_response, error in riot.fetch_all("match", urls):
+            if error is not None:
+                logger.warning("Failed to download SoloQ match %s: %s", game_id, error)
+                continue
+            if match_info_response.status_code != 200:
+                logger.warning("Failed to download SoloQ match %s (code %d)", game_id, match_info_response.status_code)
+                continue
+            match_data = match_info_response.json()
+            archive.store(game_id, match_info_response.content, match_data)
+            yield game_id, match_data
+
+    new_data = defaultdict(list)
+    batches = defaultdict(list)
+    fetched = {}
+    for game_id, match_data in match_payloads():
+        fetched[game_id] = match_data['info']['gameCreation']
+        for puu_id in match_data['metadata']['participants']:
+            player = accounts.get(puu_id)
+            if player is None or game_id in game_ids[player]:
+                continue
+            game_ids[player].add(game_id)
+            batches[player].append(soloq_row(match_data, puu_id, game_id))
+            if len(batches[player]) >= SOLOQ_SHEET_BATCH:
+                worksheets[player].append_rows(batches[player])
+                new_data[player].extend(batches.pop(player))
+
+    for player, batch in batches.items():
+        worksheets[player].append_rows(batch)
+        new_data[player].extend(batch)
+
+    # An account's games never overlap, so once every listed game is in the sheet the newest
+    # one's creation time is where the next sync starts. A game that failed to download
+    # keeps the account where it was, to be listed (and retried) again next time.
+    for puu_id, match_ids in listed.items():
+        if missing.intersection(match_ids) - fetched.keys():
+            continue
+        times = [fetched.get(game_id) or game_times[accounts[puu_id]].get(game_id) for game_id in match_ids]
+        state["synced"][puu_id] = max([state["synced"].get(puu_id, backfill_ms)] + [t for t in times if t])
+    os.makedirs(os.path.dirname(SOLOQ_SYNC_STATE), exist_ok=True)
+    write_atomic(SOLOQ_SYNC_STATE, json.dumps(state).encode("utf-8"))
+    return new_data
+
+# Worksheet rows of every player's archived games, newest first, built from the match archive
+# without any Riot API call (after a change to soloq_row, say). Accounts are the ones the
+# last sync resolved; games synced before the archive existed are not in it.
+def soloq_rows_from_archive(players):
+    account_puuids = load_soloq_sync_state().get("accounts", {})
+    accounts = {}
+    for player, player_data in players.items():
+        for game_name, tag_line in zip(player_data["game_name"], player_data["tag_line"]):
+            if f"{game_name}#{tag_line}" in account_puuids:
+                accounts[account_puuids[f"{game_name}#{tag_line}"]] = player
+    rows = {player: [] for player in players}
+    for game_id, match_data in archive.load_many(archive.match_ids(accounts)):
+        for puu_id in match_data['metadata']['participants']:
+            if puu_id in accounts:
+                rows[accounts[puu_id]].append(soloq_row(match_data, puu_id, game_id))
+    for player_rows in rows.values():
+        player_rows.sort(key=lambda row: row[0], reverse=True)
+    return rows
 
 def aggregate_soloq_data(spreadsheet, team_name):
     data = defaultdict(lambda: defaultdict(lambda: {
@@ -673,29 +1090,64 @@ def aggregate_soloq_data(spreadsheet, team_name):
 
     return data
 
+# Loader of the "soloq" dataset: aggregated stats plus the raw sheet rows of every player.
+# With sync=True new games are first pulled from the Riot API and appended to the sheets.
+def load_soloq_data(sync=False):
+    client = setup_google_sheets()
+    if not client:
+        raise RuntimeError("Google Sheets credentials are not configured")
+    spreadsheet = client.open("Soloq_GMS")
+    players = team_rosters["Gamespace"]
+    if sync:
+        sync_soloq_games(spreadsheet, players)
+    return {
+        "stats": aggregate_soloq_data(spreadsheet, "Gamespace"),
+        "sheets": {player: check_if_worksheets_exists(spreadsheet, player).get_all_values() for player in players}
+    }
+
+def format_timestamp(timestamp):
+    if timestamp is None:
+        return "—"
+    return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+
+def show_refresh_status(scheduler):
+    with st.sidebar.expander("Data refresh status"):
+        for row in scheduler.status():
+            st.markdown(f"**{row['dataset']}** (v{row['version']})")
+            st.caption(f"Last refreshed: {format_timestamp(row['updated_at'])}  \n"
+                       f"Next refresh: {format_timestamp(row['next_run'])}")
+            if row['last_error']:
+                st.caption(f":red[{row['last_error']}] (failed {row['failures']}x)")
+            for warning in row['warnings']:
+                st.caption(f":orange[{warning}]")
+
 # Main Streamlit function with button navigation
 def main():
     if 'current_page' not in st.session_state:
         st.session_state.current_page = "Hellenic Legends League Stats"
 
     st.sidebar.title("Navigation")
-    
-    if 'match_history_data' not in st.session_state or 'first_bans_data' not in st.session_state or 'draft_data' not in st.session_state:
+    scheduler = get_refresh_scheduler()
+
+    try:
         with st.spinner("Loading data from Leaguepedia..."):
-            st.session_state.match_history_data = fetch_match_history_data()
-            st.session_state.first_bans_data = fetch_first_bans_data()
-            st.session_state.draft_data = fetch_draft_data()
+            games, first_bans_data, draft_data, _ = get_dataset_store().get("leaguepedia")
+    except RuntimeError as e:
+        st.error(str(e))
+        st.stop()
 
     all_teams = set()
-    for team in st.session_state.match_history_data.keys():
+    for team in games['team'].unique():
         all_teams.add(normalize_team_name(team))
-    for team in st.session_state.first_bans_data.keys():
+    for team in first_bans_data.keys():
         all_teams.add(normalize_team_name(team))
-    for team in st.session_state.draft_data.keys():
+    for team in draft_data.keys():
         all_teams.add(normalize_team_name(team))
     
     teams = sorted(list(all_teams))
     if not teams:
+        for warning in get_dataset_store().warnings("leaguepedia"):
+            st.error(warning)
         st.warning("No teams found in the data.")
         return
 
@@ -720,6 +1172,12 @@ def main():
         """,
         unsafe_allow_html=True
     )
+    show_refresh_status(scheduler)
+
+    # Sprite sheet rules for the champion icons of every table on the page
+    icon_css = get_champion_registry().icon_css()
+    if icon_css:
+        st.markdown(icon_css, unsafe_allow_html=True)
 
     # Выбор страницы
     if st.session_state.current_page == "Hellenic Legends League Stats":
@@ -727,36 +1185,8 @@ def main():
     elif st.session_state.current_page == "GMS SoloQ":
         soloq_page()
     elif st.session_state.current_page == "Scrims":
-        scrims_page()  # Вызов функции из scrims.py
-
-def save_notes_data(data, team_name, filename_prefix="notes_data"):
-    filename = f"{filename_prefix}_{team_name}.json"
-    with open(filename, "w") as f:
-        json.dump(data, f)
-
-def load_notes_data(team_name, filename_prefix="notes_data"):
-    filename = f"{filename_prefix}_{team_name}.json"
-    default_data = {
-        "tables": [
-            [
-                ["", "Ban", ""],
-                ["", "Ban", ""],
-                ["", "Ban", ""],
-                ["", "Pick", ""],
-                ["", "Pick", ""],
-                ["", "Pick", ""],
-                ["", "Ban", ""],
-                ["", "Ban", ""],
-                ["", "Pick", ""],
-                ["", "Pick", ""]
-            ] for _ in range(6)
-        ],
-        "notes_text": ""
-    }
-    if os.path.exists(filename):
-        with open(filename, "r") as f:
-            return json.load(f)
-    return default_data
+        from scrims import scrims_page
+        scrims_page(get_dataset_store())  # Вызов функции из scrims.py
 
 def hll_page(selected_team):
     st.title("Hellenic Legends League 2025 Spring - Pick & Ban Statistics")
@@ -765,13 +1195,18 @@ def hll_page(selected_team):
 
     st.header(f"Team: {selected_team}")
     if st.button("Update Data"):
-        with st.spinner("Updating data..."):
-            st.session_state.match_history_data = fetch_match_history_data()
-            st.session_state.first_bans_data = fetch_first_bans_data()
-            if 'draft_data' not in st.session_state:
-                st.session_state.draft_data = {}
-            st.session_state.draft_data[normalized_selected_team] = fetch_draft_data()
-        st.success("Data updated!")
+        try:
+            with st.spinner("Updating data..."):
+                get_dataset_store().refresh("leaguepedia", revalidate=True)
+            warnings = get_dataset_store().warnings("leaguepedia")
+            for warning in warnings:
+                st.error(warning)
+            if warnings:
+                st.warning("Data updated without the pages above.")
+            else:
+                st.success("Data updated!")
+        except RuntimeError as e:
+            st.error(str(e))
 
     if 'show_picks' not in st.session_state:
         st.session_state.show_picks = False
@@ -801,447 +1236,258 @@ def hll_page(selected_team):
         if st.button("Notes", key="notes_btn"):
             st.session_state.show_notes = not st.session_state.show_notes
 
-    team_info = st.session_state.match_history_data.get(normalized_selected_team, {})
-    first_bans_info = st.session_state.first_bans_data.get(normalized_selected_team, {'BlueFirstBans': defaultdict(int), 'RedFirstBans': defaultdict(int)})
-    roles = ['Top', 'Jungle', 'Mid', 'ADC', 'Support']
-
+    # Every panel is a fragment: its own widgets (game buttons, role multiselect, notes
+    # editors) rerun just that panel instead of the whole page
     if st.session_state.show_picks:
-        st.subheader("Picks")
-        st.markdown("<hr style='border: 2px solid #333; margin: 10px 0;'>", unsafe_allow_html=True)
-        columns = st.columns(len(roles))
-        for i, role in enumerate(roles):
-            with columns[i]:
-                st.subheader(f"{role}")
-                role_data = team_info.get(role, {})
-                if role_data:
-                    stats = []
-                    for champ, data in role_data.items():
-                        if champ != "N/A":
-                            winrate = (data['wins'] / data['games'] * 100) if data['games'] > 0 else 0
-                            stats.append({
-                                'Icon': get_champion_icon(champ),
-                                'Champion': champ,
-                                'Matches': data['games'],
-                                'Win Rate (%)': winrate
-                            })
-                    if stats:
-                        df = pd.DataFrame(stats)
-                        df = df.sort_values('Matches', ascending=False)
-                        df['Win Rate (%)'] = df['Win Rate (%)'].apply(color_win_rate)
-                        html = df.to_html(escape=False, index=False, classes='styled-table')
-                        st.markdown(html, unsafe_allow_html=True)
-                else:
-                    st.write("No data for this role.")
-
+        picks_panel(normalized_selected_team)
     if st.session_state.show_bans:
-        st.subheader("Bans")
-        st.markdown("<hr style='border: 2px solid #333; margin: 10px 0;'>", unsafe_allow_html=True)
-        col1, col2, divider_col, col3, col4 = st.columns([1, 1, 0.1, 1, 1])
-
-        with col1:
-            st.subheader("First 3 Bans (Blue Side)")
-            blue_bans_data = first_bans_info['BlueFirstBans']
-            if blue_bans_data:
-                blue_bans_stats = []
-                for champ, count in blue_bans_data.items():
-                    blue_bans_stats.append({
-                        'Icon': get_champion_icon(champ),
-                        'Champion': champ,
-                        'Count': count
-                    })
-                df_blue_bans = pd.DataFrame(blue_bans_stats)
-                df_blue_bans = df_blue_bans.sort_values('Count', ascending=False)
-                html_blue_bans = df_blue_bans.to_html(escape=False, index=False, classes='styled-table')
-                st.markdown(html_blue_bans, unsafe_allow_html=True)
-            else:
-                st.write("No data on first three bans on the blue side.")
-
-        with col2:
-            st.subheader("First 3 Bans (Red Side)")
-            red_bans_data = first_bans_info['RedFirstBans']
-            if red_bans_data:
-                red_bans_stats = []
-                for champ, count in red_bans_data.items():
-                    red_bans_stats.append({
-                        'Icon': get_champion_icon(champ),
-                        'Champion': champ,
-                        'Count': count
-                    })
-                df_red_bans = pd.DataFrame(red_bans_stats)
-                df_red_bans = df_red_bans.sort_values('Count', ascending=False)
-                html_red_bans = df_red_bans.to_html(escape=False, index=False, classes='styled-table')
-                st.markdown(html_red_bans, unsafe_allow_html=True)
-            else:
-                st.write("No data on first three bans on the red side.")
-
-        with divider_col:
-            st.markdown(
-                """
-                <div style='height: 100%; border-left: 2px solid #333; margin: 0 10px;'></div>
-                """,
-                unsafe_allow_html=True
-            )
-
-        with col3:
-            st.subheader("Opponent's First 3 Bans (Blue Side)")
-            opponent_blue_bans_data = team_info.get('OpponentBlueBans', {})
-            if opponent_blue_bans_data:
-                opponent_blue_bans_stats = []
-                for champ, count in opponent_blue_bans_data.items():
-                    opponent_blue_bans_stats.append({
-                        'Icon': get_champion_icon(champ),
-                        'Champion': champ,
-                        'Count': count
-                    })
-                df_opponent_blue_bans = pd.DataFrame(opponent_blue_bans_stats)
-                df_opponent_blue_bans = df_opponent_blue_bans.sort_values('Count', ascending=False)
-                html_opponent_blue_bans = df_opponent_blue_bans.to_html(escape=False, index=False, classes='styled-table')
-                st.markdown(html_opponent_blue_bans, unsafe_allow_html=True)
-            else:
-                st.write("No data on opponent's first three bans on the blue side.")
-
-        with col4:
-            st.subheader("Opponent's First 3 Bans (Red Side)")
-            opponent_red_bans_data = team_info.get('OpponentRedBans', {})
-            if opponent_red_bans_data:
-                opponent_red_bans_stats = []
-                for champ, count in opponent_red_bans_data.items():
-                    opponent_red_bans_stats.append({
-                        'Icon': get_champion_icon(champ),
-                        'Champion': champ,
-                        'Count': count
-                    })
-                df_opponent_red_bans = pd.DataFrame(opponent_red_bans_stats)
-                df_opponent_red_bans = df_opponent_red_bans.sort_values('Count', ascending=False)
-                html_opponent_red_bans = df_opponent_red_bans.to_html(escape=False, index=False, classes='styled-table')
-                st.markdown(html_opponent_red_bans, unsafe_allow_html=True)
-            else:
-                st.write("No data on opponent's first three bans on the red side.")
-
+        bans_panel(normalized_selected_team)
     if st.session_state.show_duo_picks:
-        st.subheader("Duo Picks")
-        st.markdown("<hr style='border: 2px solid #333; margin: 10px 0;'>", unsafe_allow_html=True)
-        duo_picks_data = team_info.get('DuoPicks', {})
-        duo_pairs = [('Top', 'Jungle'), ('Jungle', 'Mid'), ('Jungle', 'Support'), ('ADC', 'Support')]
-
-        col1, col2 = st.columns(2)
-        with col1:
-            duo_stats = []
-            for (champ1, champ2, r1, r2), data in duo_picks_data.items():
-                if data['games'] > 0 and ((r1 == 'Top' and r2 == 'Jungle') or (r1 == 'Jungle' and r2 == 'Top')):
-                    winrate = (data['wins'] / data['games'] * 100) if data['games'] > 0 else 0
-                    if r1 == 'Top' and r2 == 'Jungle':
-                        icon1, champ1_name, icon2, champ2_name = get_champion_icon(champ1), champ1, get_champion_icon(champ2), champ2
-                    else:
-                        icon1, champ1_name, icon2, champ2_name = get_champion_icon(champ2), champ2, get_champion_icon(champ1), champ1
-                    duo_stats.append({
-                        'Icon1': icon1,
-                        'Champion1': champ1_name,
-                        'Icon2': icon2,
-                        'Champion2': champ2_name,
-                        'Matches': data['games'],
-                        'Win Rate (%)': winrate
-                    })
-            if duo_stats:
-                df_duo = pd.DataFrame(duo_stats)
-                df_duo = df_duo.sort_values('Matches', ascending=False)
-                df_duo['Win Rate (%)'] = df_duo['Win Rate (%)'].apply(color_win_rate)
-                html_duo = df_duo.to_html(escape=False, index=False, classes='styled-table')
-                st.markdown(f"""
-                    <div style="display: flex; justify-content: center;">
-                        <h4>Top-Jungle Duo Picks</h4>
-                        {html_duo}
-                    </div>
-                """, unsafe_allow_html=True)
-            else:
-                st.markdown(f"""
-                    <div style="display: flex; justify-content: center;">
-                        <h4>Top-Jungle Duo Picks</h4>
-                        <p>No data on duo picks for Top-Jungle.</p>
-                    </div>
-                """, unsafe_allow_html=True)
-
-        with col2:
-            duo_stats = []
-            for (champ1, champ2, r1, r2), data in duo_picks_data.items():
-                if data['games'] > 0 and ((r1 == 'Jungle' and r2 == 'Mid') or (r1 == 'Mid' and r2 == 'Jungle')):
-                    winrate = (data['wins'] / data['games'] * 100) if data['games'] > 0 else 0
-                    if r1 == 'Jungle' and r2 == 'Mid':
-                        icon1, champ1_name, icon2, champ2_name = get_champion_icon(champ1), champ1, get_champion_icon(champ2), champ2
-                    else:
-                        icon1, champ1_name, icon2, champ2_name = get_champion_icon(champ2), champ2, get_champion_icon(champ1), champ1
-                    duo_stats.append({
-                        'Icon1': icon1,
-                        'Champion1': champ1_name,
-                        'Icon2': icon2,
-                        'Champion2': champ2_name,
-                        'Matches': data['games'],
-                        'Win Rate (%)': winrate
-                    })
-            if duo_stats:
-                df_duo = pd.DataFrame(duo_stats)
-                df_duo = df_duo.sort_values('Matches', ascending=False)
-                df_duo['Win Rate (%)'] = df_duo['Win Rate (%)'].apply(color_win_rate)
-                html_duo = df_duo.to_html(escape=False, index=False, classes='styled-table')
-                st.markdown(f"""
-                    <div style="display: flex; justify-content: center;">
-                        <h4>Jungle-Mid Duo Picks</h4>
-                        {html_duo}
-                    </div>
-                """, unsafe_allow_html=True)
-            else:
-                st.markdown(f"""
-                    <div style="display: flex; justify-content: center;">
-                        <h4>Jungle-Mid Duo Picks</h4>
-                        <p>No data on duo picks for Jungle-Mid.</p>
-                    </div>
-                """, unsafe_allow_html=True)
-
-        col3, col4 = st.columns(2)
-        with col3:
-            duo_stats = []
-            for (champ1, champ2, r1, r2), data in duo_picks_data.items():
-                if data['games'] > 0 and ((r1 == 'Jungle' and r2 == 'Support') or (r1 == 'Support' and r2 == 'Jungle')):
-                    winrate = (data['wins'] / data['games'] * 100) if data['games'] > 0 else 0
-                    if r1 == 'Jungle' and r2 == 'Support':
-                        icon1, champ1_name, icon2, champ2_name = get_champion_icon(champ1), champ1, get_champion_icon(champ2), champ2
-                    else:
-                        icon1, champ1_name, icon2, champ2_name = get_champion_icon(champ2), champ2, get_champion_icon(champ1), champ1
-                    duo_stats.append({
-                        'Icon1': icon1,
-                        'Champion1': champ1_name,
-                        'Icon2': icon2,
-                        'Champion2': champ2_name,
-                        'Matches': data['games'],
-                        'Win Rate (%)': winrate
-                    })
-            if duo_stats:
-                df_duo = pd.DataFrame(duo_stats)
-                df_duo = df_duo.sort_values('Matches', ascending=False)
-                df_duo['Win Rate (%)'] = df_duo['Win Rate (%)'].apply(color_win_rate)
-                html_duo = df_duo.to_html(escape=False, index=False, classes='styled-table')
-                st.markdown(f"""
-                    <div style="display: flex; justify-content: center;">
-                        <h4>Jungle-Support Duo Picks</h4>
-                        {html_duo}
-                    </div>
-                """, unsafe_allow_html=True)
-            else:
-                st.markdown(f"""
-                    <div style="display: flex; justify-content: center;">
-                        <h4>Jungle-Support Duo Picks</h4>
-                        <p>No data on duo picks for Jungle-Support.</p>
-                    </div>
-                """, unsafe_allow_html=True)
-
-        with col4:
-            duo_stats = []
-            for (champ1, champ2, r1, r2), data in duo_picks_data.items():
-                if data['games'] > 0 and ((r1 == 'ADC' and r2 == 'Support') or (r1 == 'Support' and r2 == 'ADC')):
-                    winrate = (data['wins'] / data['games'] * 100) if data['games'] > 0 else 0
-                    if r1 == 'ADC' and r2 == 'Support':
-                        icon1, champ1_name, icon2, champ2_name = get_champion_icon(champ1), champ1, get_champion_icon(champ2), champ2
-                    else:
-                        icon1, champ1_name, icon2, champ2_name = get_champion_icon(champ2), champ2, get_champion_icon(champ1), champ1
-                    duo_stats.append({
-                        'Icon1': icon1,
-                        'Champion1': champ1_name,
-                        'Icon2': icon2,
-                        'Champion2': champ2_name,
-                        'Matches': data['games'],
-                        'Win Rate (%)': winrate
-                    })
-            if duo_stats:
-                df_duo = pd.DataFrame(duo_stats)
-                df_duo = df_duo.sort_values('Matches', ascending=False)
-                df_duo['Win Rate (%)'] = df_duo['Win Rate (%)'].apply(color_win_rate)
-                html_duo = df_duo.to_html(escape=False, index=False, classes='styled-table')
-                st.markdown(f"""
-                    <div style="display: flex; justify-content: center;">
-                        <h4>ADC-Support Duo Picks</h4>
-                        {html_duo}
-                    </div>
-                """, unsafe_allow_html=True)
+        duo_picks_panel(normalized_selected_team)
+    if st.session_state.show_drafts:
+        drafts_panel(normalized_selected_team)
+    if st.session_state.show_notes:
+        notes_panel(normalized_selected_team)
+
+# Most picked champions of the team per role
+@st.fragment
+def picks_panel(team):
+    version, (games, _, _, _) = leaguepedia_snapshot()
+    team_games = games[games['team'] == team]
+
+    st.subheader("Picks")
+    st.markdown("<hr style='border: 2px solid #333; margin: 10px 0;'>", unsafe_allow_html=True)
+    columns = st.columns(len(ROLES))
+    for i, role in enumerate(ROLES):
+        with columns[i]:
+            st.subheader(f"{role}")
+            if not team_games.empty:
+                html = fragments.render(("picks", team, role, version),
+                                        lambda: pick_table_html(team_games, role))
+                if html:
+                    st.markdown(html, unsafe_allow_html=True)
             else:
-                st.markdown(f"""
-                    <div style="display: flex; justify-content: center;">
-                        <h4>ADC-Support Duo Picks</h4>
-                        <p>No data on duo picks for ADC-Support.</p>
-                    </div>
-                """, unsafe_allow_html=True)
+                st.write("No data for this role.")
 
-    if st.session_state.show_drafts:
-        st.subheader("Drafts")
-        st.markdown("<hr style='border: 2px solid #333; margin: 10px 0;'>", unsafe_allow_html=True)
-        draft_data = st.session_state.draft_data.get(normalized_selected_team, [])
-        if draft_data:
-            drafts_by_match = {}
-            for draft in draft_data:
-                if draft['blue_team'] == normalized_selected_team or draft['red_team'] == normalized_selected_team:
-                    match_key = draft['match_key']
-                    if match_key not in drafts_by_match:
-                        drafts_by_match[match_key] = []
-                    drafts_by_match[match_key].append(draft)
-
-            sorted_matches = sorted(drafts_by_match.items(), key=lambda x: min(d['match_number'] for d in x[1]))
-
-            for match_key, match_drafts in sorted_matches:
-                blue_team = match_drafts[0]['blue_team']
-                red_team = match_drafts[0]['red_team']
-                st.subheader(f"{blue_team} vs {red_team}")
-
-                for draft in match_drafts:
+# First-phase bans by and against the team, per side
+@st.fragment
+def bans_panel(team):
+    version, (games, first_bans_data, _, _) = leaguepedia_snapshot()
+    first_bans_info = first_bans_data.get(team, {'BlueFirstBans': defaultdict(int), 'RedFirstBans': defaultdict(int)})
+
+    st.subheader("Bans")
+    st.markdown("<hr style='border: 2px solid #333; margin: 10px 0;'>", unsafe_allow_html=True)
+    col1, col2, divider_col, col3, col4 = st.columns([1, 1, 0.1, 1, 1])
+
+    with col1:
+        st.subheader("First 3 Bans (Blue Side)")
+        html_blue_bans = fragments.render(("first_bans", team, "blue", version),
+                                          lambda: ban_table_html(first_bans_info['BlueFirstBans']))
+        if html_blue_bans:
+            st.markdown(html_blue_bans, unsafe_allow_html=True)
+        else:
+            st.write("No data on first three bans on the blue side.")
+
+    with col2:
+        st.subheader("First 3 Bans (Red Side)")
+        html_red_bans = fragments.render(("first_bans", team, "red", version),
+                                          lambda: ban_table_html(first_bans_info['RedFirstBans']))
+        if html_red_bans:
+            st.markdown(html_red_bans, unsafe_allow_html=True)
+        else:
+            st.write("No data on first three bans on the red side.")
+
+    with divider_col:
+        st.markdown(
+            """
+            <div style='height: 100%; border-left: 2px solid #333; margin: 0 10px;'></div>
+            """,
+            unsafe_allow_html=True
+        )
+
+    with col3:
+        st.subheader("Opponent's First 3 Bans (Blue Side)")
+        html_opponent_blue_bans = fragments.render(
+            ("opponent_first_bans", team, "blue", version),
+            lambda: ban_table_html(opponent_first_ban_counts(games, team, 'blue').to_dict()))
+        if html_opponent_blue_bans:
+            st.markdown(html_opponent_blue_bans, unsafe_allow_html=True)
+        else:
+            st.write("No data on opponent's first three bans on the blue side.")
+
+    with col4:
+        st.subheader("Opponent's First 3 Bans (Red Side)")
+        html_opponent_red_bans = fragments.render(
+            ("opponent_first_bans", team, "red", version),
+            lambda: ban_table_html(opponent_first_ban_counts(games, team, 'red').to_dict()))
+        if html_opponent_red_bans:
+            st.markdown(html_opponent_red_bans, unsafe_allow_html=True)
+        else:
+            st.write("No data on opponent's first three bans on the red side.")
+
+# Champion pairs of the bot/jungle/mid duos, plus any 2 or 3 chosen roles
+@st.fragment
+def duo_picks_panel(team):
+    version, (_, _, _, synergies) = leaguepedia_snapshot()
+
+    st.subheader("Duo Picks")
+    st.markdown("<hr style='border: 2px solid #333; margin: 10px 0;'>", unsafe_allow_html=True)
+    for row_pairs in (DUO_PAIRS[:2], DUO_PAIRS[2:]):
+        for column, duo_roles in zip(st.columns(2), row_pairs):
+            with column:
+                show_synergy_table(synergies, team, duo_roles, version)
+
+    combo_roles = st.multiselect("Any 2 or 3 roles", ROLES, max_selections=3, key="synergy_roles")
+    if len(combo_roles) >= 2:
+        show_synergy_table(synergies, team, combo_roles, version)
+
+# Ban/pick tables of the team's games, one toggle button per game
+@st.fragment
+def drafts_panel(team):
+    version, (_, _, draft_data, _) = leaguepedia_snapshot()
+
+    st.subheader("Drafts")
+    st.markdown("<hr style='border: 2px solid #333; margin: 10px 0;'>", unsafe_allow_html=True)
+    team_drafts = draft_data.get(team, [])
+    if team_drafts:
+        drafts_by_match = {}
+        for draft in team_drafts:
+            if draft['blue_team'] == team or draft['red_team'] == team:
+                match_key = draft['match_key']
+                if match_key not in drafts_by_match:
+                    drafts_by_match[match_key] = []
+                drafts_by_match[match_key].append(draft)
+
+        sorted_matches = sorted(drafts_by_match.items(), key=lambda x: min(d['match_number'] for d in x[1]))
+
+        for match_key, match_drafts in sorted_matches:
+            blue_team = match_drafts[0]['blue_team']
+            red_team = match_drafts[0]['red_team']
+            st.subheader(f"{blue_team} vs {red_team}")
+
+            for draft in match_drafts:
+                game_key = f"show_game_{match_key}_{draft['match_number']}"
+                if game_key not in st.session_state:
+                    st.session_state[game_key] = False
+
+            num_games = len(match_drafts)
+            game_cols = st.columns(num_games)
+            for i, draft in enumerate(match_drafts):
+                with game_cols[i]:
                     game_key = f"show_game_{match_key}_{draft['match_number']}"
-                    if game_key not in st.session_state:
-                        st.session_state[game_key] = False
-
-                num_games = len(match_drafts)
-                game_cols = st.columns(num_games)
-                for i, draft in enumerate(match_drafts):
-                    with game_cols[i]:
-                        game_key = f"show_game_{match_key}_{draft['match_number']}"
-                        if st.button(f"Game {draft['match_number']}", key=f"game_btn_{match_key}_{draft['match_number']}"):
-                            st.session_state[game_key] = not st.session_state[game_key]
-
-                active_games = [draft for draft in match_drafts if st.session_state[f"show_game_{match_key}_{draft['match_number']}"]]
-                if active_games:
-                    active_cols = st.columns(len(active_games))
-                    for i, draft in enumerate(active_games):
-                        with active_cols[i]:
-                            result = "Win" if (draft['winner_side'] == 'blue' and draft['blue_team'] == normalized_selected_team) or (draft['winner_side'] == 'red' and draft['red_team'] == normalized_selected_team) else "Loss"
-                            st.write(f"Game {draft['match_number']}")
-                            st.write(f"Result: {result}")
-
-                            is_selected_team_blue = (draft['blue_team'] == normalized_selected_team)
-                            team_side = "Blue" if is_selected_team_blue else "Red"
-                            left_team = normalized_selected_team if is_selected_team_blue else draft['blue_team']
-                            right_team = draft['red_team'] if is_selected_team_blue else normalized_selected_team
-
-                            if is_selected_team_blue:
-                                left_bans = draft['blue_bans']
-                                right_bans = draft['red_bans']
-                                left_picks = [champ for champ, _ in draft['blue_picks']]
-                                right_picks = [champ for champ, _ in draft['red_picks']]
-                            else:
-                                left_bans = draft['red_bans']
-                                right_bans = draft['blue_bans']
-                                left_picks = [champ for champ, _ in draft['red_picks']]
-                                right_picks = [champ for champ, _ in draft['blue_picks']]
-
-                            vod_link = draft['vod_link']
-                            vod = f'<a href="{vod_link}" target="_blank">VOD</a>' if vod_link != "N/A" else ""
-
-                            table_data = [
-                                (f"{get_champion_icon(left_bans[0])} {left_bans[0]}" if left_bans[0] != "N/A" else "", "Ban", f"{get_champion_icon(right_bans[0])} {right_bans[0]}" if right_bans[0] != "N/A" else "", vod),
-                                (f"{get_champion_icon(left_bans[1])} {left_bans[1]}" if left_bans[1] != "N/A" else "", "Ban", f"{get_champion_icon(right_bans[1])} {right_bans[1]}" if right_bans[1] != "N/A" else "", ""),
-                                (f"{get_champion_icon(left_bans[2])} {left_bans[2]}" if left_bans[2] != "N/A" else "", "Ban", f"{get_champion_icon(right_bans[2])} {right_bans[2]}" if right_bans[2] != "N/A" else "", result),
-                                (f"{get_champion_icon(left_picks[0])} {left_picks[0]}" if left_picks[0] != "N/A" else "", "Pick", f"{get_champion_icon(right_picks[0])} {right_picks[0]}" if right_picks[0] != "N/A" else "", ""),
-                                (f"{get_champion_icon(left_picks[1])} {left_picks[1]}" if left_picks[1] != "N/A" else "", "Pick", f"{get_champion_icon(right_picks[1])} {right_picks[1]}" if right_picks[1] != "N/A" else "", ""),
-                                (f"{get_champion_icon(left_picks[2])} {left_picks[2]}" if left_picks[2] != "N/A" else "", "Pick", f"{get_champion_icon(right_picks[2])} {right_picks[2]}" if right_picks[2] != "N/A" else "", ""),
-                                (f"{get_champion_icon(left_bans[3])} {left_bans[3]}" if left_bans[3] != "N/A" else "", "Ban", f"{get_champion_icon(right_bans[3])} {right_bans[3]}" if right_bans[3] != "N/A" else "", ""),
-                                (f"{get_champion_icon(left_bans[4])} {left_bans[4]}" if left_bans[4] != "N/A" else "", "Ban", f"{get_champion_icon(right_bans[4])} {right_bans[4]}" if right_bans[4] != "N/A" else "", ""),
-                                (f"{get_champion_icon(left_picks[3])} {left_picks[3]}" if left_picks[3] != "N/A" else "", "Pick", f"{get_champion_icon(right_picks[3])} {right_picks[3]}" if right_picks[3] != "N/A" else "", ""),
-                                (f"{get_champion_icon(left_picks[4])} {left_picks[4]}" if left_picks[4] != "N/A" else "", "Pick", f"{get_champion_icon(right_picks[4])} {right_picks[4]}" if right_picks[4] != "N/A" else "", ""),
-                            ]
-
-                            df_draft = pd.DataFrame(table_data, columns=[left_team, "Action", right_team, "VOD"])
-
-                            def highlight_cells(row):
-                                styles = [''] * len(row)
-                                if row['Action'] == "Ban":
-                                    styles[0] = 'background-color: red'
-                                    styles[2] = 'background-color: red'
-                                if row['VOD'] == "Win":
-                                    styles[3] = 'background-color: green'
-                                elif row['VOD'] == "Loss":
-                                    styles[3] = 'background-color: red'
-                                return styles
-
-                            styled_df = df_draft.style.apply(highlight_cells, axis=1)
-                            html_draft = styled_df.to_html(escape=False, index=False, classes='styled-table drafts-table')
-                            st.markdown(html_draft, unsafe_allow_html=True)
+                    if st.button(f"Game {draft['match_number']}", key=f"game_btn_{match_key}_{draft['match_number']}"):
+                        st.session_state[game_key] = not st.session_state[game_key]
+
+            active_games = [draft for draft in match_drafts if st.session_state[f"show_game_{match_key}_{draft['match_number']}"]]
+            if active_games:
+                active_cols = st.columns(len(active_games))
+                for i, draft in enumerate(active_games):
+                    with active_cols[i]:
+                        result = "Win" if (draft['winner_side'] == 'blue' and draft['blue_team'] == team) or (draft['winner_side'] == 'red' and draft['red_team'] == team) else "Loss"
+                        st.write(f"Game {draft['match_number']}")
+                        st.write(f"Result: {result}")
+
+                        html_draft = fragments.render(("draft", team, match_key, draft['match_number'], version),
+                                                      lambda: draft_table_html(draft, team, result))
+                        st.markdown(html_draft, unsafe_allow_html=True)
+
+# Identifies this browser session to the notes store's revision tracking
+def notes_owner():
+    if 'notes_owner' not in st.session_state:
+        st.session_state.notes_owner = uuid.uuid4().hex
+    return st.session_state.notes_owner
+
+# Opened on first use (not at import), so the login page never touches the notes database
+@st.cache_resource
+def get_notes_store():
+    return NotesStore()
+
+# Per-team draft templates and free-text notes, saved to the notes database one template at a time
+@st.fragment
+def notes_panel(team):
+    import pandas as pd
+
+    st.subheader("Notes")
+    st.markdown("<hr style='border: 2px solid #333; margin: 10px 0;'>", unsafe_allow_html=True)
 
-    if st.session_state.show_notes:
-        st.subheader("Notes")
-        st.markdown("<hr style='border: 2px solid #333; margin: 10px 0;'>", unsafe_allow_html=True)
-
-        if f'notes_data_{normalized_selected_team}' not in st.session_state:
-            st.session_state[f'notes_data_{normalized_selected_team}'] = load_notes_data(normalized_selected_team)
-
-        col_left, col_right = st.columns([3, 1])
-
-        with col_left:
-            st.subheader("Draft Templates")
-            table_cols = st.columns(3)
-            for i in range(6):
-                with table_cols[i % 3]:
-                    st.write(f"Draft Template {i + 1}")
-                    columns = ["Team 1", "Action", "Team 2"]
-                    df = pd.DataFrame(st.session_state[f'notes_data_{normalized_selected_team}']["tables"][i], columns=columns)
-                    edited_df = st.data_editor(
-                        df,
-                        num_rows="fixed",
-                        use_container_width=True,
-                        key=f"notes_table_{normalized_selected_team}_{i}",
-                        column_config={
-                            "Team 1": st.column_config.TextColumn("Team 1"),
-                            "Action": st.column_config.TextColumn("Action", disabled=True),
-                            "Team 2": st.column_config.TextColumn("Team 2"),
-                        }
-                    )
-                    st.session_state[f'notes_data_{normalized_selected_team}']["tables"][i] = edited_df.values.tolist()
-
-        with col_right:
-            st.subheader("Additional Notes")
-            notes_text = st.text_area(
-                "Write your notes here:",
-                value=st.session_state[f'notes_data_{normalized_selected_team}']["notes_text"],
-                height=400,
-                key=f"notes_text_area_{normalized_selected_team}"
-            )
-            st.session_state[f'notes_data_{normalized_selected_team}']["notes_text"] = notes_text
-
-        save_notes_data(st.session_state[f'notes_data_{normalized_selected_team}'], normalized_selected_team)
+    # The baseline (revisions and contents this session last loaded or saved) lives in the
+    # session, so it goes away with it
+    notes_store = get_notes_store()
+    baseline = st.session_state.setdefault(f'notes_baseline_{team}', {})
+    if f'notes_data_{team}' not in st.session_state:
+        st.session_state[f'notes_data_{team}'] = notes_store.load(team, baseline)
+
+    col_left, col_right = st.columns([3, 1])
+
+    with col_left:
+        st.subheader("Draft Templates")
+        table_cols = st.columns(3)
+        for i in range(6):
+            with table_cols[i % 3]:
+                st.write(f"Draft Template {i + 1}")
+                columns = ["Team 1", "Action", "Team 2"]
+                df = pd.DataFrame(st.session_state[f'notes_data_{team}']["tables"][i], columns=columns)
+                edited_df = st.data_editor(
+                    df,
+                    num_rows="fixed",
+                    use_container_width=True,
+                    key=f"notes_table_{team}_{i}",
+                    column_config={
+                        "Team 1": st.column_config.TextColumn("Team 1"),
+                        "Action": st.column_config.TextColumn("Action", disabled=True),
+                        "Team 2": st.column_config.TextColumn("Team 2"),
+                    }
+                )
+                st.session_state[f'notes_data_{team}']["tables"][i] = edited_df.values.tolist()
+
+    with col_right:
+        st.subheader("Additional Notes")
+        notes_text = st.text_area(
+            "Write your notes here:",
+            value=st.session_state[f'notes_data_{team}']["notes_text"],
+            height=400,
+            key=f"notes_text_area_{team}"
+        )
+        st.session_state[f'notes_data_{team}']["notes_text"] = notes_text
+
+    conflicts = notes_store.save(team, st.session_state[f'notes_data_{team}'], baseline, owner=notes_owner())
+    if conflicts:
+        st.warning(f"Not saved, someone else changed them since you opened the notes: "
+                   f"{', '.join(slot_label(slot) for slot in conflicts)}. Load the latest notes to continue editing.")
+        if st.button("Load latest notes", key=f"notes_reload_{team}"):
+            for key in [f'notes_data_{team}', f'notes_text_area_{team}'] + [f"notes_table_{team}_{i}" for i in range(6)]:
+                st.session_state.pop(key, None)
+            st.rerun()
 
 def soloq_page():
+    import gspread
+    import pandas as pd
+
     st.title("Gamespace 2025 SoloQ Statistics")
 
     if st.button("Back to Hellenic Legends League Stats"):
         st.session_state.current_page = "Hellenic Legends League Stats"
         st.rerun()
 
-    client = setup_google_sheets()
-    if not client:
-        return
-
     try:
-        spreadsheet = client.open("Soloq_GMS")
-    except gspread.exceptions.APIError as e:
+        soloq_data = get_dataset_store().get("soloq")
+    except (RuntimeError, gspread.exceptions.APIError) as e:
         st.error(f"Ошибка подключения к Google Sheets: {str(e)}")
         return
 
-    if 'soloq_data' not in st.session_state:
-        st.session_state.soloq_data = aggregate_soloq_data(spreadsheet, "Gamespace")
-
     if st.button("Update Soloq"):
         with st.spinner("Updating SoloQ data..."):
-            for player, player_data in team_rosters["Gamespace"].items():
-                wks = check_if_worksheets_exists(spreadsheet, player)
-                for game_name, tag_line in zip(player_data["game_name"], player_data["tag_line"]):
-                    get_account_data(wks, game_name, tag_line)
-            st.session_state.soloq_data = aggregate_soloq_data(spreadsheet, "Gamespace")
+            soloq_data = get_dataset_store().refresh("soloq", sync=True)
         st.success("SoloQ data updated!")
 
     st.subheader("SoloQ Player Statistics")
     st.markdown("<hr style='border: 2px solid #333; margin: 10px 0;'>", unsafe_allow_html=True)
-    soloq_data = st.session_state.soloq_data
     players = team_rosters["Gamespace"].keys()
     cols = st.columns(5)
     for i, player in enumerate(players):
         with cols[i]:
             st.subheader(f"{player} Stats")
-            wks = check_if_worksheets_exists(spreadsheet, player)
-            data = wks.get_all_values()
+            data = soloq_data["sheets"][player]
             if len(data) > 1:
                 df = pd.DataFrame(data[1:], columns=["Дата матча", "Матч_айди", "Победа", "Чемпион", "Роль", "Киллы", "Смерти", "Ассисты"])
                 df["Дата матча"] = pd.to_datetime(df["Дата матча"], errors='coerce')
@@ -1281,44 +1527,39 @@ def soloq_page():
     selected_player = st.selectbox("Select Player for Visualization", players, key="viz_player")
     aggregation_type = st.selectbox("Aggregate by", ["Day", "Week", "Month"], key="agg_type")
 
-    wks = check_if_worksheets_exists(spreadsheet, selected_player)
-    try:
-        data = wks.get_all_values()
-        if len(data) <= 1:
-            st.write("No data available for visualization.")
-            return
-
-        df = pd.DataFrame(data[1:], columns=["Дата матча", "Матч_айди", "Победа", "Чемпион", "Роль", "Киллы", "Смерти", "Ассисты"])
-        df["Дата матча"] = pd.to_datetime(df["Дата матча"], errors='coerce')
-        df = df.dropna(subset=["Дата матча"])
-
-        if aggregation_type == "Day":
-            df_agg = df.groupby(df["Дата матча"].dt.date).size().reset_index(name="Games")
-            df_agg.columns = ["Дата", "Количество игр"]
-            title = f"Games Played per Day by {selected_player}"
-            st.bar_chart(df_agg.set_index("Дата")["Количество игр"])
-        
-        elif aggregation_type == "Week":
-            df_agg = df.groupby(df["Дата матча"].dt.to_period("W")).size().reset_index(name="Games")
-            df_agg["Дата матча"] = df_agg["Дата матча"].apply(lambda x: x.start_time)
-            df_agg.columns = ["Дата", "Количество игр"]
-            title = f"Games Played per Week by {selected_player}"
-            st.bar_chart(df_agg.set_index("Дата")["Количество игр"])
-        
-        elif aggregation_type == "Month":
-            df_agg = df.groupby(df["Дата матча"].dt.to_period("M")).size().reset_index(name="Games")
-            df_agg["Дата матча"] = df_agg["Дата матча"].apply(lambda x: x.start_time)
-            df_agg.columns = ["Дата", "Количество игр"]
-            title = f"Games Played per Month by {selected_player}"
-            st.bar_chart(df_agg.set_index("Дата")["Количество игр"])
-
-        if not df_agg.empty:
-            st.write(f"**{title}**")
-        else:
-            st.write(f"No data available for visualization for {selected_player}.")
+    data = soloq_data["sheets"][selected_player]
+    if len(data) <= 1:
+        st.write("No data available for visualization.")
+        return
+
+    df = pd.DataFrame(data[1:], columns=["Дата матча", "Матч_айди", "Победа", "Чемпион", "Роль", "Киллы", "Смерти", "Ассисты"])
+    df["Дата матча"] = pd.to_datetime(df["Дата матча"], errors='coerce')
+    df = df.dropna(subset=["Дата матча"])
 
-    except gspread.exceptions.APIError as e:
-        st.error(f"Ошибка API Google Sheets при загрузке данных: {str(e)}")
+    if aggregation_type == "Day":
+        df_agg = df.groupby(df["Дата матча"].dt.date).size().reset_index(name="Games")
+        df_agg.columns = ["Дата", "Количество игр"]
+        title = f"Games Played per Day by {selected_player}"
+        st.bar_chart(df_agg.set_index("Дата")["Количество игр"])
+    
+    elif aggregation_type == "Week":
+        df_agg = df.groupby(df["Дата матча"].dt.to_period("W")).size().reset_index(name="Games")
+        df_agg["Дата матча"] = df_agg["Дата матча"].apply(lambda x: x.start_time)
+        df_agg.columns = ["Дата", "Количество игр"]
+        title = f"Games Played per Week by {selected_player}"
+        st.bar_chart(df_agg.set_index("Дата")["Количество игр"])
+    
+    elif aggregation_type == "Month":
+        df_agg = df.groupby(df["Дата матча"].dt.to_period("M")).size().reset_index(name="Games")
+        df_agg["Дата матча"] = df_agg["Дата матча"].apply(lambda x: x.start_time)
+        df_agg.columns = ["Дата", "Количество игр"]
+        title = f"Games Played per Month by {selected_player}"
+        st.bar_chart(df_agg.set_index("Дата")["Количество игр"])
+
+    if not df_agg.empty:
+        st.write(f"**{title}**")
+    else:
+        st.write(f"No data available for visualization for {selected_player}.")
 
 # Аутентификация
 with open('config.yaml') as file:
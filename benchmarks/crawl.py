@@ -0,0 +1,155 @@
+"""
+Crawler benchmark: Leaguepedia pages one at a time against crawler.crawl.
+
+Serves the Match History and Picks and Bans pages of `--tournaments` generated seasons
+(season_fixture.py) from `--hosts` local wiki stand-ins, each answering after `--latency`
+seconds, and fetches all of them:
+
+- sequential: requests.get in a loop, as the Leaguepedia loaders used to;
+- crawl:      crawler.crawl with its pool, per-host limit and politeness delay.
+
+The servers log when every request arrives and finishes. The crawl run checks that no
+host ever had more than `--per-host` requests in flight, that two requests never started
+on the same host less than `--delay` seconds apart, and that every page was yielded as
+soon as it finished rather than after the whole batch. Exits with status 1 if a check fails.
+
+    python benchmarks/crawl.py [--tournaments 8] [--hosts 2] [--latency 0.3]
+                               [--workers 6] [--per-host 2] [--delay 0.2]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests  # noqa: E402
+
+from crawler import crawl  # noqa: E402
+from season_fixture import FILE_NAMES, season_pages  # noqa: E402
+
+TOLERANCE = 0.02   # Seconds of scheduling jitter allowed when checking start spacing
+
+
+class WikiServer(ThreadingHTTPServer):
+    """Serves {path: body}; logs (arrival, finish) of every request and the peak number in flight."""
+
+    daemon_threads = True
+
+    def __init__(self, pages, latency):
+        super().__init__(("127.0.0.1", 0), WikiHandler)
+        self.pages = pages
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.reset()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def reset(self):
+        with self.lock:
+            self.requests = {}   # path: (arrived, finished)
+            self.in_flight = 0
+            self.peak = 0
+
+
+class WikiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            arrived = time.perf_counter()
+            server.in_flight += 1
+            server.peak = max(server.peak, server.in_flight)
+        time.sleep(server.latency)
+        body = server.pages.get(self.path)
+        with server.lock:
+            server.in_flight -= 1
+            server.requests[self.path] = (arrived, time.perf_counter())
+        self.send_response(200 if body is not None else 404)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body or b"")))
+        self.end_headers()
+        self.wfile.write(body or b"")
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tournaments", type=int, default=8)
+    parser.add_argument("--games", type=int, default=240, help="games per tournament")
+    parser.add_argument("--hosts", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=0.3, help="seconds per response")
+    parser.add_argument("--workers", type=int, default=6)
+    parser.add_argument("--per-host", type=int, default=2)
+    parser.add_argument("--delay", type=float, default=0.2, help="politeness delay between starts on a host")
+    args = parser.parse_args()
+
+    # Tournament n lives on host n % hosts, as splits of different leagues/wikis would
+    hosts = [{} for _ in range(args.hosts)]
+    locations = {}   # (tournament, page kind): (host index, path)
+    for n in range(args.tournaments):
+        for page_kind, content in season_pages(args.games, seed=n).items():
+            path = f"/wiki/Tournament_{n}/{FILE_NAMES[page_kind][:-len('.html')]}"
+            hosts[n % args.hosts][path] = content
+            locations[(n, page_kind)] = (n % args.hosts, path)
+    servers = [WikiServer(pages, args.latency).start() for pages in hosts]
+    urls = {key: servers[host].base_url + path for key, (host, path) in locations.items()}
+
+    def sequential():
+        return [(key, time.perf_counter()) for key, url in urls.items() if requests.get(url).status_code == 200]
+
+    def crawled():
+        return [(key, time.perf_counter()) for key, page, error in
+                crawl(urls, max_workers=args.workers, per_host_limit=args.per_host, delay=args.delay)
+                if error is None and page.status_code == 200]
+
+    print(f"{len(urls)} pages on {args.hosts} hosts, {args.latency * 1000:.0f} ms latency, "
+          f"{sum(len(page) for pages in hosts for page in pages.values()) / 1e6:.1f} MB")
+    for name, fetch in (("sequential", sequential), ("crawl", crawled)):
+        for server in servers:
+            server.reset()
+        start = time.perf_counter()
+        yielded = fetch()
+        seconds = time.perf_counter() - start
+        print(f"{name:>10}: {seconds:6.2f} s  {len(yielded)} pages  first page after {yielded[0][1] - start:.2f} s")
+
+    # Checks on the crawl run (the last one)
+    checks = {}
+    checks["every page fetched"] = len(yielded) == len(urls)
+    checks[f"at most {args.per_host} requests in flight per host"] = all(
+        server.peak <= args.per_host for server in servers)
+    gaps = []
+    for server in servers:
+        starts = sorted(arrived for arrived, _ in server.requests.values())
+        gaps.extend(later - earlier for earlier, later in zip(starts, starts[1:]))
+    checks[f"starts on a host at least {args.delay} s apart"] = min(gaps, default=args.delay) >= args.delay - TOLERANCE
+    # A page is yielded when its own request finishes, not when the batch does
+    finished = {key: servers[host].requests[path][1] for key, (host, path) in locations.items()}
+    lags = [yielded_at - finished[key] for key, yielded_at in yielded]
+    last_finish = max(finished.values())
+    checks["pages yielded as they finish"] = (
+        max(lags) < args.latency and sum(yielded_at < last_finish for _, yielded_at in yielded) >= len(yielded) // 2)
+
+    print(f"peak in flight per host: {[server.peak for server in servers]}, "
+          f"smallest start gap on a host: {min(gaps, default=0):.3f} s, "
+          f"largest finish-to-yield lag: {max(lags) * 1000:.0f} ms")
+    for check, passed in checks.items():
+        print(f"{check}: {passed}")
+    for server in servers:
+        server.shutdown()
+    sys.exit(0 if all(checks.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Draft table benchmark: draft_table.render_draft_table against the pandas Styler it replaced.
+
+Builds random drafts (empty "N/A" slots, names with "&" and "'", games with and without a
+VOD, wins and losses), checks that both renderers produce byte-identical HTML for every
+one of them, then times both per game.
+
+    python benchmarks/draft_table.py [--games 200]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+
+from draft_table import cell_styles, draft_rows, render_draft_table, table_id  # noqa: E402
+
+CHAMPIONS = ["Ahri", "Kai'Sa", "Nunu & Willump", "Lee Sin", "K'Sante", "Dr. Mundo", "Jarvan IV", "Orianna",
+             "Miss Fortune", "Rakan", "Vi", "Azir", "Jinx", "Nautilus", "Renata Glasc", "Wukong", "Gnar", "Rumble"]
+TEAMS = ["Gamespace", "Team Phantasma", "PAOK Esports", "Anorthosis & Co"]
+
+
+def champion_cell(champ):
+    return f'<img src="https://ddragon.leagueoflegends.com/cdn/14.14.1/img/champion/{champ}.png" width="35" height="35"> {champ}'
+
+
+def random_game(rng, number):
+    def side():
+        return [rng.choice(CHAMPIONS + ["N/A"]) for _ in range(5)]
+    vod = f'<a href="https://youtu.be/{number}" target="_blank">VOD</a>' if rng.random() < 0.7 else ""
+    columns = rng.sample(TEAMS, 2)
+    columns.insert(1, "Action")
+    columns.append("VOD")
+    rows = draft_rows(side(), side(), side(), side(), champion_cell, vod, rng.choice(["Win", "Loss"]))
+    return columns, rows, table_id(number)
+
+
+def styler_html(columns, rows, uuid):
+    return pd.DataFrame(rows, columns=columns).style.set_uuid(uuid[2:]).apply(
+        lambda row: cell_styles(tuple(row)), axis=1).to_html()
+
+
+def per_game_ms(render, games):
+    start = time.perf_counter()
+    for game in games:
+        render(*game)
+    return (time.perf_counter() - start) * 1000 / len(games)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--games", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(17)
+    games = [random_game(rng, number) for number in range(args.games)]
+    mismatches = [game[2] for game in games if render_draft_table(*game) != styler_html(*game)]
+    print(f"identical output: {args.games - len(mismatches)}/{args.games} games")
+    if mismatches:
+        print(f"first mismatch: table {mismatches[0]}")
+        sys.exit(1)
+
+    print(f"pandas Styler:      {per_game_ms(styler_html, games):7.3f} ms per game")
+    print(f"render_draft_table: {per_game_ms(render_draft_table, games):7.3f} ms per game")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Local fake Riot API for the benchmarks: account-v1 by Riot ID and League region, match-v5
+ids by puuid and match-v5 matches, served from a generated SoloQ history (see World).
+A server given a `region` plays that regional cluster: it lists no games of accounts
+from other regions and answers 404 for their matches.
+
+Every response takes `latency` seconds and reports the app limits in
+X-App-Rate-Limit/-Count headers. Requests over those limits get a 429 with Retry-After,
+and a random `throttle` fraction gets the header-less 429 of an overloaded service.
+Windows are fixed and start with their first request, as Riot's do. Request kinds put
+in `failing` get a 503, and those in `dropping` have their connection closed without an
+answer (a requests ConnectionError on the client).
+"""
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from riot_api import match_region, parse_rate_limit, platform_region
+
+HOUR_MS = 3600 * 1000
+# The other ~120 numbers Riot sends per participant (CS, gold, damage, vision, ...), so
+# payloads are about as large as real ones
+PARTICIPANT_STATS = {f"{stat}{n}": 10 ** (n % 6 + 1) for n in range(20)
+                     for stat in ("damageDealt", "damageTaken", "gold", "vision", "minions", "time")}
+
+
+class World:
+    """
+    `games` SoloQ games of every account of `roster` ({player: {"game_name": [...],
+    "tag_line": [...]}}), newest first, one every ~3 hours. A `duo` fraction of each
+    account's games is played together with another player's account on the same
+    platform. Those games are shared, so the same match id shows up in both histories.
+    `platforms` gives the platform of an account ({(game_name, tag_line): "kr"}, default euw1).
+    """
+
+    def __init__(self, roster, games=100, duo=0.3, platforms=None, seed=22, now_ms=None):
+        rng = random.Random(seed)
+        now_ms = now_ms or int(time.time() * 1000)
+        self.puuids = {}
+        self.platforms = {}
+        owners = {}
+        for player, data in roster.items():
+            for game_name, tag_line in zip(data["game_name"], data["tag_line"]):
+                puuid = self.puuids[(game_name, tag_line)] = f"puuid-{player}-{game_name}-{tag_line}"
+                self.platforms[puuid] = (platforms or {}).get((game_name, tag_line), "euw1")
+                owners[puuid] = player
+        self.matches = {}
+        self.histories = {puuid: [] for puuid in self.puuids.values()}
+        accounts = list(self.histories)
+        number = 0
+        for puuid in accounts:
+            while len(self.histories[puuid]) < games:
+                number += 1
+                players = [puuid]
+                partner = rng.choice(accounts)
+                if (rng.random() < duo and owners[partner] != owners[puuid] and len(self.histories[partner]) < games
+                        and self.platforms[partner] == self.platforms[puuid]):
+                    players.append(partner)
+                created = now_ms - len(self.histories[puuid]) * 3 * HOUR_MS - rng.randrange(HOUR_MS)
+                self.add_match(f"{self.platforms[puuid].upper()}_{7000000000 + number}", players, created, rng)
+        for history in self.histories.values():
+            history.sort(key=lambda match_id: -self.matches[match_id]["info"]["gameCreation"])
+
+    def add_match(self, match_id, roster_puuids, created, rng=random):
+        participants = roster_puuids + [f"puuid-random-{match_id}-{i}" for i in range(10 - len(roster_puuids))]
+        self.matches[match_id] = {
+            "metadata": {"matchId": match_id, "participants": participants},
+            "info": {"gameCreation": created, "participants": [
+                {"puuid": puuid, "championName": rng.choice(["Ahri", "Vi", "Jinx", "Rakan", "Gnar"]),
+                 "teamPosition": rng.choice(["TOP", "JUNGLE", "MIDDLE", "BOTTOM", "UTILITY"]),
+                 "kills": rng.randrange(15), "deaths": rng.randrange(10), "assists": rng.randrange(20),
+                 "win": i < 5, **{name: rng.randrange(value) for name, value in PARTICIPANT_STATS.items()}}
+                for i, puuid in enumerate(participants)]}
+        }
+        for puuid in roster_puuids:
+            self.histories[puuid].insert(0, match_id)
+
+    def match_ids(self, puuid, start=0, count=20, start_time=None):
+        ids = self.histories.get(puuid, [])
+        if start_time is not None:
+            ids = [match_id for match_id in ids if self.matches[match_id]["info"]["gameCreation"] >= start_time * 1000]
+        return ids[start:start + count]
+
+
+class FakeRiot(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, world=None, latency=0.1, throttle=0.0, app_limit="500:10,30000:600",
+                 method_limit="2000:10", region=None, seed=21):
+        super().__init__(("127.0.0.1", 0), FakeRiotHandler)
+        self.world = world
+        self.region = region
+        self.failing = set()   # Request kinds answered with a 503
+        self.dropping = set()  # Request kinds whose connection is closed without an answer
+        self.latency = latency
+        self.throttle = throttle
+        self.app_limit = app_limit
+        self.method_limit = method_limit
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.reset()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def reset(self):
+        with self.lock:
+            self.windows = {seconds: [0, 0] for seconds in parse_rate_limit(self.app_limit)}  # seconds: [start, count]
+            self.stats = Counter()
+
+    def count_request(self, kind):
+        """(X-App-Rate-Limit-Count, over a limit?, service 429?) of a new request."""
+        with self.lock:
+            now = time.monotonic()
+            self.stats[kind] += 1
+            over = False
+            for seconds, window in self.windows.items():
+                if now - window[0] >= seconds:
+                    window[0], window[1] = now, 0
+                window[1] += 1
+                over = over or window[1] > parse_rate_limit(self.app_limit)[seconds]
+            counts = ",".join(f"{window[1]}:{seconds}" for seconds, window in self.windows.items())
+            throttled = not over and self.rng.random() < self.throttle
+            if over or throttled:
+                self.stats["limit_429" if over else "service_429"] += 1
+            return counts, over, throttled
+
+
+class FakeRiotHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # Keep-alive, so connection reuse shows in the stats
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.stats["connections"] += 1
+
+    def route(self):
+        """(request kind, response body or None for a 404)."""
+        url = urlsplit(self.path)
+        parts = [unquote(part) for part in url.path.strip("/").split("/")]
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        world, region = self.server.world, self.server.region
+        if parts[:5] == ["riot", "account", "v1", "accounts", "by-riot-id"] and len(parts) == 7:
+            puuid = world.puuids.get((parts[5], parts[6])) if world else None
+            return "account", puuid and {"puuid": puuid, "gameName": parts[5], "tagLine": parts[6]}
+        if parts[:7] == ["riot", "account", "v1", "region", "by-game", "lol", "by-puuid"] and len(parts) == 8:
+            platform = world.platforms.get(parts[7]) if world else None
+            return "region", platform and {"puuid": parts[7], "game": "lol", "region": platform}
+        if parts[:5] == ["lol", "match", "v5", "matches", "by-puuid"] and len(parts) == 7:
+            if not world or region not in (None, platform_region(world.platforms.get(parts[5]))):
+                return "match-ids", []
+            start_time = int(query["startTime"]) if "startTime" in query else None
+            return "match-ids", world.match_ids(parts[5], int(query.get("start", 0)), int(query.get("count", 20)),
+                                                start_time)
+        if parts[:4] == ["lol", "match", "v5", "matches"] and len(parts) == 5:
+            if world is None:
+                return "match", {"metadata": {"matchId": parts[4], "participants": []}, "info": {}}
+            if region not in (None, match_region(parts[4])):
+                return "match", None
+            return "match", world.matches.get(parts[4])
+        return "other", None
+
+    def do_GET(self):
+        kind, payload = self.route()
+        counts, over, throttled = self.server.count_request(kind)
+        if kind in self.server.dropping:
+            self.close_connection = True
+            return
+        time.sleep(self.server.latency)
+        headers = {"X-App-Rate-Limit": self.server.app_limit, "X-App-Rate-Limit-Count": counts,
+                   "X-Method-Rate-Limit": self.server.method_limit}
+        if over:
+            status, payload = 429, {}
+            headers.update({"Retry-After": "1", "X-Rate-Limit-Type": "application"})
+        elif throttled:
+            status, payload = 429, {}
+        elif kind in self.server.failing:
+            status, payload = 503, {}
+        else:
+            status = 200 if payload is not None else 404
+        body = json.dumps(payload if payload is not None else {}).encode("utf-8")
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
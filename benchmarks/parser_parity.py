@@ -0,0 +1,239 @@
+"""
+Parser parity check: the Leaguepedia parsing of app.py under lxml and html.parser, and
+against the select()-based parser app.py started with.
+
+Runs parse_match_history_page, parse_picks_and_bans_page and split_table_rows on the
+saved pages in benchmarks/fixtures (a Match History and a two-week Picks and Bans page
+with the markup Leaguepedia serves: tbody, entities, tooltip titles, non-ASCII team
+names, empty rows, look-alike tables) once per parser, each in a fresh interpreter with
+LEAGUEPEDIA_HTML_PARSER set. Exits with status 1 if any output differs.
+
+The two parsers serialize markup differently (`<img ...>` vs `<img .../>`, attribute
+order), so the rows split_table_rows returns are compared as parsed trees, and the
+records LeaguepediaIngest builds from them are compared as well.
+
+Both runs are also checked against benchmarks/fixtures/baseline_golden.json: the first
+bans, drafts, per-role picks and opponent first bans that fetch_match_history_data,
+fetch_first_bans_data and fetch_draft_data of the original app.py produced from the same
+pages. `--write-golden` regenerates that file by running those functions, taken from
+`--baseline-rev` (default: the repository's first commit), on the fixtures; the original
+"N/A" pick placeholders are left out, since the pick tables only count real picks.
+
+    python benchmarks/parser_parity.py [--write-golden [--baseline-rev REV]]
+"""
+import argparse
+import ast
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import types
+from collections import defaultdict
+
+from bs4 import BeautifulSoup
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, "benchmarks", "fixtures")
+GOLDEN = os.path.join(FIXTURES, "baseline_golden.json")
+PARSERS = ["lxml", "html.parser"]
+BASELINE_FUNCTIONS = ["normalize_team_name", "get_champion", "fetch_match_history_data",
+                      "fetch_first_bans_data", "fetch_draft_data"]
+ROLES = ["Top", "Jungle", "Mid", "ADC", "Support"]
+BASELINE_VIEWS = ["first_bans", "drafts", "picks", "opponent_bans"]
+
+SAMPLE = r"""
+import json, sys, tempfile
+from bs4 import BeautifulSoup, NavigableString
+import app
+
+def canonical(node):
+    if isinstance(node, NavigableString):
+        return str(node)
+    attrs = sorted((name, " ".join(value) if isinstance(value, list) else value) for name, value in node.attrs.items())
+    return [node.name, attrs, [canonical(child) for child in node.children]]
+
+def read(name):
+    with open(f"%s/{name}", "rb") as f:
+        return f.read()
+
+pages = {"match_history": read("match_history.html"), "picks_and_bans": read("picks_and_bans.html")}
+outputs = {
+    "parser": app.get_html_parser(),
+    "parse_match_history_page": app.parse_match_history_page(pages["match_history"]),
+    "parse_picks_and_bans_page": app.parse_picks_and_bans_page(pages["picks_and_bans"]),
+}
+ingest = app.LeaguepediaIngest(tempfile.mktemp(suffix=".pkl"))
+for page_kind, kind in app.LEAGUEPEDIA_PAGE_KINDS.items():
+    tables = app.split_table_rows(pages[page_kind], kind["table_classes"], kind["table_name"])
+    outputs[f"split_table_rows {page_kind}"] = [
+        [tag, class_attr, [canonical(BeautifulSoup(row, "html.parser").contents[0]) for row in rows]]
+        for tag, class_attr, rows in tables]
+    ingest.ingest_page("Spring Split", page_kind, pages[page_kind])
+    outputs[f"ingest records {page_kind}"] = ingest.pages[("Spring Split", page_kind)]["records"]
+
+# The same views baseline_golden.json holds, from the statistics the app shows
+ingest.commit()
+games, first_bans_data, draft_data, _ = ingest.datasets()
+teams = games["team"].unique()
+outputs["baseline first_bans"] = first_bans_data
+outputs["baseline drafts"] = draft_data
+outputs["baseline picks"] = {
+    team: {role: {champion: [int(stats["Matches"]), int(stats["Wins"])]
+                  for champion, stats in app.pick_stats(games[games["team"] == team], role).iterrows()}
+           for role in app.ROLES}
+    for team in teams}
+outputs["baseline opponent_bans"] = {
+    team: {side: {champion: int(count) for champion, count in app.opponent_first_ban_counts(games, team, side).items()}
+           for side in ("blue", "red")}
+    for team in teams}
+print(json.dumps(outputs, ensure_ascii=False))
+""" % (FIXTURES,)
+
+
+def run_parser(parser, workdir):
+    env = dict(os.environ, LEAGUEPEDIA_HTML_PARSER=parser, PYTHONPATH=ROOT)
+    result = subprocess.run([sys.executable, "-c", SAMPLE], cwd=workdir, env=env, capture_output=True, text=True,
+                            check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def baseline_views(rev):
+    """Runs the original Leaguepedia loaders of app.py at `rev` on the fixtures."""
+    source = subprocess.run(["git", "show", f"{rev}:app.py"], cwd=ROOT, capture_output=True, text=True,
+                            check=True).stdout
+    # Only the parsing functions: the rest of that app.py logs in and draws the page on import
+    tree = ast.parse(source)
+    functions = [node for node in tree.body if isinstance(node, ast.FunctionDef) and node.name in BASELINE_FUNCTIONS]
+    pages = {}
+    for page_kind in ("match_history", "picks_and_bans"):
+        with open(os.path.join(FIXTURES, f"{page_kind}.html"), "rb") as f:
+            pages[page_kind] = f.read()
+    messages = []
+    namespace = {
+        "BeautifulSoup": BeautifulSoup,
+        "defaultdict": defaultdict,
+        "TOURNAMENT_URLS": {"Spring Split": {page_kind: page_kind for page_kind in pages}},
+        "requests": types.SimpleNamespace(
+            get=lambda url, headers=None: types.SimpleNamespace(status_code=200, content=pages[url])),
+        "st": types.SimpleNamespace(error=messages.append, warning=messages.append),
+    }
+    exec(compile(ast.Module(functions, type_ignores=[]), f"{rev}:app.py", "exec"), namespace)
+    team_data = namespace["fetch_match_history_data"]()
+    first_bans = namespace["fetch_first_bans_data"]()
+    drafts = namespace["fetch_draft_data"]()
+    if messages:
+        sys.exit(f"Baseline loaders failed on the fixtures: {messages}")
+
+    views = {
+        "first_bans": first_bans,
+        "drafts": drafts,
+        "picks": {team: {role: {champion: [stats["games"], stats["wins"]]
+                                for champion, stats in data[role].items() if champion != "N/A" and stats["games"]}
+                         for role in ROLES}
+                  for team, data in team_data.items()},
+        "opponent_bans": {team: {"blue": data["OpponentBlueBans"], "red": data["OpponentRedBans"]}
+                          for team, data in team_data.items()},
+    }
+    # Through JSON, so tuples and defaultdicts compare like the parity run's output
+    return json.loads(json.dumps(views, ensure_ascii=False))
+
+
+def default_baseline_rev():
+    return subprocess.run(["git", "rev-list", "--max-parents=0", "HEAD"], cwd=ROOT, capture_output=True,
+                          text=True, check=True).stdout.split()[0]
+
+
+def write_golden(rev):
+    golden = {"revision": rev, "views": baseline_views(rev)}
+    with open(GOLDEN, "w", encoding="utf-8") as f:
+        json.dump(golden, f, ensure_ascii=False, indent=1, sort_keys=True)
+        f.write("\n")
+    print(f"Wrote {os.path.relpath(GOLDEN, ROOT)} from {rev}:app.py")
+
+
+def first_difference(a, b, path=""):
+    """Path and values of the first place where a and b differ (None if they are equal)."""
+    if type(a) is not type(b):
+        return path, a, b
+    if isinstance(a, dict):
+        for key in sorted(set(a) | set(b), key=str):
+            if key not in a or key not in b:
+                return f"{path}[{key!r}]", a.get(key), b.get(key)
+            difference = first_difference(a[key], b[key], f"{path}[{key!r}]")
+            if difference:
+                return difference
+        return None
+    if isinstance(a, list):
+        for i, (x, y) in enumerate(zip(a, b)):
+            difference = first_difference(x, y, f"{path}[{i}]")
+            if difference:
+                return difference
+        return (f"{path} length", len(a), len(b)) if len(a) != len(b) else None
+    return None if a == b else (path, a, b)
+
+
+def describe(name, output):
+    if output is None:
+        return "tables not found"
+    if name.startswith("split_table_rows"):
+        return f"{len(output)} tables, {sum(len(rows) for _, _, rows in output)} rows"
+    if name.split()[-1] in BASELINE_VIEWS:
+        return f"{len(output)} teams"
+    return f"{len(output)} records"
+
+
+def report(name, difference, output, labels):
+    """Prints one comparison line; returns whether the outputs were identical."""
+    if difference is None:
+        print(f"{name:>35}: identical ({describe(name, output)})")
+        return True
+    path, value, reference = difference
+    print(f"{name:>35}: DIFFERENT at {path or 'top level'}\n"
+          f"{'':>37}{labels[0] + ':':<13}{value!r:.200}\n"
+          f"{'':>37}{labels[1] + ':':<13}{reference!r:.200}")
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--write-golden", action="store_true", help="regenerate baseline_golden.json")
+    parser.add_argument("--baseline-rev", help="revision whose app.py is the baseline (default: first commit)")
+    args = parser.parse_args()
+    if args.write_golden:
+        write_golden(args.baseline_rev or default_baseline_rev())
+        return
+    with open(GOLDEN, encoding="utf-8") as f:
+        golden = json.load(f)
+
+    # Importing app.py reads config.yaml in the working directory
+    workdir = tempfile.mkdtemp(prefix="hll-parity-")
+    shutil.copy(os.path.join(ROOT, "config.yaml"), workdir)
+    try:
+        lxml_outputs, reference_outputs = (run_parser(name, workdir) for name in PARSERS)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if lxml_outputs.pop("parser") != "lxml" or reference_outputs.pop("parser") != "html.parser":
+        sys.exit("LEAGUEPEDIA_HTML_PARSER was not honoured")
+    identical = True
+    for name, output in lxml_outputs.items():
+        difference = first_difference(output, reference_outputs[name])
+        identical = report(name, difference, output, PARSERS) and identical
+    print("lxml output identical to html.parser:", identical)
+
+    matches_baseline = True
+    print(f"\nAgainst {os.path.relpath(GOLDEN, ROOT)} ({golden['revision']}:app.py):")
+    for parser_name, outputs in zip(PARSERS, (lxml_outputs, reference_outputs)):
+        for view, expected in golden["views"].items():
+            name = f"{parser_name} {view}"
+            output = outputs[f"baseline {view}"]
+            matches_baseline = report(name, first_difference(output, expected), output, [parser_name, "baseline"]) \
+                and matches_baseline
+    print("Output identical to the baseline parser:", matches_baseline)
+    sys.exit(0 if identical and matches_baseline else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Rerun benchmark: latency of clicks inside the Drafts, Duo Picks and Notes panels.
+
+Runs app.py with Streamlit's AppTest on a full season of Leaguepedia Match History and
+Picks and Bans pages (by default the 240-game season of season_fixture.py, or saved
+pages given on the command line), seeded into a temporary page cache so nothing is
+fetched, with every panel open, then repeats the same clicks twice:
+
+- full page: what a click cost when it reran the whole script;
+- fragment:  only the panel function, which is all a fragment rerun executes.
+
+AppTest always reruns the whole script, so the fragment case calls the panel on its own
+from a one-line page that imports app.py as a module.
+
+    python benchmarks/reruns.py [--runs 3] [--games 240] [--match-history MH.html --picks-and-bans PB.html]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from season_fixture import write_season  # noqa: E402
+
+PANEL_BUTTONS = ["picks_btn", "bans_btn", "duo_picks_btn", "drafts_btn", "notes_btn"]
+PANELS = ["drafts", "duo_picks", "notes"]   # The panels with widgets of their own
+ROLE_SETS = [["Jungle", "Mid"], ["Top", "Jungle", "Mid"], ["ADC", "Support"], ["Mid", "ADC", "Support"]]
+
+# app.py only runs main() as __main__, so these pages can import it for its functions
+SEED_PAGE = """
+from types import SimpleNamespace
+
+import app
+from crawler import PageCache
+
+cache = PageCache(app.LEAGUEPEDIA_CACHE_DIR)
+for urls in app.TOURNAMENT_URLS.values():
+    for page_kind, path in (("match_history", {match_history!r}), ("picks_and_bans", {picks_and_bans!r})):
+        with open(path, "rb") as f:
+            cache.store(urls[page_kind], response=SimpleNamespace(headers={{}}, content=f.read()))
+"""
+
+FRAGMENT_PAGE = """
+import app
+app.{panel}_panel({team!r})
+"""
+
+
+def prepare_workdir(match_history=None, picks_and_bans=None, games=240):
+    """
+    Temporary working directory with the app's config and a Leaguepedia page cache holding
+    the given pages, or a generated season of `games` games.
+    """
+    workdir = tempfile.mkdtemp(prefix="hll-reruns-")
+    for name in ("config.yaml", "logo.webp"):
+        shutil.copy(os.path.join(ROOT, name), workdir)
+    if match_history is None or picks_and_bans is None:
+        season = write_season(os.path.join(workdir, "season"), games)
+        match_history, picks_and_bans = season["match_history"], season["picks_and_bans"]
+    os.chdir(workdir)
+    os.environ["LEAGUEPEDIA_CACHE_MAX_AGE"] = str(10 ** 9)
+    for dataset in ("LEAGUEPEDIA", "SOLOQ", "SCRIMS", "DDRAGON"):
+        os.environ[f"{dataset}_REFRESH_INTERVAL"] = "0"
+
+    new_app_test(SEED_PAGE.format(match_history=match_history, picks_and_bans=picks_and_bans)).run()
+    return workdir
+
+
+def new_app_test(script=None, **kwargs):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_string(script, default_timeout=120) if script else \
+        AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=120)
+    at.session_state["authentication_status"] = True
+    at.session_state["name"] = at.session_state["username"] = "benchmark"
+    for key, value in kwargs.items():
+        at.session_state[key] = value
+    return at
+
+
+def timed(action):
+    start = time.perf_counter()
+    at = action()
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    return (time.perf_counter() - start) * 1000
+
+
+def game_button_keys(at):
+    return sorted(button.key for button in at.button if button.key and button.key.startswith("game_btn_"))
+
+
+def interactions(at, team, runs, panels=PANELS):
+    """Times every game button, role set and notes edit of `panels` `runs` times; returns {panel: [ms]}."""
+    times = {panel: [] for panel in panels}
+    for run in range(runs):
+        if "drafts" in panels:
+            for key in game_button_keys(at):
+                times["drafts"].append(timed(lambda: at.button(key=key).click().run()))
+        if "duo_picks" in panels:
+            for roles in ROLE_SETS:
+                times["duo_picks"].append(timed(lambda: at.multiselect(key="synergy_roles").set_value(roles).run()))
+        if "notes" in panels:
+            times["notes"].append(timed(lambda: at.text_area(key=f"notes_text_area_{team}").set_value(f"edit {run}").run()))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--match-history", help="saved Leaguepedia Match History page (default: generated season)")
+    parser.add_argument("--picks-and-bans", help="saved Leaguepedia Picks and Bans page (default: generated season)")
+    parser.add_argument("--games", type=int, default=240, help="games of the generated season")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+    if (args.match_history is None) != (args.picks_and_bans is None):
+        parser.error("--match-history and --picks-and-bans go together")
+
+    if args.match_history:
+        workdir = prepare_workdir(os.path.abspath(args.match_history), os.path.abspath(args.picks_and_bans))
+    else:
+        workdir = prepare_workdir(games=args.games)
+    try:
+        page = new_app_test()
+        page.run()
+        team = page.sidebar.selectbox(key="hll_team_select").value
+        for key in PANEL_BUTTONS:
+            page.button(key=key).click().run()
+        # Open every game once so each draft table is rendered (and cached) before timing
+        for key in game_button_keys(page):
+            page.button(key=key).click().run()
+        full = interactions(page, team, args.runs)
+
+        fragment = {}
+        for panel in PANELS:
+            at = new_app_test(FRAGMENT_PAGE.format(panel=panel, team=team))
+            at.run()
+            for key in game_button_keys(at):
+                at.button(key=key).click().run()
+            fragment.update(interactions(at, team, args.runs, [panel]))
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"team: {team}, {len(full['drafts']) // args.runs} game buttons, {args.runs} runs")
+    for panel in full:
+        before, after = statistics.median(full[panel]), statistics.median(fragment[panel])
+        print(f"{panel:>10}: full page {before:7.0f} ms   fragment {after:7.0f} ms   ({before / after:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Riot fetch benchmark: match downloads one at a time against RiotClient.fetch_all.
+
+Starts the local fake Riot API of fake_riot.py with `--latency` seconds per response,
+the given limits, and a random `--throttle` fraction of service 429s, then downloads
+`--matches` matches:
+
+- sequential: requests.get in a loop, as the SoloQ sync used to;
+- fetch_all:  riot_api.RiotClient with its rate limiter and worker pool.
+
+    python benchmarks/riot_fetch.py [--matches 200] [--latency 0.15] [--throttle 0.02]
+                                    [--app-limit 500:10,30000:600] [--workers 10]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests  # noqa: E402
+
+from fake_riot import FakeRiot  # noqa: E402
+from riot_api import RiotClient  # noqa: E402
+
+
+def run(server, fetch):
+    server.reset()
+    start = time.perf_counter()
+    fetched = fetch()
+    return time.perf_counter() - start, fetched, server.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--matches", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.15, help="seconds per response")
+    parser.add_argument("--throttle", type=float, default=0.02, help="fraction of requests answered with a service 429")
+    parser.add_argument("--app-limit", default="500:10,30000:600")
+    parser.add_argument("--method-limit", default="2000:10")
+    parser.add_argument("--workers", type=int, default=10)
+    args = parser.parse_args()
+
+    server = FakeRiot(latency=args.latency, throttle=args.throttle, app_limit=args.app_limit,
+                      method_limit=args.method_limit).start()
+    base = f"{server.base_url}/lol/match/v5/matches/"
+    urls = {f"EUW1_{n}": f"{base}EUW1_{n}" for n in range(args.matches)}
+
+    def sequential():
+        return sum(requests.get(url).status_code == 200 for url in urls.values())
+
+    def pooled():
+        client = RiotClient(args.app_limit, max_workers=args.workers)
+        return sum(response is not None and response.status_code == 200
+                   for _, response, _ in client.fetch_all("match", urls))
+
+    print(f"{args.matches} matches, {args.latency * 1000:.0f} ms latency, {args.throttle:.0%} service 429s, "
+          f"limits {args.app_limit}")
+    for name, fetch in (("sequential", sequential), ("fetch_all", pooled)):
+        seconds, fetched, stats = run(server, fetch)
+        print(f"{name:>10}: {seconds:6.2f} s  {fetched} fetched  {stats['connections']} connections  "
+              f"429s: {stats['limit_429']} over limit, {stats['service_429']} service")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
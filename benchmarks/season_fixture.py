@@ -0,0 +1,118 @@
+"""
+Generated full-season Leaguepedia pages for the benchmarks: a Match History and a Picks
+and Bans page of `games` games (newest first, as Leaguepedia lists them) between six
+teams, with the table classes, champion sprites, tooltip titles, winner cells and VOD
+links the parsers read. The same `games` and `seed` always give the same pages; the
+default is the 240-game season the benchmark numbers in the commit log were taken on.
+
+    python benchmarks/season_fixture.py OUT_DIR [--games 240] [--seed 7]
+"""
+import argparse
+import os
+import random
+
+TEAMS = ["Gamespace", "Team Phantasma", "PAOK Esports", "Anorthosis", "Nexus Gaming", "Zante"]
+CHAMPIONS = ["Ahri", "Kai'Sa", "Lee Sin", "Nunu & Willump", "Wukong", "K'Sante", "Xin Zhao", "Jinx", "Nautilus",
+             "Renata Glasc", "Dr. Mundo", "Orianna", "Azir", "Varus", "Rakan", "Vi", "Rumble", "Jax", "Gnar",
+             "Kha'Zix", "Cho'Gath", "LeBlanc", "Miss Fortune", "Jarvan IV", "Twisted Fate", "Sejuani", "Ezreal", "Braum"]
+FILE_NAMES = {"match_history": "Match_History.html", "picks_and_bans": "Picks_and_Bans.html"}
+
+
+def sprite(champion):
+    return f'<span class="sprite champion-sprite" title="{champion}" style="x"></span>'
+
+
+def pbh(champion):
+    return f'<span class="pbh-cn" data-champion="{champion}">{sprite(champion)}</span>'
+
+
+def team_link(team):
+    return f'<a href="/wiki/{team}" title="{team}"><img alt="{team}logo std" src="x"></a>'
+
+
+def season_games(games=240, seed=7):
+    """[(blue, red, blue bans, red bans, blue picks, red picks, blue won)], newest first."""
+    rng = random.Random(seed)
+    season = []
+    for _ in range(games):
+        blue, red = rng.sample(TEAMS, 2)
+        champions = rng.sample(CHAMPIONS, 20)
+        season.append((blue, red, champions[:5], champions[5:10], champions[10:15], champions[15:20],
+                       rng.random() < .5))
+    return season
+
+
+def match_history_page(season):
+    rows = []
+    for blue, red, blue_bans, red_bans, blue_picks, red_picks, blue_won in season:
+        rows.append("<tr>" + "".join([
+            "<td>2025-03-01</td>", "<td>14.5</td>",
+            f"<td>{team_link(blue)}</td>", f"<td>{team_link(red)}</td>",
+            f"<td>{team_link(blue if blue_won else red)}</td>",
+            "<td>" + "".join(sprite(champion) for champion in blue_bans) + "</td>",
+            "<td>" + "".join(sprite(champion) for champion in red_bans) + "</td>",
+            "<td>" + "".join(sprite(champion) for champion in blue_picks) + "</td>",
+            "<td>" + "".join(sprite(champion) for champion in red_picks) + "</td>",
+            "<td>x</td>"]) + "</tr>")
+    return ('<html><body><div>noise</div><table class="wikitable mhgame sortable"><tr><th>h</th></tr>'
+            + "".join(rows) + "</table></body></html>")
+
+
+def picks_and_bans_page(season):
+    rows = []
+    for i, (blue, red, blue_bans, red_bans, blue_picks, red_picks, blue_won) in enumerate(season):
+        cells = ["<td>x</td>"] * 24
+        blue_class, red_class = ("pbh-winner", "") if blue_won else ("", "pbh-winner")
+        # Team names come either as the cell's title or as a tooltip span inside it
+        if i % 3:
+            cells[1] = f'<td class="{blue_class}"><span class="to_hasTooltip" title="{blue}||tooltip:x">{blue}</span></td>'
+            cells[2] = f'<td class="{red_class}"><span class="to_hasTooltip" title="{red}||tooltip:x">{red}</span></td>'
+        else:
+            cells[1] = f'<td title="{blue}" class="{blue_class}">{blue}</td>'
+            cells[2] = f'<td title="{red}" class="{red_class}">{red}</td>'
+        cells[5:11] = [f"<td>{pbh(champion)}</td>" for champion in
+                       (blue_bans[0], red_bans[0], blue_bans[1], red_bans[1], blue_bans[2], red_bans[2])]
+        cells[11] = f"<td>{pbh(blue_picks[0])}</td>"
+        cells[12] = f"<td>{pbh(red_picks[0])}{pbh(red_picks[1])}</td>"
+        cells[13] = f"<td>{pbh(blue_picks[1])}{pbh(blue_picks[2])}</td>"
+        cells[14] = f"<td>{pbh(red_picks[2])}</td>"
+        cells[15:19] = [f"<td>{pbh(champion)}</td>" for champion in (blue_bans[3], red_bans[3], blue_bans[4], red_bans[4])]
+        cells[19] = f"<td>{pbh(red_picks[3])}</td>"
+        cells[20] = f"<td>{pbh(blue_picks[3])}{pbh(blue_picks[4])}</td>"
+        cells[21] = f"<td>{pbh(red_picks[4])}</td>"
+        cells[23] = f'<td><a href="https://youtu.be/{i}">vod</a></td>'
+        rows.append("<tr>" + "".join(cells) + "</tr>")
+    return ('<html><body><table class="wikitable plainlinks hoverable-rows column-show-hide-1"><tr><th>h</th></tr>'
+            + "".join(rows) + "</table></body></html>")
+
+
+def season_pages(games=240, seed=7):
+    """{"match_history": bytes, "picks_and_bans": bytes} of a generated season."""
+    season = season_games(games, seed)
+    return {"match_history": match_history_page(season).encode("utf-8"),
+            "picks_and_bans": picks_and_bans_page(season).encode("utf-8")}
+
+
+def write_season(directory, games=240, seed=7):
+    """Writes the pages into `directory`; returns {page kind: path}."""
+    os.makedirs(directory, exist_ok=True)
+    paths = {}
+    for page_kind, content in season_pages(games, seed).items():
+        paths[page_kind] = os.path.join(directory, FILE_NAMES[page_kind])
+        with open(paths[page_kind], "wb") as f:
+            f.write(content)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("out_dir")
+    parser.add_argument("--games", type=int, default=240)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    for path in write_season(args.out_dir, args.games, args.seed).values():
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+SoloQ sync benchmark: Riot API calls of app.sync_soloq_games for the Gamespace roster.
+
+Serves a generated history (`--games` per account, a `--duo` fraction of them played
+with another roster account) from local fake Riot APIs (fake_riot.py), one per regional
+cluster: accounts whose tag starts with "KR" play on KR, the others on EUW. The sync
+writes into an in-memory spreadsheet. Calls are counted per region and endpoint for
+three syncs:
+
+- first sync:  empty worksheets, every account backfilled;
+- quiet day:   right after it, nothing new;
+- busy day:    one account played `--grind` games since;
+- lookup down: the League region lookup fails while the KR account played 10 games,
+               which must still be listed on asia;
+- match drops: match downloads lose their connection while an EUW account played 10
+               games, so nothing is written and the sync still finishes;
+- recovered:   the next sync, which must list and write those 10 games.
+
+Rows written are checked against the games each player should have. "match" is
+compared with the one download per account and game that per-account syncing needs.
+Finally the rows are rebuilt from the match archive alone and compared with the sheets.
+
+    python benchmarks/soloq_sync.py [--games 150] [--duo 0.3] [--grind 250] [--latency 0.05]
+"""
+import argparse
+import glob
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_riot import FakeRiot, World  # noqa: E402
+from riot_api import RiotClient  # noqa: E402
+
+ENDPOINTS = ["account", "region", "match-ids", "match"]
+REGIONS = ["europe", "asia"]
+
+
+class Worksheet:
+    def __init__(self):
+        self.rows = []
+
+    def col_values(self, col):
+        return [row[col - 1] for row in self.rows if len(row) >= col]
+
+    def append_rows(self, rows):
+        self.rows.extend(rows)
+
+    def append_row(self, row):
+        self.rows.append(row)
+
+    def get_all_values(self):
+        return [list(row) for row in self.rows]
+
+
+class Spreadsheet:
+    def __init__(self):
+        self.worksheets = {}
+
+    def worksheet(self, name):
+        import gspread
+
+        if name not in self.worksheets:
+            raise gspread.exceptions.WorksheetNotFound(name)
+        return self.worksheets[name]
+
+    def add_worksheet(self, title, rows, cols):
+        return self.worksheets.setdefault(title, Worksheet())
+
+
+def roster_puuids(world, players):
+    return {player: {world.puuids[account] for account in zip(data["game_name"], data["tag_line"])}
+            for player, data in players.items()}
+
+
+def timed_sync(app, servers, spreadsheet, players):
+    """(seconds, rows written, {region: calls per endpoint})."""
+    for server in servers.values():
+        server.reset()
+    start = time.perf_counter()
+    new_data = app.sync_soloq_games(spreadsheet, players)
+    return (time.perf_counter() - start, sum(len(rows) for rows in new_data.values()),
+            {region: dict(server.stats) for region, server in servers.items()})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--games", type=int, default=150, help="games per account")
+    parser.add_argument("--duo", type=float, default=0.3, help="fraction of games played with another roster account")
+    parser.add_argument("--grind", type=int, default=250, help="new games of one account before the last sync")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per response")
+    args = parser.parse_args()
+
+    # Importing app.py reads config.yaml in the working directory
+    workdir = tempfile.mkdtemp(prefix="hll-soloq-")
+    shutil.copy(os.path.join(ROOT, "config.yaml"), workdir)
+    os.chdir(workdir)
+    try:
+        import app
+
+        players = app.team_rosters["Gamespace"]
+        platforms = {account: "kr" if account[1].startswith("KR") else "euw1"
+                     for data in players.values() for account in zip(data["game_name"], data["tag_line"])}
+        world = World(players, games=args.games, duo=args.duo, platforms=platforms)
+        servers = {region: FakeRiot(world, latency=args.latency, region=region).start() for region in REGIONS}
+        app.riot = RiotClient(hosts={region: server.base_url for region, server in servers.items()})
+
+        spreadsheet = Spreadsheet()
+        print(f"{len(world.puuids)} accounts ({sum(p == 'kr' for p in platforms.values())} on KR), "
+              f"{args.games} games each, {len(world.matches)} distinct matches, {args.duo:.0%} duo")
+
+        def grind():
+            puuid = next(iter(world.puuids.values()))
+            now_ms = int(time.time() * 1000)
+            for n in range(args.grind):
+                world.add_match(f"EUW1_{8000000000 + n}", [puuid], now_ms + (n + 1) * 60 * 1000)
+
+        def region_lookup_down():
+            servers["europe"].failing.add("region")
+            puuid = next(puuid for puuid, platform in world.platforms.items() if platform == "kr")
+            now_ms = int(time.time() * 1000)
+            for n in range(10):
+                world.add_match(f"KR_{8000000000 + n}", [puuid], now_ms + (n + 1) * 60 * 1000)
+
+        def match_downloads_drop():
+            servers["europe"].failing.clear()
+            servers["europe"].dropping.add("match")
+            puuid = next(iter(world.puuids.values()))
+            # After the games of the busy day, which are ahead of the clock
+            latest_ms = max(match["info"]["gameCreation"] for match in world.matches.values())
+            for n in range(10):
+                world.add_match(f"EUW1_{8100000000 + n}", [puuid], latest_ms + (n + 1) * 60 * 1000)
+
+        def recover():
+            servers["europe"].dropping.clear()
+
+        for name, before in (("first sync", None), ("quiet day", None), ("busy day", grind),
+                             ("lookup down", region_lookup_down), ("match drops", match_downloads_drop),
+                             ("recovered", recover)):
+            if before:
+                before()
+            seconds, rows, stats = timed_sync(app, servers, spreadsheet, players)
+            print(f"{name:>11}: {seconds:6.2f} s  {rows:4d} rows  (per-account sync: match {rows})")
+            for region in REGIONS:
+                calls = "  ".join(f"{endpoint} {stats[region].get(endpoint, 0):4d}" for endpoint in ENDPOINTS)
+                print(f"{'':>11}  {region:>8} calls: {calls}")
+
+        # First syncs go back SOLOQ_BACKFILL_DAYS days, older games are not expected
+        backfill_ms = (time.time() - app.SOLOQ_BACKFILL_DAYS * 86400) * 1000
+        expected = {player: {match_id for puuid, history in world.histories.items() if puuid in account_puuids
+                             for match_id in history
+                             if world.matches[match_id]["info"]["gameCreation"] >= backfill_ms}
+                    for player, account_puuids in roster_puuids(world, players).items()}
+        written = {player: set(spreadsheet.worksheet(player).col_values(2)) for player in players}
+        print("all games in the worksheets:", written == expected)
+
+        start = time.perf_counter()
+        rebuilt = app.soloq_rows_from_archive(players)
+        seconds = time.perf_counter() - start
+        raw_mb = sum(len(json.dumps(match)) for match in world.matches.values()) / 1e6
+        archive_mb = sum(os.path.getsize(path) for path in glob.glob(app.archive.path + "*")) / 1e6
+        identical = all(sorted(map(tuple, rebuilt[player])) == sorted(map(tuple, spreadsheet.worksheet(player).rows))
+                        for player in players)
+        print(f"rebuilt {sum(map(len, rebuilt.values()))} rows from {len(app.archive)} archived matches in "
+              f"{seconds:.2f} s without a Riot call (archive {archive_mb:.1f} MB, payloads {raw_mb:.1f} MB), "
+              f"identical to the worksheets: {identical}")
+        for server in servers.values():
+            server.shutdown()
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Startup benchmark: time to first paint of the login form.
+
+Every sample runs app.py once with Streamlit's AppTest in a fresh interpreter, so all
+app imports are cold, exactly like the first visitor after a server (re)start. Streamlit
+itself is imported before the clock starts: the server has it loaded before any script
+runs. Also lists which heavy dependencies the login render pulled in.
+
+    python benchmarks/startup.py [--runs 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ["pandas", "gspread", "oauth2client", "bs4", "lxml", "scrims"]
+
+SAMPLE = r"""
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+
+at = AppTest.from_file("app.py", default_timeout=120)
+start = time.perf_counter()
+at.run()
+elapsed = time.perf_counter() - start
+labels = [text_input.label for text_input in at.text_input]
+print(json.dumps({
+    "seconds": elapsed,
+    "login_form": "Username" in labels and "Password" in labels,
+    "exceptions": [str(e.value) for e in at.exception],
+    "loaded": [name for name in %r if name in sys.modules]
+}))
+""" % (HEAVY_MODULES,)
+
+
+def run_sample():
+    result = subprocess.run([sys.executable, "-c", SAMPLE], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    samples = [run_sample() for _ in range(args.runs)]
+    times = [sample["seconds"] * 1000 for sample in samples]
+    last = samples[-1]
+    print(f"login form rendered: {all(sample['login_form'] for sample in samples)}")
+    if last["exceptions"]:
+        print(f"exceptions: {last['exceptions']}")
+    print(f"time to first paint over {args.runs} runs: median {statistics.median(times):.0f} ms, "
+          f"min {min(times):.0f} ms, max {max(times):.0f} ms")
+    print(f"heavy modules loaded: {', '.join(last['loaded']) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
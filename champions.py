@@ -0,0 +1,148 @@
+# Champion registry built from Data Dragon's champion.json (shared by app.py and scrims.py)
+from functools import lru_cache
+from html import escape
+
+from ddragon import mirror
+
+# Spellings champion.json does not cover, and the ddragon ids to use while it is unavailable
+EXTRA_ALIASES = {
+    "Nunu & Willump": "Nunu",
+    "Wukong": "MonkeyKing",
+    "Renata Glasc": "Renata",
+    "K'Sante": "KSante",
+    "LeBlanc": "Leblanc",
+    "Miss Fortune": "MissFortune",
+    "Jarvan IV": "JarvanIV",
+    "Twisted Fate": "TwistedFate",
+    "Dr. Mundo": "DrMundo",
+    "Xin Zhao": "XinZhao",
+    "Kai'Sa": "Kaisa",
+    "Kha'Zix": "Khazix",
+    "Cho'Gath": "Chogath",
+    "Vel'Koz": "Velkoz",
+    "Rek'Sai": "RekSai"
+}
+
+
+def alias_key(spelling):
+    """Case, space and punctuation insensitive lookup key ("Kai'Sa", "kaisa", "KaiSa" -> "kaisa")."""
+    return "".join(c for c in str(spelling).lower() if c.isalnum())
+
+
+class ChampionRegistry:
+    """
+    Resolves any champion spelling - display name, API championName, ddragon id, numeric
+    key or Leaguepedia title - to one champion record in O(1): {'id', 'key', 'name', 'image'}.
+    `id` is the canonical id and the ddragon asset name.
+    """
+
+    def __init__(self, patch_version, champions=None, ddragon=mirror):
+        self.patch_version = patch_version
+        self.ddragon = ddragon
+        self.champions = {}
+        self.aliases = {}
+        for info in (champions or {}).values():
+            champion = {
+                'id': info['id'],
+                'key': str(info['key']),
+                'name': info['name'],
+                'image': info.get('image', {}).get('full', f"{info['id']}.png")
+            }
+            self.champions[champion['id']] = champion
+            for spelling in (champion['id'], champion['key'], champion['name']):
+                self.aliases[alias_key(spelling)] = champion
+        for spelling, champion_id in EXTRA_ALIASES.items():
+            champion = self.champions.get(champion_id, {'id': champion_id, 'key': None, 'name': spelling, 'image': f"{champion_id}.png"})
+            self.aliases.setdefault(alias_key(spelling), champion)
+        self.lookup = lru_cache(maxsize=2048)(self._lookup)
+
+    def _lookup(self, spelling):
+        if not spelling or spelling == "N/A":
+            return None
+        return self.aliases.get(alias_key(spelling))
+
+    def ddragon_name(self, spelling):
+        """Asset name for ddragon URLs; unknown spellings fall back to their alphanumeric characters."""
+        champion = self.lookup(spelling)
+        if champion:
+            return champion['id']
+        if not spelling or spelling == "N/A":
+            return None
+        return "".join(c for c in str(spelling) if c.isalnum()) or None
+
+    def name(self, spelling):
+        champion = self.lookup(spelling)
+        return champion['name'] if champion else spelling
+
+    def icon_url(self, spelling):
+        champion = self.lookup(spelling)
+        if champion:
+            return self.ddragon.icon_url(self.patch_version, champion['image'])
+        asset = self.ddragon_name(spelling)
+        return self.ddragon.icon_url(self.patch_version, f"{asset}.png") if asset else None
+
+    def sprite_icon(self, spelling, size, title=None, style=None):
+        """
+        `<span>` showing the champion's cell of the `size` px sprite sheet, styled by
+        icon_css(); None while the patch has no sprite or the champion or size is not on it.
+        Stylesheets can draw it at another size by overriding --icon-size.
+        """
+        sprite = self.ddragon.sprite(self.patch_version)
+        champion = self.lookup(spelling)
+        if sprite is None or champion is None or champion['id'] not in sprite['champions'] or size not in sprite['sizes']:
+            return None
+        attributes = f' title="{escape(title)}" aria-label="{escape(title)}"' if title else ""
+        if style:
+            attributes += f' style="{style}"'
+        return f'<span class="champion-icon champion-icon-{size} champion-{champion["id"]}" role="img"{attributes}></span>'
+
+    def icon_css(self):
+        """
+        `<style>` block for sprite_icon(): one rule per sheet size and one cell position
+        per champion. Empty while the patch has no sprite.
+        """
+        sprite = self.ddragon.sprite(self.patch_version)
+        if sprite is None:
+            return ""
+        columns = sprite['columns']
+        rules = [
+            ".champion-icon { display: inline-block; vertical-align: middle; "
+            "width: var(--icon-size); height: var(--icon-size); background-repeat: no-repeat; "
+            f"background-size: calc(var(--icon-size) * {columns}) auto; "
+            "background-position: calc(var(--icon-size) * var(--icon-column) * -1) "
+            "calc(var(--icon-size) * var(--icon-row) * -1); }"
+        ]
+        for size in sprite['sizes']:
+            rules.append(f'.champion-icon-{size} {{ --icon-size: {size}px; background-image: url("{sprite["urls"][size]}"); }}')
+        for champion_id, index in sprite['champions'].items():
+            row, column = divmod(index, columns)
+            rules.append(f".champion-{champion_id} {{ --icon-column: {column}; --icon-row: {row}; }}")
+        return "<style>\n" + "\n".join(rules) + "\n</style>"
+
+    def names_by_key(self):
+        """{numeric key: display name}, as used for the ban ids of the GRID summaries."""
+        return {champion['key']: champion['name'] for champion in self.champions.values()}
+
+
+_registries = {}
+
+
+def get_champion_registry(patch_version=None):
+    """
+    Registry for `patch_version` (default: the mirror's current patch), built once per
+    process from the local Data Dragon mirror. Until that patch is mirrored an
+    EXTRA_ALIASES-only registry is returned.
+    """
+    patch_version = patch_version or mirror.latest_version()
+    registry = _registries.get(patch_version)
+    if registry is None:
+        champion_data = mirror.champion_data(patch_version)
+        if champion_data is None:
+            return _fallback_registry(patch_version)
+        registry = _registries[patch_version] = ChampionRegistry(patch_version, champion_data)
+    return registry
+
+
+@lru_cache(maxsize=4)
+def _fallback_registry(patch_version):
+    return ChampionRegistry(patch_version)
@@ -0,0 +1,162 @@
+# Parallel page crawler with per-host throttling and a conditional-GET disk cache
+# (used for Leaguepedia pages)
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_HEADERS = {'User-Agent': 'Mozilla/5.0'}
+MAX_WORKERS = 6          # Total pages in flight
+PER_HOST_LIMIT = 2       # Concurrent requests to a single host
+POLITENESS_DELAY = 0.5   # Minimum seconds between two request starts on the same host
+REQUEST_TIMEOUT = 30
+
+
+class Page:
+    """A fetched page. `unchanged` is True when the body was served from the disk cache."""
+
+    def __init__(self, url, status_code, content, unchanged=False):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.unchanged = unchanged
+
+
+class PageCache:
+    """
+    On-disk HTTP cache: stores each page body with its ETag/Last-Modified validators.
+    Pages younger than `max_age` seconds are reused without a request; older ones are
+    revalidated with If-None-Match/If-Modified-Since and reused on 304.
+    """
+
+    def __init__(self, directory, max_age=0):
+        self.directory = directory
+        self.max_age = max_age
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, url):
+        name = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{name}.json"), os.path.join(self.directory, f"{name}.html")
+
+    def load(self, url):
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                content = f.read()
+        except (OSError, ValueError):
+            return None, None
+        return meta, content
+
+    def is_fresh(self, meta):
+        return time.time() - meta.get("fetched_at", 0) < self.max_age
+
+    def validators(self, meta):
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def store(self, url, response=None, meta=None):
+        meta_path, body_path = self._paths(url)
+        if response is not None:
+            meta = {
+                "url": url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified")
+            }
+            write_atomic(body_path, response.content)
+        meta["fetched_at"] = time.time()
+        write_atomic(meta_path, json.dumps(meta).encode("utf-8"))
+
+
+def write_atomic(path, data):
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _conditional_get(session, url, timeout, cache, meta, cached_content):
+    headers = cache.validators(meta) if meta is not None else {}
+    response = session.get(url, headers=headers, timeout=timeout)
+    if response.status_code == 304 and meta is not None:
+        cache.store(url, meta=meta)
+        return Page(url, 200, cached_content, unchanged=True)
+    if response.status_code == 200 and cache:
+        cache.store(url, response=response)
+    return Page(url, response.status_code, response.content)
+
+
+class HostThrottle:
+    """Limits concurrent requests per host and spaces out their start times."""
+
+    def __init__(self, limit=PER_HOST_LIMIT, delay=POLITENESS_DELAY):
+        self.limit = limit
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._semaphores = {}
+        self._next_start = {}
+
+    def _semaphore(self, host):
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.limit)
+            return self._semaphores[host]
+
+    @contextmanager
+    def slot(self, host):
+        with self._semaphore(host):
+            with self._lock:
+                now = time.monotonic()
+                start = max(now, self._next_start.get(host, now))
+                self._next_start[host] = start + self.delay
+            if start > now:
+                time.sleep(start - now)
+            yield
+
+
+def make_session(pool_size=MAX_WORKERS, headers=None):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(headers or DEFAULT_HEADERS)
+    return session
+
+
+def crawl(urls, max_workers=MAX_WORKERS, per_host_limit=PER_HOST_LIMIT, delay=POLITENESS_DELAY,
+          timeout=REQUEST_TIMEOUT, session=None, cache=None):
+    """
+    Fetches every page of `urls` ({key: url}) on a bounded thread pool and yields
+    (key, page, error) as each page finishes, so the caller can parse a page
+    while the others are still downloading. Fresh cached pages skip the throttle.
+    """
+    throttle = HostThrottle(per_host_limit, delay)
+    session = session or make_session(max_workers)
+
+    def fetch(url):
+        meta, cached_content = cache.load(url) if cache else (None, None)
+        if meta is not None and cache.is_fresh(meta):
+            return Page(url, 200, cached_content, unchanged=True)
+        with throttle.slot(urlsplit(url).netloc):
+            return _conditional_get(session, url, timeout, cache, meta, cached_content)
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="crawler") as executor:
+        futures = {executor.submit(fetch, url): key for key, url in urls.items()}
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                yield key, future.result(), None
+            except requests.exceptions.RequestException as e:
+                yield key, None, e
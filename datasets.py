@@ -0,0 +1,192 @@
+# Process-wide dataset store shared by every Streamlit session, plus a background
+# scheduler that keeps its snapshots warm
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JITTER = 0.1        # Fraction of the interval added/subtracted at random
+RETRY_DELAY = 60            # First retry after a failed refresh, doubled on each failure
+MAX_RETRY_DELAY = 3600
+
+
+class PartialSnapshot:
+    """
+    What a loader returns when some of its sources failed but the rest still make a usable
+    snapshot: it is published like any other, and `warnings` are kept on the dataset.
+    """
+
+    def __init__(self, snapshot, warnings):
+        self.snapshot = snapshot
+        self.warnings = list(warnings)
+
+
+class Dataset:
+    """
+    One named dataset: the latest snapshot, its version number and a single-flight loader.
+    Concurrent callers never start a second load; they wait for the running one and
+    reuse its result. A new snapshot is published with a single reference swap, so
+    readers see either the old or the new one, never a half-built one.
+    """
+
+    def __init__(self, name, loader):
+        self.name = name
+        self.loader = loader
+        self.snapshot = None
+        self.version = 0
+        self.updated_at = None
+        self.last_attempt = None
+        self.last_error = None
+        self.warnings = []
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self.version == 0:
+            self.refresh()
+        return self.snapshot
+
+    def refresh(self, **loader_kwargs):
+        seen_version = self.version
+        with self._lock:
+            if self.version != seen_version:
+                # Another caller finished a load while we were waiting for the lock
+                return self.snapshot
+            self.last_attempt = time.time()
+            try:
+                snapshot = self.loader(**loader_kwargs)
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                raise
+            warnings = []
+            if isinstance(snapshot, PartialSnapshot):
+                snapshot, warnings = snapshot.snapshot, snapshot.warnings
+            self.last_error = None
+            self.warnings = warnings
+            self.snapshot = snapshot
+            self.updated_at = time.time()
+            self.version += 1
+        return snapshot
+
+
+class DatasetStore:
+    def __init__(self):
+        self.datasets = {}
+
+    def register(self, name, loader):
+        self.datasets[name] = Dataset(name, loader)
+        return self.datasets[name]
+
+    def get(self, name):
+        return self.datasets[name].get()
+
+    def refresh(self, name, **loader_kwargs):
+        return self.datasets[name].refresh(**loader_kwargs)
+
+    def version(self, name):
+        return self.datasets[name].version
+
+    def warnings(self, name):
+        return self.datasets[name].warnings
+
+
+class RefreshJob:
+    def __init__(self, name, interval, loader_kwargs, next_run):
+        self.name = name
+        self.interval = interval
+        self.loader_kwargs = loader_kwargs
+        self.next_run = next_run
+        self.failures = 0
+
+
+class RefreshScheduler:
+    """
+    Refreshes store datasets on a daemon thread, each on its own interval. Run times are
+    jittered so the datasets do not line up, and a failing dataset is retried with
+    exponential backoff while readers keep the last good snapshot.
+    """
+
+    def __init__(self, store, jitter=DEFAULT_JITTER, retry_delay=RETRY_DELAY, max_retry_delay=MAX_RETRY_DELAY):
+        self.store = store
+        self.jitter = jitter
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.jobs = {}
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def schedule(self, name, interval, initial_delay=0, **loader_kwargs):
+        """Refresh `name` every `interval` seconds; an interval of 0 or less disables it."""
+        if interval <= 0:
+            self.jobs.pop(name, None)
+            return
+        self.jobs[name] = RefreshJob(name, interval, loader_kwargs, time.time() + initial_delay)
+        self._wakeup.set()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name="dataset-refresh", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+
+    def _jittered(self, delay):
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.clear()
+            due = min(list(self.jobs.values()), key=lambda job: job.next_run, default=None)
+            if due is None:
+                self._wakeup.wait()
+                continue
+            wait = due.next_run - time.time()
+            if wait > 0:
+                self._wakeup.wait(wait)
+                continue
+            self._run_job(due)
+
+    def _run_job(self, job):
+        dataset = self.store.datasets[job.name]
+        # A manual refresh since the last run counts as this run
+        if dataset.updated_at is not None and time.time() - dataset.updated_at < job.interval / 2:
+            job.next_run = dataset.updated_at + self._jittered(job.interval)
+            return
+        # A dataset nobody has loaded yet gets a plain load first, so readers have a
+        # snapshot before the first (possibly slow) scheduled refresh
+        loader_kwargs = job.loader_kwargs if dataset.version else {}
+        try:
+            dataset.refresh(**loader_kwargs)
+        except Exception:
+            job.failures += 1
+            delay = min(self.max_retry_delay, self.retry_delay * 2 ** (job.failures - 1))
+            logger.exception("Background refresh of %s failed (attempt %d), retrying in %ds",
+                             job.name, job.failures, delay)
+            job.next_run = time.time() + self._jittered(delay)
+            return
+        if dataset.warnings:
+            logger.warning("Background refresh of %s is incomplete: %s", job.name, "; ".join(dataset.warnings))
+        job.failures = 0
+        job.next_run = time.time() + self._jittered(job.interval)
+
+    def status(self):
+        """One row per dataset: version, last refresh, last error, warnings and next scheduled run."""
+        rows = []
+        for name, dataset in self.store.datasets.items():
+            job = self.jobs.get(name)
+            rows.append({
+                "dataset": name,
+                "version": dataset.version,
+                "updated_at": dataset.updated_at,
+                "last_attempt": dataset.last_attempt,
+                "last_error": dataset.last_error,
+                "warnings": dataset.warnings,
+                "failures": job.failures if job else 0,
+                "next_run": job.next_run if job else None
+            })
+        return rows
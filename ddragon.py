@@ -0,0 +1,174 @@
+# Local, versioned Data Dragon mirror: versions.json, champion.json and the champion
+# square icons of the current patch, kept under static/ so Streamlit serves the icons
+import io
+import json
+import math
+import os
+import threading
+import time
+
+from crawler import crawl, make_session, write_atomic
+
+DDRAGON_URL = "https://ddragon.leagueoflegends.com"
+DDRAGON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "ddragon")
+STATIC_URL = "app/static/ddragon"   # Where Streamlit serves DDRAGON_DIR (server.enableStaticServing)
+FALLBACK_VERSION = "14.14.1"        # Used until a first sync has completed
+ICON_WORKERS = 8
+ICON_DELAY = 0.05
+SPRITE_SIZES = (25, 30, 35)         # Icon sizes the tables render, one sprite sheet each
+SPRITE_COLUMNS = 16
+
+
+class DataDragonMirror:
+    """
+    Every read (latest_version, champion_data, icon_url) is served from memory or disk and
+    never touches the network. sync() - run off the request path by the refresh
+    scheduler - downloads a new patch once and then switches the mirror over to it.
+    """
+
+    def __init__(self, directory=DDRAGON_DIR):
+        self.directory = directory
+        self._current = None
+        self._champion_data = {}
+        self._icons = {}
+        self._sprites = {}
+        self._lock = threading.Lock()
+
+    def _path(self, *parts):
+        return os.path.join(self.directory, *parts)
+
+    def _read_json(self, *parts):
+        try:
+            with open(self._path(*parts), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_json(self, data, *parts):
+        path = self._path(*parts)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_atomic(path, json.dumps(data).encode("utf-8"))
+
+    def current(self):
+        """{'version', 'synced_at'} of the last completed sync, or None."""
+        if self._current is None:
+            self._current = self._read_json("current.json") or {}
+        return self._current or None
+
+    def latest_version(self):
+        current = self.current()
+        return current["version"] if current else FALLBACK_VERSION
+
+    def champion_data(self, version):
+        """champion.json 'data' of a mirrored patch, or None if it is not on disk."""
+        if version not in self._champion_data:
+            champion_json = self._read_json(version, "data", "en_US", "champion.json")
+            if champion_json is None:
+                return None
+            self._champion_data[version] = champion_json["data"]
+        return self._champion_data[version]
+
+    def icon_url(self, version, image):
+        """Local URL of a champion square icon, or the ddragon URL if it is not mirrored."""
+        if version not in self._icons:
+            try:
+                self._icons[version] = set(os.listdir(self._path(version, "img", "champion")))
+            except OSError:
+                self._icons[version] = set()
+        if image in self._icons[version]:
+            return f"{STATIC_URL}/{version}/img/champion/{image}"
+        return f"{DDRAGON_URL}/cdn/{version}/img/champion/{image}"
+
+    def sprite(self, version):
+        """
+        Sprite sheet layout of a mirrored patch, or None if it has not been built:
+        {'columns', 'sizes', 'champions': {champion id: cell index}, 'urls': {size: url}}.
+        """
+        if version not in self._sprites:
+            layout = self._read_json(version, "img", "sprite", "champion.json")
+            if layout is not None:
+                layout["urls"] = {size: f"{STATIC_URL}/{version}/img/sprite/champion-{size}.png"
+                                  for size in layout["sizes"]}
+            self._sprites[version] = layout
+        return self._sprites[version]
+
+    def build_sprites(self, version, champion_data):
+        """
+        Packs the mirrored icons of `version` into one sprite sheet per SPRITE_SIZES
+        entry, so a table of champion icons costs the browser one request per size.
+        """
+        from PIL import Image
+
+        icon_dir = self._path(version, "img", "champion")
+        champions = [(info["id"], os.path.join(icon_dir, info["image"]["full"]))
+                     for info in sorted(champion_data.values(), key=lambda info: info["id"])]
+        champions = [(champion_id, path) for champion_id, path in champions if os.path.exists(path)]
+        if not champions:
+            return None
+        rows = math.ceil(len(champions) / SPRITE_COLUMNS)
+        sheets = {size: Image.new("RGBA", (SPRITE_COLUMNS * size, rows * size)) for size in SPRITE_SIZES}
+        layout = {"columns": SPRITE_COLUMNS, "sizes": list(SPRITE_SIZES), "champions": {}}
+        for index, (champion_id, path) in enumerate(champions):
+            row, column = divmod(index, SPRITE_COLUMNS)
+            with Image.open(path) as icon:
+                icon = icon.convert("RGBA")
+                for size, sheet in sheets.items():
+                    sheet.paste(icon.resize((size, size), Image.LANCZOS), (column * size, row * size))
+            layout["champions"][champion_id] = index
+
+        sprite_dir = self._path(version, "img", "sprite")
+        os.makedirs(sprite_dir, exist_ok=True)
+        for size, sheet in sheets.items():
+            buffer = io.BytesIO()
+            sheet.save(buffer, format="PNG", optimize=True)
+            write_atomic(os.path.join(sprite_dir, f"champion-{size}.png"), buffer.getvalue())
+        # The layout is written last: it is what marks the sheets as ready
+        self._write_json(layout, version, "img", "sprite", "champion.json")
+        self._sprites.pop(version, None)
+        return layout
+
+    def sync(self, session=None):
+        """
+        Mirrors the newest patch from versions.json if it is not mirrored yet, including
+        any icons a previous sync failed to download, and (re)builds its sprite sheets
+        whenever icons were added. Returns the current patch.
+        """
+        with self._lock:
+            session = session or make_session(ICON_WORKERS)
+            response = session.get(f"{DDRAGON_URL}/api/versions.json", timeout=30)
+            response.raise_for_status()
+            versions = response.json()
+            version = versions[0]
+            self._write_json(versions, "versions.json")
+
+            champion_data = self.champion_data(version)
+            if champion_data is None:
+                response = session.get(f"{DDRAGON_URL}/cdn/{version}/data/en_US/champion.json", timeout=30)
+                response.raise_for_status()
+                champion_json = response.json()
+                self._write_json(champion_json, version, "data", "en_US", "champion.json")
+                champion_data = self._champion_data[version] = champion_json["data"]
+
+            icon_dir = self._path(version, "img", "champion")
+            os.makedirs(icon_dir, exist_ok=True)
+            icon_urls = {}
+            downloaded = 0
+            for info in champion_data.values():
+                image = info["image"]["full"]
+                if not os.path.exists(os.path.join(icon_dir, image)):
+                    icon_urls[image] = f"{DDRAGON_URL}/cdn/{version}/img/champion/{image}"
+            for image, page, error in crawl(icon_urls, max_workers=ICON_WORKERS, per_host_limit=ICON_WORKERS,
+                                            delay=ICON_DELAY, session=session):
+                if error is None and page.status_code == 200:
+                    write_atomic(os.path.join(icon_dir, image), page.content)
+                    downloaded += 1
+            self._icons.pop(version, None)
+            if downloaded or self.sprite(version) is None:
+                self.build_sprites(version, champion_data)
+
+            self._current = {"version": version, "synced_at": time.time()}
+            self._write_json(self._current, "current.json")
+            return version
+
+
+mirror = DataDragonMirror()
@@ -0,0 +1,63 @@
+# Draft table of one game (Drafts view in app.py), rendered without pandas
+import hashlib
+
+# Ban/pick order of a draft: (action, index into that side's bans or picks)
+DRAFT_ORDER = [("Ban", 0), ("Ban", 1), ("Ban", 2), ("Pick", 0), ("Pick", 1), ("Pick", 2),
+               ("Ban", 3), ("Ban", 4), ("Pick", 3), ("Pick", 4)]
+BAN_STYLE = "background-color: red"
+RESULT_STYLES = {"Win": "background-color: green", "Loss": "background-color: red"}
+
+
+def draft_rows(left_bans, right_bans, left_picks, right_picks, champion_cell, vod, result):
+    """
+    The ten (left, action, right, vod/result) rows of a draft. `champion_cell` renders a
+    champion; "N/A" entries stay empty. The VOD link goes on the first row and the
+    result on the third.
+    """
+    rows = []
+    for number, (action, i) in enumerate(DRAFT_ORDER):
+        left, right = (left_bans[i], right_bans[i]) if action == "Ban" else (left_picks[i], right_picks[i])
+        extra = vod if number == 0 else result if number == 2 else ""
+        rows.append((champion_cell(left) if left != "N/A" else "", action,
+                     champion_cell(right) if right != "N/A" else "", extra))
+    return rows
+
+
+def cell_styles(row):
+    """CSS of the four cells of a row: both champions of a ban in red, the result in green/red."""
+    styles = [""] * 4
+    if row[1] == "Ban":
+        styles[0] = styles[2] = BAN_STYLE
+    styles[3] = RESULT_STYLES.get(row[3], "")
+    return styles
+
+
+def table_id(*key):
+    return "T_" + hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:8]
+
+
+def render_draft_table(columns, rows, uuid):
+    """
+    Same markup as `DataFrame(rows, columns=columns).style.apply(highlight, axis=1).to_html()`
+    with `cell_styles` as the highlight function: one CSS rule per distinct style listing
+    its cells in row order, a row-number column, and values inserted unescaped.
+    """
+    selectors = {}
+    for r, row in enumerate(rows):
+        for c, style in enumerate(cell_styles(row)):
+            if style:
+                selectors.setdefault(style, []).append(f"#{uuid}_row{r}_col{c}")
+    parts = ['<style type="text/css">\n']
+    for style, cells in selectors.items():
+        parts.append(f"{', '.join(cells)} {{\n  {style};\n}}\n")
+    parts.append(f'</style>\n<table id="{uuid}">\n  <thead>\n    <tr>\n      <th class="blank level0" >&nbsp;</th>\n')
+    for c, column in enumerate(columns):
+        parts.append(f'      <th id="{uuid}_level0_col{c}" class="col_heading level0 col{c}" >{column}</th>\n')
+    parts.append("    </tr>\n  </thead>\n  <tbody>\n")
+    for r, row in enumerate(rows):
+        parts.append(f'    <tr>\n      <th id="{uuid}_level0_row{r}" class="row_heading level0 row{r}" >{r}</th>\n')
+        for c, value in enumerate(row):
+            parts.append(f'      <td id="{uuid}_row{r}_col{c}" class="data row{r} col{c}" >{value}</td>\n')
+        parts.append("    </tr>\n")
+    parts.append("  </tbody>\n</table>\n")
+    return "".join(parts)
@@ -0,0 +1,49 @@
+# Process-wide LRU cache of rendered HTML table fragments (shared by app.py and scrims.py)
+import os
+import threading
+from collections import OrderedDict
+
+MAX_FRAGMENTS = int(os.getenv("FRAGMENT_CACHE_SIZE", "512"))
+
+
+class FragmentCache:
+    """
+    Rendered markup keyed by (view, team, filter, data version...). A rerun that
+    changes nothing re-emits the cached strings instead of rebuilding DataFrames and
+    calling to_html again; a new dataset version simply produces new keys, and the
+    least recently used fragments are evicted once `max_entries` is reached.
+    """
+
+    def __init__(self, max_entries=MAX_FRAGMENTS):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._fragments = OrderedDict()
+        self._lock = threading.Lock()
+
+    def render(self, key, build):
+        """Fragment for `key`, calling `build()` on a miss. `build` may return None ("nothing to show")."""
+        with self._lock:
+            if key in self._fragments:
+                self._fragments.move_to_end(key)
+                self.hits += 1
+                return self._fragments[key]
+            self.misses += 1
+        # Built outside the lock: two sessions missing the same key at once just build it twice
+        fragment = build()
+        with self._lock:
+            self._fragments[key] = fragment
+            self._fragments.move_to_end(key)
+            while len(self._fragments) > self.max_entries:
+                self._fragments.popitem(last=False)
+        return fragment
+
+    def clear(self):
+        with self._lock:
+            self._fragments.clear()
+
+    def __len__(self):
+        return len(self._fragments)
+
+
+fragments = FragmentCache()
@@ -0,0 +1,93 @@
+# Local archive of raw Riot match-v5 payloads (zlib-compressed JSON in SQLite, keyed by
+# match id), so SoloQ rows can be rebuilt with new columns without downloading anything
+import json
+import os
+import sqlite3
+import threading
+import zlib
+
+MATCH_ARCHIVE = os.getenv("MATCH_ARCHIVE", os.path.join(".cache", "matches.sqlite3"))
+COMPRESSION_LEVEL = 6
+QUERY_CHUNK = 500   # Match ids per IN (...) query
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS matches (
+    match_id TEXT PRIMARY KEY,
+    game_creation INTEGER,
+    payload BLOB NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS participants (
+    puuid TEXT NOT NULL,
+    match_id TEXT NOT NULL,
+    PRIMARY KEY (puuid, match_id)
+) WITHOUT ROWID;
+"""
+
+
+class MatchArchive:
+    """
+    A match id always names the same game, so a payload is stored once and never
+    updated. The participants table indexes matches by puuid, so the games of a set of
+    accounts are found without opening any payload.
+    """
+
+    def __init__(self, path=MATCH_ARCHIVE):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        # sqlite3 connections may not be shared between threads
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def store(self, match_id, content, match_data=None):
+        """Archives the raw response body `content` of a match (`match_data`: the same, already parsed)."""
+        if match_data is None:
+            match_data = json.loads(content)
+        connection = self._connection()
+        connection.execute("BEGIN")
+        try:
+            connection.execute(
+                "INSERT OR IGNORE INTO matches (match_id, game_creation, payload) VALUES (?, ?, ?)",
+                (match_id, match_data.get("info", {}).get("gameCreation"), zlib.compress(content, COMPRESSION_LEVEL)))
+            connection.executemany(
+                "INSERT OR IGNORE INTO participants (puuid, match_id) VALUES (?, ?)",
+                [(puuid, match_id) for puuid in match_data.get("metadata", {}).get("participants", [])])
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def load_many(self, match_ids):
+        """Yields (match id, match data) for every archived match of `match_ids`."""
+        match_ids = list(match_ids)
+        for i in range(0, len(match_ids), QUERY_CHUNK):
+            chunk = match_ids[i:i + QUERY_CHUNK]
+            rows = self._connection().execute(
+                f"SELECT match_id, payload FROM matches WHERE match_id IN ({', '.join('?' * len(chunk))})", chunk)
+            for match_id, payload in rows:
+                yield match_id, json.loads(zlib.decompress(payload))
+
+    def match_ids(self, puuids):
+        """Ids of the archived matches any of `puuids` played in."""
+        puuids = list(puuids)
+        match_ids = set()
+        for i in range(0, len(puuids), QUERY_CHUNK):
+            chunk = puuids[i:i + QUERY_CHUNK]
+            match_ids.update(match_id for match_id, in self._connection().execute(
+                f"SELECT match_id FROM participants WHERE puuid IN ({', '.join('?' * len(chunk))})", chunk))
+        return match_ids
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM matches").fetchone()[0]
+
+
+archive = MatchArchive()
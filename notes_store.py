@@ -0,0 +1,182 @@
+# Per-team draft templates and notes in SQLite (WAL mode): one row per template, each with
+# a revision number so concurrent analysts do not overwrite each other's edits
+import glob
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+NOTES_DB = os.getenv("NOTES_DB", "notes.sqlite3")
+JSON_PREFIX = "notes_data"      # notes_data_<team>.json files of the previous store, imported once
+TEMPLATE_COUNT = 6
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS notes (
+    team TEXT NOT NULL,
+    slot TEXT NOT NULL,
+    content TEXT NOT NULL,
+    revision INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    updated_by TEXT,
+    PRIMARY KEY (team, slot)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def default_notes():
+    return {
+        "tables": [
+            [
+                ["", "Ban", ""],
+                ["", "Ban", ""],
+                ["", "Ban", ""],
+                ["", "Pick", ""],
+                ["", "Pick", ""],
+                ["", "Pick", ""],
+                ["", "Ban", ""],
+                ["", "Ban", ""],
+                ["", "Pick", ""],
+                ["", "Pick", ""]
+            ] for _ in range(TEMPLATE_COUNT)
+        ],
+        "notes_text": ""
+    }
+
+
+def split_slots(data):
+    """{slot: JSON content} of a notes document: "table_<i>" per draft template, "notes_text" for the text."""
+    slots = {f"table_{i}": json.dumps(table) for i, table in enumerate(data["tables"])}
+    slots["notes_text"] = json.dumps(data["notes_text"])
+    return slots
+
+
+def slot_label(slot):
+    return "Additional Notes" if slot == "notes_text" else f"Draft Template {int(slot.split('_')[1]) + 1}"
+
+
+class NotesStore:
+    """
+    load() reads one team's rows through the (team, slot) primary key. save() is cheap
+    enough to call on every rerun: it writes only the templates whose content differs
+    from the caller's baseline (what that session last loaded or saved: {slot: (revision,
+    digest)}, kept by the caller), one row each, and only while the row is still at the
+    revision the baseline holds. A template someone else saved in the meantime is left
+    alone and reported back as a conflict.
+    """
+
+    def __init__(self, path=NOTES_DB, import_directory=None):
+        self.path = path
+        self.writes = 0
+        self._local = threading.local()
+        self.import_json_files(import_directory or os.path.dirname(os.path.abspath(path)))
+
+    def _connection(self):
+        # sqlite3 connections may not be shared between threads, and Streamlit runs each session in its own
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def import_json_files(self, directory, prefix=JSON_PREFIX):
+        """
+        One-time import of the <prefix>_<team>.json files in `directory` at revision 1 (teams
+        already in the database are left alone). Returns the imported teams, or None if the
+        import already ran.
+        """
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            if connection.execute("SELECT 1 FROM meta WHERE key = 'json_imported'").fetchone():
+                connection.execute("ROLLBACK")
+                return None
+            imported = []
+            for path in sorted(glob.glob(os.path.join(glob.escape(directory), f"{prefix}_*.json"))):
+                team = os.path.basename(path)[len(prefix) + 1:-len(".json")]
+                if connection.execute("SELECT 1 FROM notes WHERE team = ?", (team,)).fetchone():
+                    continue
+                try:
+                    with open(path, "r") as f:
+                        slots = split_slots(json.load(f))
+                except (OSError, ValueError, KeyError, TypeError):
+                    logger.exception("Skipping unreadable notes file %s", path)
+                    continue
+                connection.executemany(
+                    "INSERT INTO notes (team, slot, content, revision, updated_at, updated_by) "
+                    "VALUES (?, ?, ?, 1, ?, 'import')",
+                    [(team, slot, content, os.path.getmtime(path)) for slot, content in slots.items()])
+                imported.append(team)
+            connection.execute("INSERT INTO meta (key, value) VALUES ('json_imported', ?)", (str(time.time()),))
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        if imported:
+            logger.info("Imported the notes of %d teams from %s", len(imported), directory)
+        return imported
+
+    def load(self, team_name, baseline):
+        """Notes of `team_name`; `baseline` is reset to the revisions and contents read."""
+        data = default_notes()
+        baseline.clear()
+        baseline.update({slot: (0, self._digest(content)) for slot, content in split_slots(data).items()})
+        rows = self._connection().execute(
+            "SELECT slot, content, revision FROM notes WHERE team = ?", (team_name,)).fetchall()
+        for slot, content, revision in rows:
+            if slot == "notes_text":
+                data["notes_text"] = json.loads(content)
+            else:
+                data["tables"][int(slot.split("_")[1])] = json.loads(content)
+            baseline[slot] = (revision, self._digest(content))
+        return data
+
+    def save(self, team_name, data, baseline, owner=None):
+        """
+        Writes the templates of `data` that differ from `baseline` (as left by load() and
+        earlier saves, and updated here) as `owner`. Returns the slots that were not written
+        because someone else saved them first.
+        """
+        changed = [(slot, content, baseline.get(slot, (0, None))[0])
+                   for slot, content in split_slots(data).items()
+                   if baseline.get(slot, (0, None))[1] != self._digest(content)]
+        conflicts = []
+        for slot, content, revision in changed:
+            if self._write_slot(team_name, slot, content, revision, owner):
+                baseline[slot] = (revision + 1, self._digest(content))
+            else:
+                conflicts.append(slot)
+        return conflicts
+
+    def _write_slot(self, team_name, slot, content, revision, owner):
+        """Writes one row if it is still at `revision` (0: not stored yet); returns whether it did."""
+        connection = self._connection()
+        if revision == 0:
+            cursor = connection.execute(
+                "INSERT INTO notes (team, slot, content, revision, updated_at, updated_by) "
+                "VALUES (?, ?, ?, 1, ?, ?) ON CONFLICT (team, slot) DO NOTHING",
+                (team_name, slot, content, time.time(), owner))
+        else:
+            cursor = connection.execute(
+                "UPDATE notes SET content = ?, revision = revision + 1, updated_at = ?, updated_by = ? "
+                "WHERE team = ? AND slot = ? AND revision = ?",
+                (content, time.time(), owner, team_name, slot, revision))
+        if cursor.rowcount == 1:
+            self.writes += 1
+            return True
+        return False
+
+    @staticmethod
+    def _digest(content):
+        return hashlib.sha1(content.encode("utf-8")).hexdigest()
@@ -0,0 +1,226 @@
+# Riot API client: every SoloQ request goes through a process-wide rate limiter that
+# follows the app and method limits Riot reports in its response headers, one per
+# regional cluster (Riot counts the limits of a key per region)
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import ExitStack
+from urllib.parse import urlsplit
+
+import requests
+
+from crawler import make_session
+
+logger = logging.getLogger(__name__)
+
+# Limits of a development key, used until the first response reports the real ones
+DEFAULT_APP_LIMITS = "20:1,100:120"
+SAFETY_MARGIN = 0.05     # Seconds added to every window: Riot counts from when it receives a request
+MAX_RETRIES = 3          # Attempts after a 429 before the response is returned as is
+RETRY_AFTER_DEFAULT = 1  # Seconds to wait after a 429 without a Retry-After header
+REQUEST_TIMEOUT = 30
+MAX_WORKERS = int(os.getenv("RIOT_MAX_WORKERS", "10"))   # Requests in flight per region (the limiter sets the pace)
+
+API_HOST = "https://{}.api.riotgames.com"   # {}: regional cluster
+DEFAULT_REGION = "europe"
+# Platform (shard) of an account or match -> regional cluster serving its account-v1/match-v5 data
+PLATFORM_REGIONS = {
+    "na1": "americas", "br1": "americas", "la1": "americas", "la2": "americas",
+    "kr": "asia", "jp1": "asia",
+    "eun1": "europe", "euw1": "europe", "tr1": "europe", "ru": "europe", "me1": "europe",
+    "oc1": "sea", "ph2": "sea", "sg2": "sea", "th2": "sea", "tw2": "sea", "vn2": "sea",
+}
+
+
+def platform_region(platform):
+    return PLATFORM_REGIONS.get((platform or "").lower(), DEFAULT_REGION)
+
+
+def match_region(match_id):
+    """"KR_7012345678" -> "asia": a match id starts with the platform it was played on."""
+    return platform_region(match_id.partition("_")[0])
+
+
+def parse_rate_limit(header):
+    """"20:1,100:120" -> {1: 20, 120: 100} (window seconds -> requests allowed in it)."""
+    limits = {}
+    for part in (header or "").split(","):
+        count, _, seconds = part.strip().partition(":")
+        if count.isdigit() and seconds.isdigit():
+            limits[int(seconds)] = int(count)
+    return limits
+
+
+class RateWindow:
+    """Start times of the requests made in the last `seconds`; full once it holds `limit` of them."""
+
+    def __init__(self, limit, seconds):
+        self.limit = limit
+        self.seconds = seconds
+        self.starts = deque()
+
+    def wait_time(self, now):
+        """Seconds until one more request fits in the window (0 if it fits now)."""
+        while self.starts and self.starts[0] + self.seconds + SAFETY_MARGIN <= now:
+            self.starts.popleft()
+        if len(self.starts) < self.limit:
+            return 0
+        return self.starts[len(self.starts) - self.limit] + self.seconds + SAFETY_MARGIN - now
+
+
+class RateLimiter:
+    """
+    Rolling request windows for the application (shared by every method) and for each
+    method (account, match ids, match, ...). acquire() blocks until a request fits in
+    all of them, so any number of threads can share one limiter and still never exceed
+    a limit, while firing as soon as the oldest request leaves a window. The windows
+    follow the X-App-Rate-Limit/X-Method-Rate-Limit headers (and their -Count
+    companions, which include requests made by other processes using the same key), and
+    a 429 blocks the scope it names for Retry-After seconds.
+    """
+
+    def __init__(self, app_limits=DEFAULT_APP_LIMITS, clock=time.monotonic, sleep=time.sleep):
+        self.clock = clock
+        self.sleep = sleep
+        self._windows = {"app": self._make_windows(parse_rate_limit(app_limits))}
+        self._blocked_until = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _make_windows(limits):
+        return {seconds: RateWindow(limit, seconds) for seconds, limit in limits.items()}
+
+    def _scopes(self, method):
+        return ("app", f"method:{method}")
+
+    def acquire(self, method):
+        """Blocks until a request to `method` is allowed and counts it."""
+        while True:
+            with self._lock:
+                now = self.clock()
+                wait = 0
+                for scope in self._scopes(method):
+                    wait = max(wait, self._blocked_until.get(scope, 0) - now)
+                    for window in self._windows.get(scope, {}).values():
+                        wait = max(wait, window.wait_time(now))
+                if wait <= 0:
+                    for scope in self._scopes(method):
+                        for window in self._windows.get(scope, {}).values():
+                            window.starts.append(now)
+                    return
+            self.sleep(wait)
+
+    def update(self, method, headers):
+        """Adopts the limits and counts reported in the headers of a response to `method`."""
+        with self._lock:
+            for scope, prefix in zip(self._scopes(method), ("X-App-Rate-Limit", "X-Method-Rate-Limit")):
+                limits = parse_rate_limit(headers.get(prefix))
+                if not limits:
+                    continue
+                windows = self._windows.setdefault(scope, {})
+                for seconds in set(windows) - set(limits):
+                    del windows[seconds]
+                for seconds, limit in limits.items():
+                    windows.setdefault(seconds, RateWindow(limit, seconds)).limit = limit
+                # Requests of other processes (or made before this one started) only show in the counts
+                now = self.clock()
+                for seconds, count in parse_rate_limit(headers.get(f"{prefix}-Count")).items():
+                    window = windows.get(seconds)
+                    if window is not None:
+                        window.wait_time(now)
+                        for _ in range(count - len(window.starts)):
+                            window.starts.append(now)
+
+    def back_off(self, method, headers):
+        """
+        After a 429: an application or method limit blocks that scope for Retry-After
+        seconds. Any other 429 (an overloaded Riot service) only delays the request that got it.
+        """
+        try:
+            delay = float(headers.get("Retry-After", RETRY_AFTER_DEFAULT))
+        except ValueError:
+            delay = RETRY_AFTER_DEFAULT
+        limit_type = headers.get("X-Rate-Limit-Type", "service")
+        logger.warning("Riot API rate limit hit (%s, %s): waiting %.1fs", limit_type, method, delay)
+        if limit_type not in ("application", "method"):
+            self.sleep(delay)
+            return
+        scope = "app" if limit_type == "application" else f"method:{method}"
+        with self._lock:
+            until = self.clock() + delay
+            self._blocked_until[scope] = max(self._blocked_until.get(scope, 0), until)
+
+
+class RiotClient:
+    """
+    requests.get for the Riot API, paced by the limiter of the request's regional host and
+    retried after a 429. The session keeps up to `max_workers` keep-alive connections
+    per host, one per fetch_all worker. `hosts` overrides the base URL of a region.
+    """
+
+    def __init__(self, app_limits=DEFAULT_APP_LIMITS, session=None, timeout=REQUEST_TIMEOUT,
+                 max_retries=MAX_RETRIES, max_workers=MAX_WORKERS, hosts=None):
+        self.app_limits = app_limits
+        self.session = session or make_session(max_workers)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_workers = max_workers
+        self.hosts = hosts or {}
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def url(self, region, path):
+        return self.hosts.get(region, API_HOST.format(region)) + path
+
+    def limiter(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._limiters:
+                self._limiters[host] = RateLimiter(self.app_limits)
+            return self._limiters[host]
+
+    def get(self, method, url):
+        """GET `url`, counted against the limits of `method` ("account", "match-ids", "match", ...)."""
+        limiter = self.limiter(url)
+        for attempt in range(self.max_retries + 1):
+            limiter.acquire(method)
+            response = self.session.get(url, timeout=self.timeout)
+            limiter.update(method, response.headers)
+            if response.status_code != 429 or attempt == self.max_retries:
+                return response
+            limiter.back_off(method, response.headers)
+
+    def fetch_all(self, method, urls):
+        """
+        GETs every url of `urls` ({key: url}) and yields (key, response, error) as each one
+        finishes, so the caller can process a response while the others are still in
+        flight. Every regional host gets its own pool of `max_workers` threads, so a slow
+        or saturated region does not hold up the others; its limiter decides when each
+        request starts. If the caller stops early (or raises), the requests that have not
+        started yet are cancelled; the pools then only wait for the ones in flight.
+        """
+        by_host = defaultdict(dict)
+        for key, url in urls.items():
+            by_host[urlsplit(url).netloc][key] = url
+        with ExitStack() as stack:
+            futures = {}
+            for host, host_urls in by_host.items():
+                executor = stack.enter_context(
+                    ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"riot-{host}"))
+                futures.update({executor.submit(self.get, method, url): key for key, url in host_urls.items()})
+            try:
+                for future in as_completed(futures):
+                    key = futures[future]
+                    try:
+                        yield key, future.result(), None
+                    except requests.exceptions.RequestException as e:
+                        yield key, None, e
+            finally:
+                for future in futures:
+                    future.cancel()
+
+
+riot = RiotClient()
@@ -11,6 +11,9 @@ from datetime import datetime, timedelta, timezone
 import time
 from collections import defaultdict
 import sys # Added for error handling exit
+from synergy import SynergyIndex
+from champions import get_champion_registry
+from fragments import fragments
 
 # --- КОНСТАНТЫ и НАСТРОЙКИ ---
 GRID_API_KEY = os.getenv("GRID_API_KEY", "kGPVB57xOjbFawMFqF18p1SzfoMdzWkwje4HWX63") # Используйте переменную окружения или ваш ключ
@@ -51,6 +54,9 @@ API_REQUEST_DELAY = 0.5 # Уменьшена задержка, но следит
 # Стандартный порядок ролей для ЗАПИСИ в таблицу
 ROLE_ORDER_FOR_SHEET = ["TOP", "JUNGLE", "MIDDLE", "BOTTOM", "UTILITY"]
 
+# Роли в колонках листа (Blue_TOP_Champ ...), порядок для синергий
+SCRIMS_ROLES = ["TOP", "JGL", "MID", "BOT", "SUP"]
+
 # --- НОВЫЙ ЗАГОЛОВОК ТАБЛИЦЫ (без драфт-пиков, баны по ID) ---
 SCRIMS_HEADER = [
     # Основная информация
@@ -95,113 +101,18 @@ def extract_team_tag(riot_id_game_name):
                   return tag
     return None # Возвращаем None, если тег не найден
 # --- КОНЕЦ НОВОЙ ФУНКЦИИ ---
-# --- DDRagon Helper Functions (Без изменений) ---
-@st.cache_data(ttl=3600)
-def get_latest_patch_version():
-    try: response = requests.get("https://ddragon.leagueoflegends.com/api/versions.json", timeout=10); response.raise_for_status(); versions = response.json(); return versions[0] if versions else "14.14.1" # Fallback к известной версии
-    except Exception: return "14.14.1" # Fallback к известной версии
-
-@st.cache_data
-@st.cache_data
-# --- ЗАМЕНИТЕ ЭТУ ФУНКЦИЮ ---
-@st.cache_data
-def normalize_champion_name_for_ddragon(champ):
-    """Нормализует имя чемпиона для использования в URL Data Dragon,
-       включая ручные исправления и сохранение нужного регистра."""
-    if not champ or champ == "N/A":
-        return None
-
-    # --- СЛОВАРЬ РУЧНЫХ ИСПРАВЛЕНИЙ / СОХРАНЕНИЯ РЕГИСТРА ---
-    # Сюда добавляем случаи, где API/JSON имя отличается от ddragon имени,
-    # или где нужно сохранить специфический регистр (CamelCase).
-    # Формат: "Имя_из_API_или_JSON": "Имя_для_ddragon_URL"
-    champion_name_overrides = {
-        # Основные исключения
-        "Nunu & Willump": "Nunu",
-        "Wukong": "MonkeyKing",
-        "Renata Glasc": "Renata",
-        "K'Sante": "KSante",
-        "LeBlanc": "Leblanc",
-        "Miss Fortune": "MissFortune",
-        "Jarvan IV": "JarvanIV",
-        "Twisted Fate": "TwistedFate",
-        "Dr. Mundo": "DrMundo",
-        "Xin Zhao": "XinZhao",
-        # Варианты для сохранения регистра или исправления возможных входных данных
-        "MonkeyKing": "MonkeyKing",
-        "KSante": "KSante",
-        "Leblanc": "Leblanc",
-        "MissFortune": "MissFortune",
-        "Jarvaniv": "JarvanIV",
-        "JarvanIV": "JarvanIV",
-        "Twistedfate": "TwistedFate",
-        "TwistedFate": "TwistedFate",
-        "DrMundo": "DrMundo",
-        "Xinzhao": "XinZhao", # Если вдруг придет в нижнем регистре
-        "XinZhao": "XinZhao",
-        # Добавляйте другие по мере необходимости
-        # "Fiddlesticks": "Fiddlesticks", # Обычно не требует изменений
-    }
-    # --- КОНЕЦ СЛОВАРЯ ---
-
-    # 1. Сначала проверяем точное совпадение в словаре
-    if champ in champion_name_overrides:
-        return champion_name_overrides[champ]
-
-    # 2. Затем проверяем совпадение без учета регистра
-    champ_lower = champ.lower()
-    for k, v in champion_name_overrides.items():
-        # Сравниваем в нижнем регистре
-        if k.lower() == champ_lower:
-            return v # Возвращаем значение из словаря (с правильным регистром ddragon)
-
-    # 3. Если нет в словаре, применяем общую логику очистки
-    # Удаляем апострофы, точки, пробелы и т.д.
-    name_clean = ''.join(c for c in champ if c.isalnum())
-
-    # 4. Стандартные исключения ddragon для имен с апострофами/т.п. ПОСЛЕ очистки
-    # (на случай, если они не попали в overrides)
-    ddragon_cleaned_exceptions = {
-        # очищенное_имя_в_нижнем_регистре : имя_для_ddragon
-        "khazix": "Khazix",
-        "chogath": "Chogath",
-        "kaisa": "Kaisa",
-        "velkoz": "Velkoz",
-        "reksai": "Reksai",
-    }
-    if name_clean.lower() in ddragon_cleaned_exceptions:
-        return ddragon_cleaned_exceptions[name_clean.lower()]
-
-    # 5. Для всех остальных имен возвращаем очищенное имя "как есть".
-    # Data Dragon обычно чувствителен к регистру (например, 'XinZhao', а не 'Xinzhao').
-    # Простая капитализация первой буквы (как было раньше) может быть неверной.
-    # Поэтому лучше вернуть очищенное имя - если оно совпадает с ожидаемым ddragon, иконка загрузится.
-    return name_clean if name_clean else None
-    
+# --- DDRagon Helper Functions (локальное зеркало Data Dragon, см. ddragon.py) ---
 def get_champion_icon_html(champion, width=25, height=25):
-    patch_version = get_latest_patch_version(); norm = normalize_champion_name_for_ddragon(champion)
-    if norm: url = f"https://ddragon.leagueoflegends.com/cdn/{patch_version}/img/champion/{norm}.png"; return f'<img src="{url}" width="{width}" height="{height}" alt="{champion}" title="{champion}" style="vertical-align: middle; margin: 1px;">'
+    registry = get_champion_registry()
+    sprite_icon = registry.sprite_icon(champion, width, title=champion, style="margin: 1px;")
+    if sprite_icon: return sprite_icon
+    url = registry.icon_url(champion)
+    if url: return f'<img src="{url}" width="{width}" height="{height}" alt="{champion}" title="{champion}" style="vertical-align: middle; margin: 1px;">'
     return ""
-# --- НОВАЯ ФУНКЦИЯ для получения данных чемпионов с ddragon ---
-@st.cache_data(ttl=86400) # Кэшируем на сутки
+# --- Данные чемпионов из общего реестра (champions.py, champion.json с ddragon) ---
 def get_champion_data():
-    """Загружает данные чемпионов с Data Dragon и возвращает словарь {id: name}."""
-    patch_version = get_latest_patch_version()
-    url = f"https://ddragon.leagueoflegends.com/cdn/{patch_version}/data/en_US/champion.json"
-    try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        data = response.json()['data']
-        # Создаем словарь: ключ - ID чемпиона (строка), значение - имя чемпиона
-        # Riot API использует ID как строки (например, в participant['championId']), а ddragon как числа/строки в key. Приводим к строке.
-        champion_id_to_name = {champ_info['key']: champ_info['name'] for champ_name, champ_info in data.items()}
-        return champion_id_to_name
-    except requests.exceptions.RequestException as e:
-        st.error(f"Failed to fetch champion data from ddragon: {e}")
-        return {}
-    except Exception as e:
-        st.error(f"Error processing champion data: {e}")
-        return {}
+    """Возвращает словарь {id: name} (числовой key чемпиона -> имя) из реестра чемпионов."""
+    return get_champion_registry().names_by_key()
 
 # --- Добавьте вызов этой функции где-нибудь в начале scrims_page или глобально ---
 # champion_id_map = get_champion_data() # Вызывать ОДИН РАЗ при загрузке страницы/скрипта
@@ -607,13 +518,23 @@ def normalize_player_name(riot_id_game_name):
 # --- ЗАМЕНИТЕ ЭТУ ФУНКЦИЮ ---
 # --- ЗАМЕНИТЕ ЭТУ ФУНКЦИЮ ---
 # --- ОСНОВНАЯ ФУНКЦИЯ ОБНОВЛЕНИЯ ДАННЫХ (Исправлен SyntaxError в дате) ---
-def update_scrims_data(worksheet, series_list, api_key, debug_logs, progress_bar):
+def update_scrims_data(worksheet, series_list, api_key, debug_logs, progress_bar, headless=False):
     """
     Скачивает Riot Summary JSON, парсит его, включая KDA/Dmg/CS/PlayerName,
     определяет имя оппонента и результат, и добавляет расширенную строку в таблицу.
+    headless=True - фоновое обновление: логи и сводка не пишутся в session_state, а ошибки
+    поднимаются как RuntimeError (их видит планировщик), вместо st.error.
     """
-    if not worksheet: log_message("Update Error: Invalid Worksheet.", debug_logs); st.error("Invalid Worksheet."); return False
-    if not series_list: log_message("No series to process.", debug_logs); st.info("No series to process."); return False
+    def fail(message):
+        log_message(message, debug_logs)
+        if headless: raise RuntimeError(message)
+        st.error(message); return False
+
+    def notify(message, show=st.info):
+        if not headless: show(message)
+
+    if not worksheet: return fail("Update Error: Invalid Worksheet.")
+    if not series_list: log_message("No series to process.", debug_logs); notify("No series to process."); return False
 
     try:
         existing_data = worksheet.get_all_values()
@@ -624,7 +545,7 @@ def update_scrims_data(worksheet, series_list, api_key, debug_logs, progress_bar
             except ValueError: log_message("Warn: 'Game ID' column not found in header.", debug_logs); game_id_col_index=1
         existing_game_ids = set(row[game_id_col_index] for row in existing_data[1:] if len(row) > game_id_col_index and row[game_id_col_index]) if len(existing_data) > 1 and game_id_col_index != -1 else set()
         log_message(f"Found {len(existing_game_ids)} existing game IDs.", debug_logs)
-    except Exception as e: log_message(f"Error reading sheet: {e}", debug_logs); st.error(f"Error reading sheet: {e}"); return False
+    except Exception as e: return fail(f"Error reading sheet: {e}")
 
     new_rows = []; processed_game_count = 0; skipped_existing_count = 0
     skipped_state_fail_count = 0; skipped_summary_fail_count = 0; skipped_parsing_fail_count = 0
@@ -727,14 +648,17 @@ def update_scrims_data(worksheet, series_list, api_key, debug_logs, progress_bar
     try: progress_bar.progress(1.0, text="Update complete. Finalizing...")
     except: pass
     summary = [ f"\n--- Update Summary ---", f"Series: {total_series_to_process}", f"Games Found: {processed_game_count+skipped_existing_count+skipped_summary_fail_count+skipped_parsing_fail_count}", f"Skipped(Exists):{skipped_existing_count}", f"Skipped(State):{skipped_state_fail_count}", f"Skipped(Summ):{skipped_summary_fail_count}", f"Skipped(Parse):{skipped_parsing_fail_count}", f"Added: {len(new_rows)}" ]
-    if 'scrims_update_logs' not in st.session_state: st.session_state.scrims_update_logs = []
-    st.session_state.scrims_update_logs = st.session_state.scrims_update_logs[-100:] + debug_logs[-50:] + summary
-    st.code("\n".join(summary), language=None)
+    if headless: debug_logs.extend(summary)
+    else:
+        if 'scrims_update_logs' not in st.session_state: st.session_state.scrims_update_logs = []
+        st.session_state.scrims_update_logs = st.session_state.scrims_update_logs[-100:] + debug_logs[-50:] + summary
+        st.code("\n".join(summary), language=None)
 
     if new_rows:
-        try: worksheet.append_rows(new_rows, value_input_option='USER_ENTERED'); log_message(f"Appended {len(new_rows)} rows.", debug_logs); st.success(f"Added {len(new_rows)} rows."); return True
-        except Exception as e: error_msg=f"Append rows error: {e}"; log_message(error_msg, debug_logs); st.error(error_msg); return False
-    else: st.info("No new records to add."); return False
+        try: worksheet.append_rows(new_rows, value_input_option='USER_ENTERED')
+        except Exception as e: return fail(f"Append rows error: {e}")
+        log_message(f"Appended {len(new_rows)} rows.", debug_logs); notify(f"Added {len(new_rows)} rows.", st.success); return True
+    else: notify("No new records to add."); return False
 # --- Конец функции update_scrims_data ---
 # @st.cache_data(ttl=180)
 # --- ЗАМЕНИТЕ ЭТУ ФУНКЦИЮ ---
@@ -742,32 +666,38 @@ def update_scrims_data(worksheet, series_list, api_key, debug_logs, progress_bar
 # --- ЗАМЕНИТЕ ЭТУ ФУНКЦИЮ ---
 # --- ЗАМЕНИТЕ ЭТУ ФУНКЦИЮ ---
 # --- ФУНКЦИЯ АГРЕГАЦИИ ДАННЫХ (ИСПРАВЛЕН СИНТАКСИС KDA/DMG/CS ОКОНЧАТЕЛЬНО) ---
+# Начало периода для фильтра времени (None для "All Time")
+def get_time_threshold(time_filter):
+    now_utc=datetime.now(timezone.utc); time_threshold=None
+    if time_filter != "All Time":
+        weeks_map={"1 Week":1,"2 Weeks":2,"3 Weeks":3,"4 Weeks":4}; days_map={"3 Days":3,"10 Days":10,"2 Months":60}
+        if time_filter in weeks_map: time_threshold=now_utc-timedelta(weeks=weeks_map[time_filter])
+        elif time_filter in days_map: time_threshold=now_utc-timedelta(days=days_map[time_filter])
+    return time_threshold
+
 # @st.cache_data(ttl=180)
-def aggregate_scrims_data(worksheet, time_filter, champion_id_map):
+def aggregate_scrims_data(data, time_filter, champion_id_map):
     """
     Агрегирует данные. Исправлен синтаксис KDA/Dmg/CS (многострочный try-except v4).
+    data - строки листа Scrims (снимок из DatasetStore), включая заголовок.
+    Сообщения для пользователя не выводятся, а возвращаются последним элементом:
+    список (уровень, текст), где уровень - имя функции st ("error", "warning", "info").
     """
-    if not worksheet: st.error("Agg Err: Invalid worksheet."); return {}, {}, pd.DataFrame(), {}
-    if not champion_id_map: st.warning("Agg Warn: Champ map unavailable.")
+    messages = []
+    if not champion_id_map: messages.append(("warning", "Agg Warn: Champ map unavailable."))
 
     blue_stats={"wins":0,"losses":0,"total":0}; red_stats={"wins":0,"losses":0,"total":0}
     history_rows = []
     player_stats = defaultdict(lambda: defaultdict(lambda: {'games':0,'wins':0,'k':0,'d':0,'a':0,'dmg':0,'cs':0}))
 
-    now_utc=datetime.now(timezone.utc); time_threshold=None
-    if time_filter != "All Time":
-        weeks_map={"1 Week":1,"2 Weeks":2,"3 Weeks":3,"4 Weeks":4}; days_map={"3 Days":3,"10 Days":10,"2 Months":60}
-        if time_filter in weeks_map: time_threshold=now_utc-timedelta(weeks=weeks_map[time_filter])
-        elif time_filter in days_map: time_threshold=now_utc-timedelta(days=days_map[time_filter])
+    time_threshold = get_time_threshold(time_filter)
 
-    try: data = worksheet.get_all_values()
-    except Exception as e: st.error(f"Read err agg: {e}"); return {}, {}, pd.DataFrame(), {}
-    if len(data) <= 1: st.info("No data in sheet."); return {}, {}, pd.DataFrame(), {}
+    if not data or len(data) <= 1: messages.append(("info", "No data in sheet.")); return {}, {}, pd.DataFrame(), {}, messages
 
     header = data[0]; header_cleaned = [str(h).strip() if h is not None else "" for h in header]
-    if header_cleaned != SCRIMS_HEADER: st.error("Header mismatch!"); return {}, {}, pd.DataFrame(), {}
+    if header_cleaned != SCRIMS_HEADER: messages.append(("error", "Header mismatch!")); return {}, {}, pd.DataFrame(), {}, messages
     try: idx_map = {name: i for i, name in enumerate(header_cleaned)}
-    except Exception as e: st.error(f"Map creation fail: {e}"); return {}, {}, pd.DataFrame(), {}
+    except Exception as e: messages.append(("error", f"Map creation fail: {e}")); return {}, {}, pd.DataFrame(), {}, messages
 
     rows_processed_after_filter = 0
     relevant_player_names = set(ROSTER_RIOT_NAME_TO_GRID_ID.keys())
@@ -863,39 +793,120 @@ def aggregate_scrims_data(worksheet, time_filter, champion_id_map):
                 bp_html=" ".join(bp_icons); rp_html=" ".join(rp_icons)
                 patch_val=row[idx_map.get("Patch",-1)]; duration_val=row[idx_map.get("Duration",-1)]
                 history_rows.append({ "Date":date_str,"Patch":patch_val,"Blue Team Name":blue_team_name,"B Bans":bb_html,"B Picks":bp_html,"R Picks":rp_html,"R Bans":rb_html,"Red Team Name":red_team_name,"Result":result_our_team,"Duration":duration_val })
-            except KeyError as hist_key_err: st.error(f"HIST KEY ERROR r.{row_index}: '{hist_key_err}'!"); continue
-            except Exception as hist_err: st.warning(f"Hist err r.{row_index}: {hist_err}"); continue
-        except Exception as e_inner: st.warning(f"Proc err r.{row_index}: {e_inner}"); continue
+            except KeyError as hist_key_err: messages.append(("error", f"HIST KEY ERROR r.{row_index}: '{hist_key_err}'!")); continue
+            except Exception as hist_err: messages.append(("warning", f"Hist err r.{row_index}: {hist_err}")); continue
+        except Exception as e_inner: messages.append(("warning", f"Proc err r.{row_index}: {e_inner}")); continue
     # --- Конец цикла for ---
 
     # --- Постобработка и возврат (без изменений) ---
-    if rows_processed_after_filter==0 and time_filter!="All Time": st.info(f"No data for filter: {time_filter}")
-    elif not history_rows and rows_processed_after_filter>0: st.warning("Games processed, history empty.")
+    if rows_processed_after_filter==0 and time_filter!="All Time": messages.append(("info", f"No data for filter: {time_filter}"))
+    elif not history_rows and rows_processed_after_filter>0: messages.append(("warning", "Games processed, history empty."))
     df_hist = pd.DataFrame(history_rows);
     if not df_hist.empty:
         display_cols=HISTORY_DISPLAY_ORDER if 'HISTORY_DISPLAY_ORDER' in globals() else df_hist.columns.tolist(); display_cols=[col for col in display_cols if col in df_hist.columns]; df_hist=df_hist[display_cols]
         try: df_hist['DT_temp']=pd.to_datetime(df_hist['Date'], errors='coerce', utc=True); df_hist.dropna(subset=['DT_temp'], inplace=True); df_hist=df_hist.sort_values(by='DT_temp', ascending=False).drop(columns=['DT_temp'])
-        except Exception as sort_ex: st.warning(f"Hist sort fail: {sort_ex}")
+        except Exception as sort_ex: messages.append(("warning", f"Hist sort fail: {sort_ex}"))
     final_player_stats={};
     for player, champ_data in player_stats.items():
         sorted_champs=dict(sorted(champ_data.items(), key=lambda item: item[1].get('games',0), reverse=True));
         if sorted_champs: final_player_stats[player]=sorted_champs;
-    if not final_player_stats and rows_processed_after_filter>0: st.info("Games processed, no player stats.");
-    return blue_stats, red_stats, df_hist, final_player_stats
+    if not final_player_stats and rows_processed_after_filter>0: messages.append(("info", "Games processed, no player stats."));
+    return blue_stats, red_stats, df_hist, final_player_stats, messages
 # --- Конец функции aggregate_scrims_data ---
+
+# Всё, что страница Scrims показывает по агрегату, в виде готовых строк и чисел:
+# ((W, L, игры) синих, то же красных, HTML истории или None, ((игрок, HTML таблицы), ...), сообщения).
+# Результат неизменяемый, поэтому его можно держать в кэше HTML-фрагментов
+def render_scrims_overview(data, time_filter, champion_id_map):
+    blue_s, red_s, df_hist, player_stats_agg, messages = aggregate_scrims_data(data, time_filter, champion_id_map)
+    blue_record, red_record = (tuple(stats.get(key, 0) for key in ("wins", "losses", "total")) for stats in (blue_s, red_s))
+    history_html = None
+    if df_hist is not None and not df_hist.empty:
+        history_html = df_hist.to_html(escape=False, index=False, classes='history-table', justify='center')
+    player_tables = tuple((player, player_stats_table_html(stats)) for player, stats in player_stats_agg.items())
+    return blue_record, red_record, history_html, player_tables, tuple(messages)
+
+# Пики по сторонам для synergy.SynergyIndex: по строке на команду в каждой игре
+# (team, win, TOP..SUP). Result в листе - результат нашей команды.
+def scrims_picks_frame(data, time_filter="All Time"):
+    columns = ["team", "win"] + SCRIMS_ROLES
+    if not data or len(data) <= 1 or [str(h).strip() for h in data[0]] != SCRIMS_HEADER: return pd.DataFrame(columns=columns)
+    sheet = pd.DataFrame([row[:len(SCRIMS_HEADER)] for row in data[1:] if len(row) >= len(SCRIMS_HEADER)], columns=SCRIMS_HEADER)
+
+    time_threshold = get_time_threshold(time_filter)
+    if time_threshold:
+        dates = pd.to_datetime(sheet["Date"], format="%Y-%m-%d %H:%M:%S", errors="coerce", utc=True)
+        sheet = sheet[(sheet["Date"] == "N/A") | (dates >= time_threshold)]
+
+    sides = []
+    for side in ("Blue", "Red"):
+        team = sheet[f"{side} Team Name"]; is_us = team == TEAM_NAME
+        frame = pd.DataFrame({"team": team, "win": (is_us & (sheet["Result"] == "Win")) | (~is_us & (sheet["Result"] == "Loss"))})
+        for role in SCRIMS_ROLES:
+            champs = sheet[f"{side}_{role}_Champ"]; frame[role] = champs.mask(champs.isin(["N/A", ""]))
+        sides.append(frame)
+    return pd.concat(sides, ignore_index=True)[columns]
+
+def open_scrims_worksheet():
+    client = setup_google_sheets()
+    if not client: raise RuntimeError("GSheets connection failed.")
+    spreadsheet = client.open(SCRIMS_SHEET_NAME)
+    wks = check_if_scrims_worksheet_exists(spreadsheet, SCRIMS_WORKSHEET_NAME)
+    if not wks: raise RuntimeError(f"Worksheet '{SCRIMS_WORKSHEET_NAME}' is unavailable.")
+    return wks
+
+# --- ЗАГРУЗЧИК ДАТАСЕТА "scrims" (DatasetStore в app.py) ---
+# Возвращает все строки листа. sync=True - сначала докачивает новые игры из GRID API
+# (так работает фоновый планировщик обновлений).
+def load_scrims_data(sync=False):
+    wks = open_scrims_worksheet()
+    if sync:
+        logs = []
+        series_list = get_all_series(GRID_API_KEY, logs)
+        if series_list: update_scrims_data(wks, series_list, GRID_API_KEY, logs, None, headless=True)
+    return wks.get_all_values()
 # --- ФУНКЦИЯ ОТОБРАЖЕНИЯ СТРАНИЦЫ SCRIMS (CSS v3 + Расчет Avg Dmg/CS) ---
-def scrims_page():
+# Таблица чемпионов одного игрока (суммы KDA/Dmg/CS -> средние), None если игр нет
+def player_stats_table_html(player_data_agg_sums):
+    stats_list_for_df = []
+    sorted_champs = sorted(player_data_agg_sums.items(), key=lambda item: item[1].get('games', 0), reverse=True) # Сортировка чемпов
+    for champ, stats_sums in sorted_champs:
+        games = stats_sums.get('games', 0)
+        if games > 0:
+            wins = stats_sums.get('wins', 0); k_sum = stats_sums.get('k', 0); d_sum = stats_sums.get('d', 0); a_sum = stats_sums.get('a', 0)
+            dmg_sum = stats_sums.get('dmg', 0); cs_sum = stats_sums.get('cs', 0)
+            win_rate = (wins / games * 100); kda = (k_sum + a_sum) / max(1, d_sum)
+            # --- ВЫЧИСЛЯЕМ СРЕДНИЕ Dmg/CS ---
+            avg_dmg = dmg_sum / games
+            avg_cs = cs_sum / games
+            # ---
+            stats_list_for_df.append({'Icon': get_champion_icon_html(champ, width=30, height=30), 'Games': games, 'WR%': win_rate, 'KDA': f"{kda:.1f}", 'Avg Dmg': f"{avg_dmg:.0f}", 'Avg CS': f"{avg_cs:.1f}" })
+    if not stats_list_for_df: return None
+
+    df_player = pd.DataFrame(stats_list_for_df)
+    df_player['WR%'] = df_player['WR%'].apply(color_win_rate_scrims)
+    cols_html = "".join([f'<col style="width:{w}">' for w in ['38px','45px','60px','45px','60px','50px']])
+    table_html = df_player.to_html(escape=False, index=False, columns=['Icon', 'Games', 'WR%', 'KDA', 'Avg Dmg', 'Avg CS'], classes='player-stats', justify='center')
+    # Убрана строка с .replace('<thead>', ...)
+    return table_html.replace('<tbody>', f'<colgroup>{cols_html}</colgroup><tbody>', 1)
+
+# Таблица самых частых комбинаций чемпионов на ролях `roles`, None если игр нет
+def synergy_table_html(scrims_rows, time_f, roles):
+    synergies = SynergyIndex(scrims_picks_frame(scrims_rows, time_f), SCRIMS_ROLES)
+    top = synergies.top(TEAM_NAME, roles)
+    if top.empty: return None
+    df_syn = pd.DataFrame({"Champions": top[roles].apply(lambda combo: " ".join(get_champion_icon_html(champ) for champ in combo), axis=1),
+                           "Combo": top[roles].apply(" / ".join, axis=1), "Games": top["games"], "WR%": top["win_rate"].apply(color_win_rate_scrims)})
+    return df_syn.to_html(escape=False, index=False, classes='history-table', justify='center')
+
+def scrims_page(store):
     st.title(f"Scrims Analysis - {TEAM_NAME}")
     if st.button("⬅️ Back to HLL Stats"): st.session_state.current_page = "Hellenic Legends League Stats"; st.rerun()
 
     champion_id_map = get_champion_data()
 
-    client = setup_google_sheets();
-    if not client: st.error("GSheets connection failed."); return
-    try: spreadsheet = client.open(SCRIMS_SHEET_NAME)
+    try: store.get("scrims")
     except Exception as e: st.error(f"Sheet open error: {e}"); return
-    wks = check_if_scrims_worksheet_exists(spreadsheet, SCRIMS_WORKSHEET_NAME);
-    if not wks: return
 
     with st.expander("Update Scrim Data from GRID API", expanded=False):
         # ... (код кнопки обновления без изменений) ...
@@ -908,7 +919,9 @@ def scrims_page():
             if series_list:
                 st.info(f"Checking {len(series_list)} series...")
                 progress_bar_placeholder=st.empty(); progress_bar=progress_bar_placeholder.progress(0,"Starting...")
-                try: data_added = update_scrims_data(wks, series_list, GRID_API_KEY, logs, progress_bar)
+                try:
+                    data_added = update_scrims_data(open_scrims_worksheet(), series_list, GRID_API_KEY, logs, progress_bar)
+                    if data_added: store.refresh("scrims")
                 except Exception as e: log_message(f"Update error: {e}", logs); st.error(f"Update failed: {e}")
                 finally: progress_bar_placeholder.empty()
             else: st.warning("No recent series."); log_message("No series.", logs)
@@ -920,32 +933,42 @@ def scrims_page():
 
     time_f = st.selectbox("Filter:", ["All Time", "3 Days", "1 Week", "2 Weeks", "4 Weeks", "2 Months"], key="scrims_time_filter")
 
-    # Агрегация данных (получаем суммы KDA/Dmg/CS)
-    blue_s, red_s, df_hist, player_stats_agg = aggregate_scrims_data(wks, time_f, champion_id_map)
+    # Ключ кэша HTML-фрагментов: фильтр (относительные окна сдвигаются раз в час) и версии данных/иконок
+    time_threshold = get_time_threshold(time_f)
+    fragment_key = (TEAM_NAME, time_f, time_threshold.strftime("%Y-%m-%d %H") if time_threshold else None,
+                    store.version("scrims"), store.version("ddragon"))
+
+    # Агрегация данных (суммы KDA/Dmg/CS), сразу отрисованная в строки. Кэшируется под тем же
+    # ключом, что и остальные HTML-фрагменты; сообщения агрегации выводятся при каждом запуске
+    scrims_rows = store.get("scrims")
+    blue_rec, red_rec, history_html, player_tables, agg_messages = fragments.render(
+        ("scrims_overview",) + fragment_key, lambda: render_scrims_overview(scrims_rows, time_f, champion_id_map))
+    for level, message in agg_messages: getattr(st, level)(message)
 
     # Отображение общей статистики
     try:
-        total_g=blue_s.get("total",0)+red_s.get("total",0); total_w=blue_s.get("wins",0)+red_s.get("wins",0); total_l=blue_s.get("losses",0)+red_s.get("losses",0)
+        (b_w, b_l, b_g), (r_w, r_l, r_g) = blue_rec, red_rec
+        total_g=b_g+r_g; total_w=b_w+r_w; total_l=b_l+r_l
         st.markdown(f"**Overall ({time_f})**"); co, cb, cr = st.columns(3)
         with co: wr=(total_w/max(1,total_g)*100); st.metric("Games", total_g); st.metric("Win Rate", f"{wr:.1f}%", f"{total_w}W-{total_l}L")
-        with cb: bwr=(blue_s.get("wins",0)/max(1,blue_s.get("total",0))*100); st.metric("Blue WR",f"{bwr:.1f}%", f"{blue_s.get('wins',0)}W-{blue_s.get('losses',0)}L ({blue_s.get('total',0)}G)")
-        with cr: rwr=(red_s.get("wins",0)/max(1,red_s.get("total",0))*100); st.metric("Red WR",f"{rwr:.1f}%", f"{red_s.get('wins',0)}W-{red_s.get('losses',0)}L ({red_s.get('total',0)}G)")
+        with cb: bwr=(b_w/max(1,b_g)*100); st.metric("Blue WR",f"{bwr:.1f}%", f"{b_w}W-{b_l}L ({b_g}G)")
+        with cr: rwr=(r_w/max(1,r_g)*100); st.metric("Red WR",f"{rwr:.1f}%", f"{r_w}W-{r_l}L ({r_g}G)")
     except Exception as e: st.error(f"Err summary stats: {e}")
 
     st.divider()
 
-    tab1, tab2 = st.tabs(["📜 Match History (Games)", "📊 Player Champion Stats"])
+    tab1, tab2, tab3 = st.tabs(["📜 Match History (Games)", "📊 Player Champion Stats", "🤝 Synergies"])
 
     with tab1: # История матчей
         st.subheader(f"Game History ({time_f})")
-        if df_hist is not None and not df_hist.empty:
-            st.markdown("""<style> .history-table { font-size: 0.85rem; width: auto; margin: 5px auto; border-collapse: collapse; } .history-table th, .history-table td { padding: 4px 6px; text-align: center; vertical-align: middle; border: 1px solid #555; white-space: nowrap; } .history-table td img { width: 22px; height: 22px; margin: 0 1px; vertical-align: middle; } .history-table td:nth-child(4), .history-table td:nth-child(5), .history-table td:nth-child(6), .history-table td:nth-child(7) { min-width: 130px; } </style>""", unsafe_allow_html=True)
-            st.markdown(df_hist.to_html(escape=False, index=False, classes='history-table', justify='center'), unsafe_allow_html=True)
+        if history_html is not None:
+            st.markdown("""<style> .history-table { font-size: 0.85rem; width: auto; margin: 5px auto; border-collapse: collapse; } .history-table th, .history-table td { padding: 4px 6px; text-align: center; vertical-align: middle; border: 1px solid #555; white-space: nowrap; } .history-table td img { width: 22px; height: 22px; margin: 0 1px; vertical-align: middle; } .history-table td .champion-icon { --icon-size: 22px; } .history-table td:nth-child(4), .history-table td:nth-child(5), .history-table td:nth-child(6), .history-table td:nth-child(7) { min-width: 130px; } </style>""", unsafe_allow_html=True)
+            st.markdown(history_html, unsafe_allow_html=True)
         else: st.info(f"No history for: {time_f}.")
 
     with tab2: # Статистика игроков
         st.subheader(f"Player Champion Stats ({time_f})")
-        if not player_stats_agg: st.info(f"No player stats for {time_f}.")
+        if not player_tables: st.info(f"No player stats for {time_f}.")
         else:
              player_order = [PLAYER_IDS[pid] for pid in ["26433","25262","25266","20958","21922"] if pid in PLAYER_IDS]
              player_cols = st.columns(len(player_order))
@@ -957,33 +980,15 @@ def scrims_page():
                           if PLAYER_IDS.get(pid) == player_name: player_role = role; break
                      st.markdown(f"**{player_name}** ({player_role})")
 
-                     player_data_agg_sums = player_stats_agg.get(player_name, {}) # Получаем данные с суммами
-                     stats_list_for_df = []
-                     sorted_champs = sorted(player_data_agg_sums.items(), key=lambda item: item[1].get('games', 0), reverse=True) # Сортировка чемпов
-
-                     if sorted_champs:
-                         for champ, stats_sums in sorted_champs:
-                             games = stats_sums.get('games', 0)
-                             if games > 0:
-                                 wins = stats_sums.get('wins', 0); k_sum = stats_sums.get('k', 0); d_sum = stats_sums.get('d', 0); a_sum = stats_sums.get('a', 0)
-                                 dmg_sum = stats_sums.get('dmg', 0); cs_sum = stats_sums.get('cs', 0)
-                                 win_rate = (wins / games * 100); kda = (k_sum + a_sum) / max(1, d_sum)
-                                 # --- ВЫЧИСЛЯЕМ СРЕДНИЕ Dmg/CS ---
-                                 avg_dmg = dmg_sum / games
-                                 avg_cs = cs_sum / games
-                                 # ---
-                                 stats_list_for_df.append({'Icon': get_champion_icon_html(champ, width=30, height=30), 'Games': games, 'WR%': win_rate, 'KDA': f"{kda:.1f}", 'Avg Dmg': f"{avg_dmg:.0f}", 'Avg CS': f"{avg_cs:.1f}" })
-
-                     if stats_list_for_df:
-                         df_player = pd.DataFrame(stats_list_for_df)
-                         df_player['WR%'] = df_player['WR%'].apply(color_win_rate_scrims)
+                     table_html = dict(player_tables).get(player_name)
+                     if table_html:
                          # --- ВОЗВРАЩАЕМ CSS ИЗ ОТВЕТА №36 ---
                          st.markdown("""
                          <style>
                          .player-stats { font-size: 0.9rem; width: 100%; margin: 5px 0; border-collapse: collapse; table-layout: fixed; }
                          .player-stats th, .player-stats td { padding: 5px 4px; text-align: center; vertical-align: middle; border: 1px solid #555; white-space: nowrap; overflow: hidden; text-overflow: ellipsis; }
                          .player-stats th { font-weight: 600; background-color: #262730; }
-                         .player-stats img { margin: 0 1px; vertical-align: middle; }
+                         .player-stats img, .player-stats .champion-icon { margin: 0 1px; vertical-align: middle; }
                          .player-stats td:nth-child(2), .player-stats td:nth-child(4), .player-stats td:nth-child(5), .player-stats td:nth-child(6) { text-align: right; padding-right: 5px; }
                          .player-stats td:nth-child(3) { text-align: center; }
                          .player-stats colgroup col:nth-child(1) { width: 38px; }  /* Icon */
@@ -994,12 +999,18 @@ def scrims_page():
                          .player-stats colgroup col:nth-child(6) { width: 50px; }  /* Avg CS */
                          </style>""", unsafe_allow_html=True)
                          # --- КОНЕЦ ВОЗВРАЩЕНИЯ CSS ---
-                         cols_html = "".join([f'<col style="width:{w}">' for w in ['38px','45px','60px','45px','60px','50px']])
-                         table_html = df_player.to_html(escape=False, index=False, columns=['Icon', 'Games', 'WR%', 'KDA', 'Avg Dmg', 'Avg CS'], classes='player-stats', justify='center')
-                         # Убрана строка с .replace('<thead>', ...)
-                         table_html = table_html.replace('<tbody>', f'<colgroup>{cols_html}</colgroup><tbody>', 1)
                          st.markdown(table_html, unsafe_allow_html=True)
                      else: st.caption("No stats.")
 
+    with tab3: # Синергии пиков нашей команды
+        st.subheader(f"Champion Synergies ({time_f})")
+        synergy_roles = st.multiselect("Roles (2-3):", SCRIMS_ROLES, default=["BOT", "SUP"], max_selections=3, key="scrims_synergy_roles")
+        if len(synergy_roles) < 2: st.info("Select 2 or 3 roles.")
+        else:
+            roles = [role for role in SCRIMS_ROLES if role in synergy_roles]
+            syn_html = fragments.render(("scrims_synergy", tuple(roles)) + fragment_key, lambda: synergy_table_html(scrims_rows, time_f, roles))
+            if syn_html is None: st.info(f"No games with these roles for: {time_f}.")
+            else: st.markdown(syn_html, unsafe_allow_html=True)
+
 # --- Блок if __name__ == "__main__": (без изменений) ---
 if __name__ == "__main__": pass
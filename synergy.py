@@ -0,0 +1,72 @@
+# Champion synergy statistics for every combination of 2 or 3 roles
+# (HLL game table in app.py, scrim sheet rows in scrims.py)
+from itertools import combinations
+
+import pandas as pd
+
+COMBO_SIZES = (2, 3)
+CHAMPION_COLUMNS = ['champion_1', 'champion_2', 'champion_3']
+
+
+def synergy_stats(picks, roles, key_columns=('team',), sizes=COMBO_SIZES):
+    """
+    Games, wins and win rate of every champion combination for every 2- and 3-role
+    combination of `roles`, in one groupby over all combinations at once.
+
+    `picks` has one row per team per game: the `key_columns`, a boolean `win` column
+    and one champion column per role (missing picks as None/NaN). Combinations keep
+    the order of `roles` and, within a role combination, the order of first appearance.
+    """
+    key_columns = list(key_columns)
+    frames = []
+    for size in sizes:
+        for role_combo in combinations(roles, size):
+            frame = picks[key_columns + ['win']].copy()
+            frame['roles'] = '+'.join(role_combo)
+            for column, role in zip(CHAMPION_COLUMNS, role_combo):
+                frame[column] = picks[role]
+            frames.append(frame.dropna(subset=CHAMPION_COLUMNS[:size]))
+    if not frames:
+        return pd.DataFrame(columns=key_columns + ['roles'] + CHAMPION_COLUMNS + ['games', 'wins', 'win_rate'])
+
+    combos = pd.concat(frames, ignore_index=True)
+    stats = (combos.groupby(key_columns + ['roles'] + CHAMPION_COLUMNS, sort=False, dropna=False)['win']
+             .agg(games='size', wins='sum')
+             .reset_index())
+    stats['win_rate'] = stats['wins'] / stats['games'] * 100
+    return stats
+
+
+class SynergyIndex:
+    """
+    Synergy statistics split per key (e.g. team) and role combination, so the top
+    combinations of any team for any role set are a dict lookup away.
+    """
+
+    def __init__(self, picks, roles, key_columns=('team',), sizes=COMBO_SIZES):
+        self.roles = list(roles)
+        self.key_columns = list(key_columns)
+        stats = synergy_stats(picks, self.roles, self.key_columns, sizes)
+        self.groups = {
+            group_key: group.reset_index(drop=True)
+            for group_key, group in stats.groupby(self.key_columns + ['roles'], sort=False)
+        }
+
+    def ordered_roles(self, roles):
+        return [role for role in self.roles if role in roles]
+
+    def top(self, key, roles, n=None, min_games=1):
+        """
+        Combinations of `roles` for `key` (a value, or a tuple with one value per key
+        column) with at least `min_games` games, most played first. Champion columns
+        are named after their roles.
+        """
+        roles = self.ordered_roles(roles)
+        key = key if isinstance(key, tuple) else (key,)
+        group = self.groups.get(key + ('+'.join(roles),))
+        columns = roles + ['games', 'wins', 'win_rate']
+        if group is None:
+            return pd.DataFrame(columns=columns)
+        top = group[group['games'] >= min_games].rename(columns=dict(zip(CHAMPION_COLUMNS, roles)))
+        top = top.sort_values('games', ascending=False, kind='stable')[columns]
+        return top if n is None else top.head(n)
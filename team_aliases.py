@@ -0,0 +1,42 @@
+# Team alias registry compiled from team_aliases.yaml
+import os
+import re
+
+import yaml
+
+TEAM_ALIASES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "team_aliases.yaml")
+
+
+class AliasRegistry:
+    """
+    Maps raw names to canonical ones. Aliases are compiled into an exact-match dict plus
+    one alternation pattern (longest alias first) for names that only contain an alias,
+    so the cost of a lookup does not grow with the number of aliases.
+    """
+
+    def __init__(self, aliases):
+        self.exact = {}
+        for canonical_name, names in aliases.items():
+            for alias in names or []:
+                self.exact.setdefault(str(alias).lower(), canonical_name)
+        ordered = sorted(self.exact, key=len, reverse=True)
+        self.pattern = re.compile("|".join(re.escape(alias) for alias in ordered)) if ordered else None
+
+    @classmethod
+    def load(cls, path=TEAM_ALIASES_FILE):
+        try:
+            with open(path, encoding="utf-8") as f:
+                aliases = yaml.safe_load(f) or {}
+        except OSError:
+            aliases = {}
+        return cls(aliases)
+
+    def resolve(self, name):
+        """Canonical name for `name`, or None if it matches no alias."""
+        if name in self.exact:
+            return self.exact[name]
+        if self.pattern is not None:
+            match = self.pattern.search(name)
+            if match:
+                return self.exact[match.group(0)]
+        return None